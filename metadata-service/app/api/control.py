@@ -1,9 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends, Body
-from typing import Dict, Any, Optional
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, List, Literal, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 from app.core.dockerctl import DockerControl
 from app.core.logger import setup_logger
+from app.services.progress import progress_tracker
+from app.services.stack_control import stack_control, dependency_levels
 
 logger = setup_logger("control_api")
 router = APIRouter()
@@ -18,6 +21,15 @@ class ServiceResponse(BaseModel):
     timestamp: datetime
     result: Dict[str, Any]
 
+class StackRequest(BaseModel):
+    services: Optional[List[str]] = Field(None, description="Services to act on; the whole stack when omitted")
+
+class StackResponse(BaseModel):
+    status: str
+    message: str
+    data: Optional[Dict[str, Any]] = None
+    timestamp: datetime
+
 def get_docker_control():
     return DockerControl()
 
@@ -74,3 +86,89 @@ async def control_restart_service(
     except Exception as e:
         logger.error(f"Failed to restart service {service.name}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stack", response_model=StackResponse)
+async def get_stack():
+    """The compose dependency graph, its start order by level, and the last start's timings"""
+    try:
+        graph = stack_control.graph()
+        levels = dependency_levels(graph, sorted(graph))
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read the compose files: {str(e)}")
+    return {
+        "status": "success",
+        "message": f"{len(graph)} services in {len(levels)} levels",
+        "data": {
+            "services": {name: service.depends_on for name, service in graph.items()},
+            "levels": levels,
+            "running": stack_control.running(),
+            "last_start": stack_control.last_start
+        },
+        "timestamp": datetime.utcnow()
+    }
+
+@router.post("/stack/{action}", response_model=StackResponse, status_code=202)
+async def start_stack_operation(action: Literal["start", "stop", "restart"], request: StackRequest = Body(StackRequest())):
+    """
+    Start, stop or restart a set of services in dependency order, in the background.
+
+    A start brings up the services and everything they depend on, one
+    level of the depends_on graph at a time with the services of a level in
+    parallel, and waits for each level to be healthy before the next. A
+    stop goes the other way and covers only the given services. Follow the
+    operation at /stack/{id} or /stack/{id}/events; the final report has the
+    total time, which for a full start is the stack's cold start time.
+    """
+    try:
+        operation = stack_control.plan(action, request.services)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read the compose files: {str(e)}")
+    try:
+        stack_control.start(operation)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.info("Stack %s %s started for %s", action, operation.id, ", ".join(operation.services))
+    return {
+        "status": "accepted",
+        "message": f"Stack {action} {operation.id} started",
+        "data": progress_tracker.get(operation.id),
+        "timestamp": datetime.utcnow()
+    }
+
+@router.get("/stack/{operation_id}", response_model=StackResponse)
+async def get_stack_operation(operation_id: str):
+    """Get the progress, and once finished the timings, of a stack operation"""
+    progress = progress_tracker.get(operation_id)
+    if not progress or not str(progress.get("operation", "")).startswith("stack_"):
+        raise HTTPException(status_code=404, detail=f"Stack operation {operation_id} not found")
+    return {
+        "status": "success",
+        "message": f"Stack operation {operation_id} is {progress['status']}",
+        "data": progress,
+        "timestamp": datetime.utcnow()
+    }
+
+@router.get("/stack/{operation_id}/events")
+async def stream_stack_operation(operation_id: str):
+    """Stream the progress of a stack operation as Server-Sent Events"""
+    if progress_tracker.get(operation_id) is None:
+        raise HTTPException(status_code=404, detail=f"Stack operation {operation_id} not found")
+    return StreamingResponse(
+        progress_tracker.stream(operation_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/stack/{operation_id}/cancel", response_model=StackResponse)
+async def cancel_stack_operation(operation_id: str):
+    """Stop a stack operation after its current level's commands; services already acted on stay as they are"""
+    if not stack_control.cancel(operation_id):
+        raise HTTPException(status_code=404, detail=f"No running stack operation {operation_id}")
+    return {
+        "status": "success",
+        "message": f"Stack operation {operation_id} cancelled",
+        "data": None,
+        "timestamp": datetime.utcnow()
+    }
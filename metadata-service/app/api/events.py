@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Query, HTTPException, Body, Depends
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import Optional, Dict, Any
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from app.core.rabbitmq import RabbitMQClient
 from app.core.logger import setup_logger
+from app.services.stream_probe import stream_probe
 
 logger = setup_logger("events_api")
 router = APIRouter()
@@ -21,15 +23,44 @@ class EventResponse(BaseModel):
 def get_rabbitmq_client():
     return RabbitMQClient()
 
-@router.post("/on_publish", response_model=EventResponse)
-async def on_publish(
-    data: EventData = Body(...),
-    rabbitmq: RabbitMQClient = Depends(get_rabbitmq_client)
-):
-    event_id = f"pub-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{data.user or 'unknown'}"
+async def read_event(request: Request) -> EventData:
+    """
+    The event from a JSON body, or from the form fields and query string
+    nginx-rtmp sends (its `name` is the stream; the rest go in additional_data).
+    """
+    content_type = request.headers.get("content-type", "")
+    fields: Dict[str, Any] = dict(request.query_params)
+    try:
+        if content_type.startswith("application/json"):
+            data = EventData(**await request.json())
+            data.stream = data.stream or fields.get("name")
+            return data
+        if content_type.startswith(("application/x-www-form-urlencoded", "multipart/form-data")):
+            form = await request.form()
+            fields.update((key, value) for key, value in form.items() if isinstance(value, str))
+    except (ValueError, TypeError, ValidationError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid event body: {e}")
+    return EventData(user=fields.pop("user", None), stream=fields.pop("name", None), additional_data=fields)
+
+def _logged(event_id: str):
+    def done(future: "asyncio.Future"):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Failed to publish stream event {event_id}: {error}")
+        else:
+            logger.info("Processed stream event: %s", event_id)
+    return done
+
+def publish_event(rabbitmq: RabbitMQClient, event_type: str, event_id: str, data: EventData):
+    """
+    Forward an event to the stream_events queue in the background. nginx-rtmp
+    refuses a publish whose hook fails, so a broker outage must not fail it.
+    """
     enriched_data = {
         "event_id": event_id,
-        "event_type": "on_publish",
+        "event_type": event_type,
         "timestamp": datetime.utcnow().isoformat(),
         "data": data.dict(),
         "provenance": {
@@ -38,43 +69,38 @@ async def on_publish(
             "version": "1.0.0",
         }
     }
-    try:
-        rabbitmq.publish_message("stream_events", enriched_data)
-        logger.info(f"Processed on_publish event: {event_id}")
-        return {
-            "status": "success",
-            "event_id": event_id,
-            "timestamp": datetime.utcnow()
-        }
-    except Exception as e:
-        logger.error(f"Failed to process on_publish event: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to process event: {str(e)}")
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(None, rabbitmq.publish_message, "stream_events", enriched_data)
+    future.add_done_callback(_logged(event_id))
+
+@router.post("/on_publish", response_model=EventResponse)
+async def on_publish(
+    data: EventData = Depends(read_event),
+    rabbitmq: RabbitMQClient = Depends(get_rabbitmq_client)
+):
+    stream_probe.observe_hook(data.stream)
+    if stream_probe.is_probe(data.stream):
+        # Synthetic probe streams are not stream events
+        return {"status": "skipped", "event_id": data.stream, "timestamp": datetime.utcnow()}
+    event_id = f"pub-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{data.user or 'unknown'}"
+    publish_event(rabbitmq, "on_publish", event_id, data)
+    return {
+        "status": "accepted",
+        "event_id": event_id,
+        "timestamp": datetime.utcnow()
+    }
 
 @router.post("/on_publish_done", response_model=EventResponse)
 async def on_publish_done(
-    data: EventData = Body(...),
+    data: EventData = Depends(read_event),
     rabbitmq: RabbitMQClient = Depends(get_rabbitmq_client)
 ):
+    if stream_probe.is_probe(data.stream):
+        return {"status": "skipped", "event_id": data.stream, "timestamp": datetime.utcnow()}
     event_id = f"pubdone-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{data.user or 'unknown'}"
-    enriched_data = {
+    publish_event(rabbitmq, "on_publish_done", event_id, data)
+    return {
+        "status": "accepted",
         "event_id": event_id,
-        "event_type": "on_publish_done",
-        "timestamp": datetime.utcnow().isoformat(),
-        "data": data.dict(),
-        "provenance": {
-            "processed_by": "metadata_enricher",
-            "processed_at": datetime.utcnow().isoformat(),
-            "version": "1.0.0",
-        }
+        "timestamp": datetime.utcnow()
     }
-    try:
-        rabbitmq.publish_message("stream_events", enriched_data)
-        logger.info(f"Processed on_publish_done event: {event_id}")
-        return {
-            "status": "success",
-            "event_id": event_id,
-            "timestamp": datetime.utcnow()
-        }
-    except Exception as e:
-        logger.error(f"Failed to process on_publish_done event: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to process event: {str(e)}")
@@ -1,21 +1,22 @@
 # app/api/finalizer.py
 
 import os
+import tempfile
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Depends, Body
+from fastapi.responses import Response, StreamingResponse
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
-from app.services.finalizer import finalize_video
 from app.services.finalizer_service import finalizer_service
-from app.core.minio_client import MinIOClient
+from app.services.progress import progress_tracker
+from app.services.listing import encode_cursor, decode_cursor
 from app.core.config import (
     MINIO_METADATA_BUCKET, THUMBNAIL_OBJECT_PREFIX, 
-    METADATA_OBJECT_PREFIX, MINIO_ASSETS_BUCKET
+    METADATA_OBJECT_PREFIX, MINIO_ASSETS_BUCKET, TEMP_DIR
 )
 from app.core.logging import log_streamer
 
 router = APIRouter(tags=["Finalizer"])
-minio = MinIOClient()
 
 class FinalizationResponse(BaseModel):
     status: str
@@ -27,6 +28,18 @@ class FinalizationRequest(BaseModel):
     source: str
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
+class JobProgressResponse(BaseModel):
+    job_id: str
+    status: str
+    stage: str
+    percent: Optional[float] = None
+    fps: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    updated_at: float
+
+    class Config:
+        extra = "allow"
+
 class JobStatusResponse(BaseModel):
     job_id: str
     status: str
@@ -46,52 +59,40 @@ async def finalize(
     If source == '-', expects a file upload.
     Otherwise, source may be a URL or local path.
     """
+    tmp_path = None
     try:
         if source == "-" and upload:
-            tmp_path = f"/tmp/{upload.filename}"
-            with open(tmp_path, "wb") as f:
+            # Unique per request, so concurrent uploads of the same filename don't collide
+            suffix = os.path.splitext(upload.filename or "")[1]
+            fd, tmp_path = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=TEMP_DIR)
+            with os.fdopen(fd, "wb") as f:
                 f.write(await upload.read())
             source = tmp_path
 
         # Log the finalization attempt
         log_streamer.info(f"Starting synchronous finalization for {source}")
         
-        thumb_path, metadata = finalize_video(source)
-
-        # Upload thumbnail to the correct path
-        thumb_key = f"{THUMBNAIL_OBJECT_PREFIX}{os.path.basename(thumb_path)}"
-        meta_key = f"{METADATA_OBJECT_PREFIX}{os.path.splitext(os.path.basename(thumb_path))[0]}.json"
-
-        with open(thumb_path, "rb") as f:
-            minio.upload_file(
-                bucket_name=MINIO_METADATA_BUCKET,
-                object_name=thumb_key,
-                file_data=f,
-                content_type="image/jpeg"
-            )
-            
-        minio.upload_json(
-            bucket_name=MINIO_METADATA_BUCKET,
-            object_name=meta_key,
-            data=metadata
-        )
-
-        # Clean up the temporary thumbnail file
-        if os.path.exists(thumb_path):
-            os.unlink(thumb_path)
+        # Runs off the event loop; concurrent requests for the same source share one run
+        job = await finalizer_service.finalize_now(source)
+        if job["status"] != "completed":
+            raise RuntimeError(job.get("error") or f"Finalization ended with status {job['status']}")
 
         log_streamer.info(f"Completed synchronous finalization for {source}")
         return {
             "status": "success",
-            "results": {
-                "thumbnail": f"s3://{MINIO_METADATA_BUCKET}/{thumb_key}",
-                "metadata": f"s3://{MINIO_METADATA_BUCKET}/{meta_key}"
-            },
+            "job_id": job["job_id"],
+            "results": job.get("results"),
             "timestamp": datetime.utcnow()
         }
     except Exception as e:
         log_streamer.error(f"Error in synchronous finalization: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
 
 @router.post("/async", response_model=FinalizationResponse)
 async def finalize_async(
@@ -121,10 +122,54 @@ async def get_job_status(job_id: str) -> Dict:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     return job
 
+@router.get("/job/{job_id}/progress", response_model=JobProgressResponse)
+async def get_job_progress(job_id: str) -> Dict:
+    """Get the live in-memory progress of a finalization job"""
+    progress = progress_tracker.get(job_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail=f"No live progress for job {job_id}")
+    return progress
+
+@router.get("/job/{job_id}/events")
+async def stream_job_progress(job_id: str):
+    """Stream progress updates for a job as Server-Sent Events"""
+    return StreamingResponse(
+        progress_tracker.stream(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/progress", response_model=List[JobProgressResponse])
+async def list_job_progress() -> List:
+    """Get the live in-memory progress of all tracked jobs"""
+    return progress_tracker.snapshot()
+
+@router.get("/progress/events")
+async def stream_all_progress():
+    """Stream progress updates for all jobs as Server-Sent Events"""
+    return StreamingResponse(
+        progress_tracker.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/jobs", response_model=List[JobStatusResponse])
-async def list_jobs(status: Optional[str] = Query(None)) -> List:
-    """List all finalization jobs with optional status filter"""
-    return await finalizer_service.list_jobs(status)
+async def list_jobs(
+    response: Response,
+    status: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page")
+) -> List:
+    """List finalization jobs with optional status filter, a page at a time"""
+    try:
+        start_after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    jobs, last_name = await finalizer_service.list_jobs(status, limit=limit, start_after=start_after)
+    if last_name is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(last_name)
+    return jobs
 
 @router.post("/complete")
 async def finalize_event(
@@ -1,60 +1,30 @@
-from fastapi import APIRouter, Depends
-from typing import Dict, Any
+from fastapi import APIRouter, Query
+from typing import Dict, Any, Optional
 from pydantic import BaseModel
-from app.core.rabbitmq import RabbitMQClient
-from app.core.dockerctl import DockerControl
-from app.core.minio_client import MinIOClient
+from app.services.health_monitor import health_monitor
+from app.services.stream_probe import stream_probe
 
 router = APIRouter()
 
 class HealthResponse(BaseModel):
     status: str
+    checked_at: Optional[float]
+    age_seconds: Optional[float]
     components: Dict[str, Any]
 
-def get_rabbitmq_client():
-    return RabbitMQClient()
-
-def get_docker_control():
-    return DockerControl()
-
-def get_minio_client():
-    return MinIOClient()
-
 @router.get("/", response_model=HealthResponse)
 async def health(
-    rabbitmq: RabbitMQClient = Depends(get_rabbitmq_client),
-    docker: DockerControl = Depends(get_docker_control),
-    minio: MinIOClient = Depends(get_minio_client)
+    fresh: bool = Query(False, description="Probe every component before answering"),
+    deep: bool = Query(False, description="Also run the deep checks, e.g. a synthetic stream through RTMP to HLS")
 ):
-    rabbitmq_status = "healthy"
-    docker_status = "healthy"
-    minio_status = "healthy"
-    
-    try:
-        rabbitmq.check_connection()
-    except Exception:
-        rabbitmq_status = "unhealthy"
-    
-    try:
-        docker.check_daemon()
-    except Exception:
-        docker_status = "unhealthy"
-    
-    try:
-        minio.check_connection()
-    except Exception:
-        minio_status = "unhealthy"
-    
-    overall_status = "healthy" if all(
-        status == "healthy" for status in [rabbitmq_status, docker_status, minio_status]
-    ) else "degraded"
-    
-    return {
-        "status": overall_status,
-        "components": {
-            "api": "healthy",
-            "rabbitmq": rabbitmq_status,
-            "docker": docker_status,
-            "minio": minio_status
-        }
-    }
+    """
+    Health of the API and the components it depends on, from the latest
+    background probe round; each component reports its probe latency, last
+    error and when its status last changed.
+    """
+    return await health_monitor.check(fresh, deep)
+
+@router.get("/stream")
+async def stream_probe_results(limit: int = Query(20, ge=1, le=1000)) -> Dict[str, Any]:
+    """Latency percentiles and recent runs of the synthetic stream probe"""
+    return {**stream_probe.stats(), "history": stream_probe.history(limit)}
@@ -0,0 +1,185 @@
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, List, Optional
+from pydantic import BaseModel
+from app.core.config import (
+    LOG_TAIL_MAX_LINES, LOG_KEEPALIVE_SECONDS, LOG_ARCHIVE_ENABLED, LOG_METRICS_ENABLED
+)
+from app.core.logger import setup_logger, logging_stats
+from app.core.logging import log_streamer
+from app.services.log_buffer import log_hub, LogSubscription
+from app.services.log_archive import log_archiver
+from app.services.media_metrics import media_metrics
+from app.services.search_index import parse_time
+import json
+import time
+
+logger = setup_logger("logs_api")
+router = APIRouter()
+
+class LogTailResponse(BaseModel):
+    service: str
+    count: int
+    lines: List[Dict[str, Any]]
+
+def parse_since(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds, an ISO 8601 timestamp, or a relative age like "5m" """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parse_time(value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def backlog(services: Optional[List[str]], n: int, since: Optional[float]) -> List[Dict[str, Any]]:
+    """The last n lines across services, oldest first"""
+    if n <= 0:
+        if since is None:
+            return []
+        n = LOG_TAIL_MAX_LINES
+    lines = []
+    for service in services or log_hub.services():
+        ring = log_hub.ring(service)
+        if ring is not None:
+            lines += [{"service": service, **line} for line in ring.tail(n, since)]
+    lines.sort(key=lambda line: line["timestamp"])
+    return lines[-n:]
+
+@router.get("/")
+async def log_stats() -> Dict[str, Any]:
+    """Buffered lines per service, live viewers, collector state and this service's own log queue"""
+    return {
+        **log_hub.stats(),
+        "app_logging": logging_stats(),
+        "collector": log_streamer.stats(),
+        "archive": log_archiver.stats() if LOG_ARCHIVE_ENABLED else None,
+        "metrics": media_metrics.stats() if LOG_METRICS_ENABLED else None
+    }
+
+@router.get("/metrics")
+async def log_metrics(service: Optional[str] = Query(None)) -> Dict[str, Any]:
+    """Latest value and recent min/avg/max of every media metric parsed from container logs"""
+    return {"series": media_metrics.summary(service), "alerts": media_metrics.alerts()["firing"]}
+
+@router.get("/metrics/{service}/{metric}")
+async def log_metric_points(
+    service: str,
+    metric: str,
+    label: Optional[str] = Query(None, description="Stream label; all labels when omitted"),
+    since: Optional[str] = Query(None, description="Epoch seconds, ISO 8601 or a relative age like 5m")
+) -> Dict[str, Any]:
+    """Get the recent time series of one metric"""
+    series = media_metrics.points(service, metric, label, parse_since(since))
+    if not series:
+        raise HTTPException(status_code=404, detail=f"No samples of {metric} for service {service}")
+    return {"service": service, "metric": metric, "series": series}
+
+@router.get("/alerts")
+async def log_alerts() -> Dict[str, Any]:
+    """Firing and pending media alerts, and recent transitions"""
+    return media_metrics.alerts()
+
+@router.get("/events")
+async def stream_logs(
+    service: Optional[List[str]] = Query(None, description="Services to follow; all when omitted"),
+    n: int = Query(0, ge=0, le=LOG_TAIL_MAX_LINES, description="Recent lines to send first"),
+    since: Optional[str] = Query(None)
+):
+    """
+    Stream log lines as Server-Sent Events.
+
+    A viewer that reads too slowly loses its oldest undelivered lines and
+    is told how many with a `dropped` event.
+    """
+    since_ts = parse_since(since)
+
+    async def events():
+        # Subscribed here, so a response that is never started holds no subscription
+        sub = log_hub.subscribe(service)
+        reported = 0
+        try:
+            for line in backlog(service, n, since_ts):
+                yield f"data: {json.dumps(line)}\n\n"
+            while True:
+                batch = await sub.get(timeout=LOG_KEEPALIVE_SECONDS)
+                if sub.dropped > reported:
+                    yield f"event: dropped\ndata: {json.dumps({'dropped': sub.dropped - reported})}\n\n"
+                    reported = sub.dropped
+                if not batch:
+                    yield ": keepalive\n\n"
+                    continue
+                yield "".join(f"data: {payload}\n\n" for payload in batch)
+        finally:
+            log_hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/ws")
+async def logs_websocket(
+    websocket: WebSocket,
+    service: Optional[List[str]] = Query(None),
+    n: int = Query(0, ge=0, le=LOG_TAIL_MAX_LINES)
+):
+    """
+    Stream log lines over a websocket, as {"lines": [...], "dropped": n}
+    messages batched by arrival; an empty message is a keepalive.
+    """
+    await websocket.accept()
+    sub: LogSubscription = log_hub.subscribe(service)
+    reported = 0
+    try:
+        initial = backlog(service, n, None)
+        if initial:
+            await websocket.send_text(json.dumps({"lines": initial, "dropped": 0}))
+        while True:
+            batch = await sub.get(timeout=LOG_KEEPALIVE_SECONDS)
+            dropped, reported = sub.dropped - reported, sub.dropped
+            # Lines are already JSON; splice them in rather than re-encoding
+            await websocket.send_text(f'{{"lines": [{",".join(batch)}], "dropped": {dropped}}}')
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.warning(f"Log websocket closed: {str(e)}")
+    finally:
+        log_hub.unsubscribe(sub)
+
+@router.get("/{service}/tail", response_model=LogTailResponse)
+async def tail_logs(
+    service: str,
+    n: int = Query(100, ge=1, le=LOG_TAIL_MAX_LINES),
+    since: Optional[str] = Query(None, description="Epoch seconds, ISO 8601 or a relative age like 5m")
+):
+    """Get the most recent buffered log lines of a service"""
+    ring = log_hub.ring(service)
+    if ring is None:
+        raise HTTPException(status_code=404, detail=f"No logs buffered for service {service}")
+    lines = ring.tail(n, parse_since(since))
+    return {"service": service, "count": len(lines), "lines": lines}
+
+@router.get("/{service}/range")
+async def log_range(
+    service: str,
+    start: str = Query(..., alias="from", description="Epoch seconds, ISO 8601 or a relative age like 2h"),
+    end: Optional[str] = Query(None, alias="to", description="Defaults to now"),
+    limit: int = Query(LOG_TAIL_MAX_LINES, ge=1, le=LOG_TAIL_MAX_LINES)
+) -> Dict[str, Any]:
+    """Get archived log lines of a service in a time range, fetching only the chunks that cover it"""
+    if not LOG_ARCHIVE_ENABLED:
+        raise HTTPException(status_code=409, detail="Log archiving is disabled")
+    range_start = parse_since(start)
+    range_end = parse_since(end) if end else time.time()
+    if range_end < range_start:
+        raise HTTPException(status_code=400, detail="'to' is before 'from'")
+    try:
+        return await log_archiver.query(service, range_start, range_end, limit)
+    except Exception as e:
+        logger.error(f"Error reading archived logs of {service}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to read archived logs: {str(e)}")
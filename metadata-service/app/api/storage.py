@@ -1,12 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, Query
-from fastapi.responses import Response
-from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, Query, Request
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from starlette.requests import ClientDisconnect
+from typing import Dict, Any, List, Literal, Optional
 from datetime import datetime
 from pydantic import BaseModel
-from app.core.minio_client import MinIOClient
-from app.core.config import settings
+from app.core.minio_client import MinIOClient, get_minio_client, minio_metrics
+from app.core.config import (
+    MINIO_METADATA_BUCKET, STORAGE_DOWNLOAD_CHUNK_SIZE,
+    STORAGE_LIST_PAGE_SIZE, STORAGE_LIST_MAX_PAGE_SIZE, STORAGE_BATCH_MAX_ITEMS,
+    STORAGE_DOWNLOAD_MODE, THUMB_CACHE_MAX_AGE, SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT,
+    LOCAL_MIRROR_ENABLED, STORAGE_DEDUP_ENABLED
+)
+from app.core.http import (
+    RangeNotSatisfiable, quote_etag, http_date, not_modified, range_applies, parse_range
+)
 from app.core.logger import setup_logger
+from app.services.uploads import stream_form_upload, UploadError
+from app.services.metadata_cache import metadata_cache
+from app.services.listing import encode_cursor, decode_cursor, ndjson_objects, prefix_summaries
+from app.services.metadata_batch import metadata_key, iter_batch_get, iter_batch_save, collect
+from app.services.presign import presigner, PRESIGN_METHODS
+from app.services.local_mirror import local_mirror, mirror_executor, LocalFileResponse
+from app.services.search_index import search_index, indexable, parse_time, SORT_FIELDS
+from app.services.thumbnails import thumbnail_derivatives, thumbnail_name, DerivativeError
+from app.services.dedup import content_store, alias_digest, blob_name, normalize_digest
+from app.services.bulk_storage import bulk_storage, BulkOperation
+from app.services.progress import progress_tracker
+import asyncio
 import json
+import mimetypes
+import time
 
 logger = setup_logger("storage_api")
 router = APIRouter()
@@ -17,14 +40,21 @@ class StorageResponse(BaseModel):
     data: Optional[Dict[str, Any]] = None
     timestamp: datetime = datetime.utcnow()
 
-def get_minio_client():
-    """Dependency to get MinIO client"""
-    return MinIOClient()
+async def object_changed(minio: MinIOClient, bucket: str, object_name: str):
+    """Drop cached reads, listing summaries and derivatives covering an object, and re-index it"""
+    metadata_cache.invalidate(bucket, object_name)
+    prefix_summaries.invalidate(bucket, object_name)
+    content_store.forget(bucket, object_name)
+    if indexable(bucket, object_name):
+        await minio.aio.run(search_index.refresh, minio, bucket, object_name)
+    thumb_name = thumbnail_name(bucket, object_name)
+    if thumb_name is not None:
+        await minio.aio.run(thumbnail_derivatives.invalidate, minio, thumb_name)
 
 @router.get("/health", response_model=StorageResponse)
 async def storage_health(minio: MinIOClient = Depends(get_minio_client)):
     """Check MinIO storage health"""
-    is_healthy = minio.check_connection()
+    is_healthy = await minio.aio.check_connection()
     if is_healthy:
         return {
             "status": "healthy",
@@ -40,48 +70,117 @@ async def storage_health(minio: MinIOClient = Depends(get_minio_client)):
             "timestamp": datetime.utcnow()
         }
 
-@router.post("/upload", response_model=StorageResponse)
+# The body is parsed by hand, so describe the form for the OpenAPI docs
+UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["bucket", "path", "file"],
+                    "properties": {
+                        "bucket": {"type": "string"},
+                        "path": {"type": "string"},
+                        "sha256": {"type": "string", "description": "Hex digest of the file, when content-addressed"},
+                        "file": {"type": "string", "format": "binary"}
+                    }
+                }
+            }
+        }
+    }
+}
+
+@router.post("/upload", response_model=StorageResponse, openapi_extra=UPLOAD_FORM_SCHEMA)
 async def upload_file(
-    bucket: str = Form(...),
-    path: str = Form(...),
-    file: UploadFile = File(...),
+    request: Request,
     minio: MinIOClient = Depends(get_minio_client)
 ):
-    """Upload a file to MinIO storage"""
+    """
+    Upload a file to MinIO storage.
+    
+    The body is streamed into a multipart upload as it arrives instead of
+    being read into memory; `bucket` and `path` must precede `file`. With
+    STORAGE_DEDUP_ENABLED, content that is already stored is not stored again.
+    """
     try:
-        # Read file content
-        file_content = await file.read()
-        
-        # Determine object name (path + filename)
-        object_name = f"{path.rstrip('/')}/{file.filename}"
-        
-        # Upload to MinIO
-        success = minio.upload_file(
-            bucket_name=bucket,
-            object_name=object_name,
-            file_data=file_content,
-            content_type=file.content_type
-        )
-        
-        if success:
-            return {
-                "status": "success",
-                "message": f"File uploaded successfully to {bucket}/{object_name}",
-                "data": {
-                    "bucket": bucket,
-                    "object_name": object_name,
-                    "file_name": file.filename,
-                    "content_type": file.content_type,
-                    "size": len(file_content)
-                },
-                "timestamp": datetime.utcnow()
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Failed to upload file to storage")
+        result = await stream_form_upload(request, minio, dedup=STORAGE_DEDUP_ENABLED)
+        await object_changed(minio, result["bucket"], result["object_name"])
+        return {
+            "status": "success",
+            "message": f"File uploaded successfully to {result['bucket']}/{result['object_name']}",
+            "data": result,
+            "timestamp": datetime.utcnow()
+        }
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ClientDisconnect:
+        logger.warning("Client disconnected during file upload")
+        raise HTTPException(status_code=400, detail="Client disconnected during upload")
     except Exception as e:
         logger.error(f"File upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"File upload error: {str(e)}")
 
+class UploadCheckRequest(BaseModel):
+    bucket: str
+    sha256: str
+    path: Optional[str] = None
+    file_name: Optional[str] = None
+    content_type: Optional[str] = None
+
+@router.post("/upload/check", response_model=StorageResponse)
+async def check_upload(
+    request: UploadCheckRequest,
+    minio: MinIOClient = Depends(get_minio_client)
+):
+    """
+    Ask whether content is already stored before uploading it.
+    
+    When it is and `path` and `file_name` are given, the file is linked
+    under that name here and need not be uploaded at all.
+    """
+    if not STORAGE_DEDUP_ENABLED:
+        raise HTTPException(status_code=409, detail="Content-addressed uploads are not enabled")
+    try:
+        digest = normalize_digest(request.sha256)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        size = await minio.aio.run(content_store.blob_size, minio, request.bucket, digest)
+        content_store.count(checks=1, check_hits=int(size is not None))
+        data = {"bucket": request.bucket, "sha256": digest, "exists": size is not None, "size": size}
+        
+        if size is not None and request.path is not None and request.file_name:
+            object_name = f"{request.path.rstrip('/')}/{request.file_name}"
+            if not await minio.aio.run(content_store.link, minio, request.bucket, object_name,
+                                       digest, request.content_type):
+                raise HTTPException(status_code=500, detail=f"Failed to link {request.bucket}/{object_name}")
+            await object_changed(minio, request.bucket, object_name)
+            content_store.count(uploads=1, deduplicated=1, transfers_skipped=1, bytes_saved=size)
+            data["object_name"] = object_name
+        
+        return {
+            "status": "success",
+            "message": f"Content {digest} is {'already' if size is not None else 'not'} stored in {request.bucket}",
+            "data": data,
+            "timestamp": datetime.utcnow()
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Upload check error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Upload check error: {str(e)}")
+
+@router.get("/dedup/stats", response_model=StorageResponse)
+async def dedup_stats():
+    """Uploads and bytes saved by content addressing"""
+    return {
+        "status": "success",
+        "message": "Content-addressed upload statistics",
+        "data": {"enabled": STORAGE_DEDUP_ENABLED, **content_store.stats()},
+        "timestamp": datetime.utcnow()
+    }
+
 @router.post("/metadata/save", response_model=StorageResponse)
 async def save_metadata(
     key: str = Form(...),
@@ -101,14 +200,19 @@ async def save_metadata(
         if not key.endswith(".json"):
             key = f"{key}.json"
         
-        # Upload to MinIO
-        success = minio.upload_json(
-            bucket_name=settings.MINIO_METADATA_BUCKET,
+        # Upload to MinIO, dropping any cached copy
+        success = await minio.aio.run(
+            metadata_cache.put_json,
+            minio,
+            bucket_name=MINIO_METADATA_BUCKET,
             object_name=key,
             data=json_data
         )
         
+        prefix_summaries.invalidate(MINIO_METADATA_BUCKET, key)
+        
         if success:
+            search_index.index_document(MINIO_METADATA_BUCKET, key, json_data)
             return {
                 "status": "success",
                 "message": f"Metadata saved successfully to {key}",
@@ -134,9 +238,11 @@ async def get_metadata(
         if not key.endswith(".json"):
             key = f"{key}.json"
         
-        # Download from MinIO
-        data = minio.download_json(
-            bucket_name=settings.MINIO_METADATA_BUCKET,
+        # Read through the metadata cache
+        data = await minio.aio.run(
+            metadata_cache.get_json,
+            minio,
+            bucket_name=MINIO_METADATA_BUCKET,
             object_name=key
         )
         
@@ -149,72 +255,503 @@ async def get_metadata(
             }
         else:
             raise HTTPException(status_code=404, detail=f"Metadata not found for key: {key}")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Metadata retrieval error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Metadata retrieval error: {str(e)}")
 
+class BatchGetRequest(BaseModel):
+    keys: List[str]
+
+class BatchDocument(BaseModel):
+    key: str
+    data: Dict[str, Any]
+
+class BatchSaveRequest(BaseModel):
+    documents: List[BatchDocument]
+
+async def _ndjson(results):
+    async for result in results:
+        yield json.dumps(result, default=str) + "\n"
+
+def _batch_response(action: str, collected: Dict[str, Any]) -> Dict[str, Any]:
+    counts = collected["counts"]
+    total = len(collected["results"])
+    succeeded = counts.get("success", 0)
+    return {
+        "status": "success" if succeeded == total else "partial",
+        "message": f"{action} {succeeded} of {total} documents",
+        "data": collected,
+        "timestamp": datetime.utcnow()
+    }
+
+@router.post("/metadata/batch-get", response_model=StorageResponse)
+async def batch_get_metadata(
+    request: BatchGetRequest,
+    format: Literal["json", "ndjson"] = Query("json"),
+    minio: MinIOClient = Depends(get_minio_client)
+):
+    """
+    Get many metadata documents in one request.
+    
+    Each key gets its own status (success, not_found or error). With
+    format=ndjson results are streamed in completion order.
+    """
+    if len(request.keys) > STORAGE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {STORAGE_BATCH_MAX_ITEMS} keys per batch")
+    
+    results = iter_batch_get(minio, request.keys)
+    if format == "ndjson":
+        return StreamingResponse(_ndjson(results), media_type="application/x-ndjson")
+    return _batch_response("Retrieved", await collect(results, request.keys))
+
+@router.post("/metadata/batch-save", response_model=StorageResponse)
+async def batch_save_metadata(
+    request: BatchSaveRequest,
+    format: Literal["json", "ndjson"] = Query("json"),
+    minio: MinIOClient = Depends(get_minio_client)
+):
+    """Save many metadata documents in one request, reporting each one's outcome"""
+    if len(request.documents) > STORAGE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {STORAGE_BATCH_MAX_ITEMS} documents per batch")
+    keys = [metadata_key(doc.key) for doc in request.documents]
+    if len(set(keys)) != len(keys):
+        raise HTTPException(status_code=400, detail="Duplicate keys in batch")
+    
+    documents = [{"key": doc.key, "data": doc.data} for doc in request.documents]
+    results = iter_batch_save(minio, documents)
+    if format == "ndjson":
+        return StreamingResponse(_ndjson(results), media_type="application/x-ndjson")
+    return _batch_response("Saved", await collect(results, keys))
+
+class PresignItem(BaseModel):
+    bucket: str
+    object: str
+    method: str = "GET"
+
+class PresignRequest(BaseModel):
+    items: List[PresignItem]
+    expires: Optional[int] = None
+
+@router.post("/presign", response_model=StorageResponse)
+async def presign_urls(request: PresignRequest):
+    """
+    Hand out presigned GET/PUT URLs in bulk so clients can download from or
+    upload to MinIO directly.
+    """
+    if len(request.items) > STORAGE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {STORAGE_BATCH_MAX_ITEMS} items per request")
+    if request.expires is not None and not 1 <= request.expires <= 7 * 24 * 3600:
+        raise HTTPException(status_code=400, detail="expires must be between 1 second and 7 days")
+    
+    urls = []
+    for item in request.items:
+        if item.method.upper() not in PRESIGN_METHODS:
+            raise HTTPException(status_code=400, detail=f"Unsupported method: {item.method}")
+        urls.append(presigner.sign(item.method, item.bucket, item.object, request.expires))
+    
+    return {
+        "status": "success",
+        "message": f"Presigned {len(urls)} URLs",
+        "data": {"urls": urls},
+        "timestamp": datetime.utcnow()
+    }
+
+@router.get("/metrics", response_model=StorageResponse)
+async def storage_metrics():
+    """Get per-operation MinIO request latencies for this process"""
+    return {
+        "status": "success",
+        "message": "MinIO request latency by operation",
+        "data": minio_metrics.snapshot(),
+        "timestamp": datetime.utcnow()
+    }
+
+@router.get("/cache/stats", response_model=StorageResponse)
+async def cache_stats():
+    """Get metadata cache hit, miss and eviction counters"""
+    return {
+        "status": "success",
+        "message": "Metadata cache statistics",
+        "data": metadata_cache.stats(),
+        "timestamp": datetime.utcnow()
+    }
+
+@router.get("/thumb/stats", response_model=StorageResponse)
+async def thumbnail_stats():
+    """Get thumbnail derivative cache and render counters"""
+    return {
+        "status": "success",
+        "message": "Thumbnail derivative statistics",
+        "data": thumbnail_derivatives.stats(),
+        "timestamp": datetime.utcnow()
+    }
+
+@router.get("/thumb/{key:path}")
+async def get_thumbnail(
+    request: Request,
+    key: str,
+    w: Optional[int] = Query(None, description="Maximum width in pixels"),
+    h: Optional[int] = Query(None, description="Maximum height in pixels"),
+    fmt: Literal["jpeg", "webp", "avif"] = Query("jpeg", description="Output format"),
+    q: Optional[int] = Query(None, description="Encoder quality, 1-100"),
+    v: Optional[str] = Query(None, description="Version tag; marks the response immutable"),
+    minio: MinIOClient = Depends(get_minio_client)
+):
+    """
+    Get a thumbnail resized to fit within w x h and re-encoded as fmt.
+    
+    Derivatives are rendered once, stored in MinIO and kept in memory, so
+    repeated requests are served without decoding the image again.
+    """
+    try:
+        derivative = await thumbnail_derivatives.get(minio, key, w, h, fmt, q)
+        if derivative is None:
+            raise HTTPException(status_code=404, detail=f"Thumbnail not found: {key}")
+        
+        cache_control = f"public, max-age={THUMB_CACHE_MAX_AGE}"
+        if v is not None:
+            cache_control += ", immutable"
+        headers = {"ETag": derivative["etag"], "Cache-Control": cache_control}
+        if not_modified(request.headers.get("if-none-match"), None, derivative["etag"], None):
+            return Response(status_code=304, headers=headers)
+        return Response(derivative["data"], media_type=derivative["content_type"], headers=headers)
+    except DerivativeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Thumbnail error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Thumbnail error: {str(e)}")
+
+@router.get("/search", response_model=StorageResponse)
+async def search_metadata(
+    q: Optional[str] = Query(None, description="Words that must all appear in the title or description"),
+    tag: List[str] = Query([], description="Tags that must all be present; repeatable"),
+    since: Optional[str] = Query(None, description="Generated at or after: ISO 8601 or a relative age like 7d"),
+    until: Optional[str] = Query(None, description="Generated at or before: ISO 8601 or a relative age"),
+    min_duration: Optional[float] = Query(None, description="Minimum duration in seconds"),
+    max_duration: Optional[float] = Query(None, description="Maximum duration in seconds"),
+    sha256: Optional[str] = Query(None, description="SHA-256 hash or hash prefix"),
+    sort: str = Query("-generated_at", description="generated_at or duration, prefixed with - for descending"),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0)
+):
+    """Search metadata documents through the in-memory index, without touching MinIO"""
+    try:
+        if sort.lstrip("-") not in SORT_FIELDS:
+            raise ValueError(f"Unsupported sort '{sort}', use one of: {', '.join(SORT_FIELDS)}")
+        results = search_index.search(
+            q=q, tags=tag, since=parse_time(since), until=parse_time(until),
+            min_duration=min_duration, max_duration=max_duration, sha256=sha256,
+            sort=sort, limit=limit, offset=offset
+        )
+        return {
+            "status": "success",
+            "message": f"Found {results['total']} documents",
+            "data": results,
+            "timestamp": datetime.utcnow()
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
+
+@router.post("/search/rebuild", response_model=StorageResponse)
+async def rebuild_search_index(minio: MinIOClient = Depends(get_minio_client)):
+    """Re-index every metadata document in MinIO in the background"""
+    if search_index.rebuilding:
+        raise HTTPException(status_code=409, detail="A search index rebuild is already running")
+    
+    async def rebuild():
+        try:
+            await minio.aio.run(search_index.rebuild, minio)
+        except Exception as e:
+            logger.error(f"Search index rebuild failed: {str(e)}")
+    
+    asyncio.create_task(rebuild())
+    return {
+        "status": "success",
+        "message": "Search index rebuild started",
+        "data": search_index.stats(),
+        "timestamp": datetime.utcnow()
+    }
+
+@router.get("/search/stats", response_model=StorageResponse)
+async def search_stats():
+    """Get search index size and rebuild status"""
+    return {
+        "status": "success",
+        "message": "Search index statistics",
+        "data": search_index.stats(),
+        "timestamp": datetime.utcnow()
+    }
+
+@router.get("/mirror/stats", response_model=StorageResponse)
+async def mirror_stats():
+    """Get local mirror index size and hit/miss counters"""
+    return {
+        "status": "success",
+        "message": "Local mirror statistics",
+        "data": {"enabled": LOCAL_MIRROR_ENABLED, **local_mirror.stats()},
+        "timestamp": datetime.utcnow()
+    }
+
+@router.post("/mirror/rescan", response_model=StorageResponse)
+async def mirror_rescan():
+    """Walk the local mirror mounts now instead of waiting for the next scheduled scan"""
+    result = await asyncio.get_running_loop().run_in_executor(mirror_executor, local_mirror.scan)
+    return {
+        "status": "success",
+        "message": f"Indexed {result['files']} local files",
+        "data": result,
+        "timestamp": datetime.utcnow()
+    }
+
+class BulkRequest(BaseModel):
+    bucket: str
+    prefix: Optional[str] = None
+    keys: Optional[List[str]] = None
+    dest_bucket: Optional[str] = None
+    dest_prefix: Optional[str] = None
+    whole_bucket: bool = False  # required to move or delete with an empty prefix
+
+@router.post("/bulk/{operation}", response_model=StorageResponse, status_code=202)
+async def start_bulk_operation(
+    operation: Literal["copy", "move", "delete"],
+    request: BulkRequest,
+    minio: MinIOClient = Depends(get_minio_client)
+):
+    """
+    Copy, move or delete every object under a prefix, or a list of keys,
+    server-side in the background.
+    
+    Copies land under `dest_prefix` in `dest_bucket` (defaulting to the
+    source prefix and bucket) with the source prefix replaced. Moving or
+    deleting with an empty prefix takes `whole_bucket: true`. Follow the
+    operation at /bulk/{id} or /bulk/{id}/events.
+    """
+    try:
+        op = BulkOperation(operation, request.bucket, request.prefix, request.keys,
+                           request.dest_bucket, request.dest_prefix, request.whole_bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        bulk_storage.start(minio, op, on_change=object_changed)
+        return {
+            "status": "accepted",
+            "message": f"Bulk {operation} {op.id} started",
+            "data": progress_tracker.get(op.id),
+            "timestamp": datetime.utcnow()
+        }
+    except Exception as e:
+        logger.error(f"Bulk {operation} error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Bulk {operation} error: {str(e)}")
+
+@router.get("/bulk/{operation_id}", response_model=StorageResponse)
+async def get_bulk_operation(operation_id: str):
+    """Get the progress of a bulk operation"""
+    progress = progress_tracker.get(operation_id)
+    if not progress or progress.get("operation") is None:
+        raise HTTPException(status_code=404, detail=f"Bulk operation {operation_id} not found")
+    return {
+        "status": "success",
+        "message": f"Bulk operation {operation_id} is {progress['status']}",
+        "data": progress,
+        "timestamp": datetime.utcnow()
+    }
+
+@router.get("/bulk/{operation_id}/events")
+async def stream_bulk_operation(operation_id: str):
+    """Stream the progress of a bulk operation as Server-Sent Events"""
+    if progress_tracker.get(operation_id) is None:
+        raise HTTPException(status_code=404, detail=f"Bulk operation {operation_id} not found")
+    return StreamingResponse(
+        progress_tracker.stream(operation_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/bulk/{operation_id}/cancel", response_model=StorageResponse)
+async def cancel_bulk_operation(operation_id: str):
+    """Stop a bulk operation; a move leaves the sources of its unfinished batch in place"""
+    if not bulk_storage.cancel(operation_id):
+        raise HTTPException(status_code=404, detail=f"No running bulk operation {operation_id}")
+    return {
+        "status": "success",
+        "message": f"Bulk operation {operation_id} cancelled",
+        "data": None,
+        "timestamp": datetime.utcnow()
+    }
+
 @router.get("/list", response_model=StorageResponse)
 async def list_files(
     bucket: str = Query(...),
     prefix: str = Query(""),
+    limit: Optional[int] = Query(None, ge=1, le=STORAGE_LIST_MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    start_after: Optional[str] = Query(None, description="Object name to list after"),
+    format: Literal["json", "ndjson"] = Query("json"),
     minio: MinIOClient = Depends(get_minio_client)
 ):
-    """List files in a bucket with optional prefix"""
+    """
+    List files in a bucket with optional prefix, one page at a time.
+    
+    With format=ndjson objects are streamed as MinIO returns them, through
+    the end of the listing unless a limit is given.
+    """
     try:
-        # List objects from MinIO
-        objects = minio.list_objects(
-            bucket_name=bucket,
-            prefix=prefix
+        if cursor:
+            start_after = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if format == "ndjson":
+        return StreamingResponse(
+            ndjson_objects(minio, bucket, prefix, start_after=start_after, limit=limit),
+            media_type="application/x-ndjson"
         )
+    
+    try:
+        limit = limit or STORAGE_LIST_PAGE_SIZE
+        objects, truncated = await minio.aio.list_page(bucket, prefix, limit, start_after)
+        next_cursor = encode_cursor(objects[-1]["name"]) if truncated else None
         
         return {
             "status": "success",
             "message": f"Listed {len(objects)} objects from {bucket}/{prefix}",
-            "data": {"objects": objects},
+            "data": {"objects": objects, "next_cursor": next_cursor, "truncated": truncated},
             "timestamp": datetime.utcnow()
         }
     except Exception as e:
         logger.error(f"List files error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"List files error: {str(e)}")
 
-@router.get("/download/{bucket}/{object_path:path}", response_class=Response)
+@router.get("/summary", response_model=StorageResponse)
+async def prefix_summary(
+    bucket: str = Query(...),
+    prefix: str = Query(""),
+    fresh: bool = Query(False, description="Walk the bucket instead of using the cached summary"),
+    minio: MinIOClient = Depends(get_minio_client)
+):
+    """Get the object count and total size under a prefix"""
+    try:
+        summary = await prefix_summaries.get(minio, bucket, prefix, fresh=fresh)
+        return {
+            "status": "success",
+            "message": f"{summary['count']} objects, {summary['total_size']} bytes under {bucket}/{prefix}",
+            "data": summary,
+            "timestamp": datetime.utcnow()
+        }
+    except Exception as e:
+        logger.error(f"Prefix summary error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Prefix summary error: {str(e)}")
+
+@router.api_route("/download/{bucket}/{object_path:path}", methods=["GET", "HEAD"], response_class=StreamingResponse)
 async def download_file(
+    request: Request,
     bucket: str,
     object_path: str,
+    mode: Optional[Literal["proxy", "redirect"]] = Query(None, description="Override STORAGE_DOWNLOAD_MODE"),
     minio: MinIOClient = Depends(get_minio_client)
 ):
-    """Download a file from MinIO storage"""
+    """
+    Stream a file from MinIO storage, honouring Range and conditional headers.
+    
+    In redirect mode the client is sent to a presigned MinIO URL instead, and
+    MinIO serves the bytes (including ranges) directly. In proxy mode,
+    objects with a copy on the local NAS mirror are read from disk.
+    Content-addressed aliases are followed to the blob holding their bytes.
+    """
     try:
-        # Download from MinIO
-        data = minio.download_file(
-            bucket_name=bucket,
-            object_name=object_path
-        )
+        if (mode or STORAGE_DOWNLOAD_MODE) == "redirect":
+            source = object_path
+            if STORAGE_DEDUP_ENABLED:
+                source = await minio.aio.run(content_store.resolve, minio, bucket, object_path)
+            signed = presigner.sign("GET", bucket, source)
+            # Let clients reuse the redirect while the URL is still comfortably valid
+            max_age = max(int((signed["expires_at"] - time.time()) / 2), 0)
+            return RedirectResponse(
+                signed["url"], status_code=302, headers={"Cache-Control": f"private, max-age={max_age}"}
+            )
         
-        if data is not None:
-            # Determine content type
-            if object_path.endswith(".json"):
-                media_type = "application/json"
-            elif object_path.endswith(".txt"):
-                media_type = "text/plain"
-            elif object_path.endswith(".html"):
-                media_type = "text/html"
-            elif object_path.endswith(".css"):
-                media_type = "text/css"
-            elif object_path.endswith(".js"):
-                media_type = "application/javascript"
-            elif object_path.endswith(".png"):
-                media_type = "image/png"
-            elif object_path.endswith(".jpg") or object_path.endswith(".jpeg"):
-                media_type = "image/jpeg"
-            elif object_path.endswith(".mp4"):
-                media_type = "video/mp4"
-            else:
-                media_type = "application/octet-stream"
-            
-            return Response(content=data, media_type=media_type)
+        # Objects mirrored on the NAS mount are served from disk without asking MinIO
+        local = await local_mirror.resolve_async(bucket, object_path) if LOCAL_MIRROR_ENABLED else None
+        source, digest = object_path, None
+        if local is not None:
+            size, etag, last_modified, media_type = local.size, local.etag, local.last_modified, None
         else:
-            raise HTTPException(status_code=404, detail=f"File not found: {bucket}/{object_path}")
+            stat = await minio.aio.stat_object(bucket, object_path)
+            if stat is None:
+                raise HTTPException(status_code=404, detail=f"File not found: {bucket}/{object_path}")
+            size, etag, last_modified, media_type = stat.size, stat.etag, stat.last_modified, stat.content_type
+            digest = alias_digest(stat) if STORAGE_DEDUP_ENABLED else None
+            if digest:
+                source = blob_name(digest)
+                blob = await minio.aio.stat_object(bucket, source)
+                if blob is None:
+                    raise HTTPException(status_code=404, detail=f"Content {digest} of {bucket}/{object_path} is missing")
+                size, etag = blob.size, blob.etag
+        
+        # Content type comes from the object metadata, falling back to the name
+        if not media_type or media_type in ("application/octet-stream", "binary/octet-stream"):
+            media_type = mimetypes.guess_type(object_path)[0] or "application/octet-stream"
+        
+        etag = quote_etag(etag)
+        headers = {
+            "Accept-Ranges": "bytes",
+            "ETag": etag,
+            "X-Storage-Source": "local" if local is not None else "minio"
+        }
+        if digest:
+            headers["X-Content-SHA256"] = digest
+        if last_modified is not None:
+            headers["Last-Modified"] = http_date(last_modified)
+        
+        if not_modified(
+            request.headers.get("if-none-match"),
+            request.headers.get("if-modified-since"),
+            etag,
+            last_modified
+        ):
+            return Response(status_code=304, headers=headers)
+        
+        status_code = 200
+        start, end = 0, size - 1
+        if range_applies(request.headers.get("if-range"), etag, last_modified):
+            try:
+                byte_range = parse_range(request.headers.get("range"), size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+            if byte_range is not None:
+                start, end = byte_range
+                status_code = 206
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        
+        length = end - start + 1
+        headers["Content-Length"] = str(length)
+        if request.method == "HEAD" or length <= 0:
+            return Response(status_code=status_code, headers=headers, media_type=media_type)
+        
+        if local is not None:
+            return LocalFileResponse(
+                local.path, start, length,
+                status_code=status_code,
+                headers=headers,
+                media_type=media_type
+            )
+        
+        return StreamingResponse(
+            minio.stream_object(bucket, source, offset=start, length=length,
+                                chunk_size=STORAGE_DOWNLOAD_CHUNK_SIZE),
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"File download error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"File download error: {str(e)}")
@@ -228,12 +765,13 @@ async def delete_file(
     """Delete a file from MinIO storage"""
     try:
         # Delete from MinIO
-        success = minio.remove_file(
+        success = await minio.aio.remove_file(
             bucket_name=bucket,
             object_name=object_path
         )
         
         if success:
+            await object_changed(minio, bucket, object_path)
             return {
                 "status": "success",
                 "message": f"File deleted successfully: {bucket}/{object_path}",
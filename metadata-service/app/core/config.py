@@ -1,6 +1,7 @@
 # app/core/config.py
 
 import os
+import json
 import socket
 from typing import List, Dict, Any
 from datetime import datetime
@@ -32,6 +33,10 @@ MINIO_ACCESS_KEY = os.getenv("MINIO_ROOT_USER", "minioadmin")
 MINIO_SECRET_KEY = os.getenv("MINIO_ROOT_PASSWORD", "minioadmin")
 MINIO_SECURE = os.getenv("MINIO_SECURE", "False").lower() == "true"
 MINIO_REGION = os.getenv("MINIO_REGION", "us-east-1")
+MINIO_POOL_SIZE = int(os.getenv("MINIO_POOL_SIZE", "32"))  # keep-alive connections kept per host
+MINIO_CONNECT_TIMEOUT = float(os.getenv("MINIO_CONNECT_TIMEOUT", "5"))
+MINIO_READ_TIMEOUT = float(os.getenv("MINIO_READ_TIMEOUT", "60"))
+MINIO_EXECUTOR_WORKERS = int(os.getenv("MINIO_EXECUTOR_WORKERS", "16"))  # threads for blocking calls from async code
 
 # MinIO bucket configuration using service-based naming from metadata-service.buckets
 SERVICE_NAME = "metadata-service"
@@ -91,10 +96,48 @@ QUEUE_STREAM_EVENTS = "stream_events"
 QUEUE_METADATA = os.getenv("METADATA_QUEUE", "metadata_queue")
 QUEUE_FINALIZER_JOBS = "finalizer_jobs"
 QUEUE_NOTIFICATIONS = "notifications"
+EXCHANGE_FINALIZER_STATUS = "finalizer_status"
+EXCHANGE_CACHE_INVALIDATION = "metadata_cache_invalidation"
+
+# Finalizer worker settings
+FINALIZER_QUEUE_BACKEND = os.getenv("FINALIZER_QUEUE_BACKEND", "rabbitmq")  # "rabbitmq" or "local" stand-in
+FINALIZER_LOCAL_BROKER = os.getenv("FINALIZER_LOCAL_BROKER", "127.0.0.1:5680")
+FINALIZER_LOCAL_BROKER_AUTHKEY = os.getenv("FINALIZER_LOCAL_BROKER_AUTHKEY", "finalizer")
+FINALIZER_EMBEDDED_WORKERS = int(os.getenv("FINALIZER_EMBEDDED_WORKERS", "1"))
+FINALIZER_WORKER_HEARTBEAT = int(os.getenv("FINALIZER_WORKER_HEARTBEAT", "30"))  # seconds
+FINALIZER_MAX_ATTEMPTS = int(os.getenv("FINALIZER_MAX_ATTEMPTS", "3"))
+FINALIZER_SYNC_CONCURRENCY = int(os.getenv("FINALIZER_SYNC_CONCURRENCY", "2"))
+FINALIZER_COALESCE_WINDOW = int(os.getenv("FINALIZER_COALESCE_WINDOW", "1800"))  # seconds without progress before a job stops absorbing duplicates
 
 # Docker settings - for controlling Docker-in-Docker if needed
 DOCKER_COMPOSE_FILE = os.getenv("DOCKER_COMPOSE_FILE", "docker-compose.yml")
 DOCKER_PROJECT_NAME = os.getenv("DOCKER_PROJECT_NAME", "cdaprod")
+DOCKER_SOCKET = os.getenv("DOCKER_SOCKET", "/var/run/docker.sock")
+DOCKER_API_TIMEOUT = float(os.getenv("DOCKER_API_TIMEOUT", "10"))  # seconds to connect and get response headers
+
+# Stack control - bulk start/stop ordered by the compose files' depends_on
+STACK_COMPOSE_FILES = [f for f in os.getenv("STACK_COMPOSE_FILES", "docker-compose.yaml").split(",") if f]
+STACK_PROJECT_NAME = os.getenv("STACK_PROJECT_NAME", "")  # empty: the compose project this container belongs to
+STACK_COMPOSE_COMMAND = os.getenv("STACK_COMPOSE_COMMAND", "docker-compose")  # e.g. "docker compose" for the CLI plugin
+STACK_READY_TIMEOUT = float(os.getenv("STACK_READY_TIMEOUT", "180"))  # seconds for a started service to become ready
+STACK_READY_POLL_INTERVAL = float(os.getenv("STACK_READY_POLL_INTERVAL", "0.5"))  # seconds between container state checks
+STACK_SELF_SERVICE = os.getenv("STACK_SELF_SERVICE", SERVICE_NAME)  # never stopped or recreated by stack operations, it runs them
+
+# Health checks - components are probed together in the background and /health answers from the last result
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))  # seconds between probe rounds
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "3"))  # a probe slower than this counts as unhealthy
+HEALTH_MAX_AGE = float(os.getenv("HEALTH_MAX_AGE", "30"))  # older cached results are re-probed on request
+
+# Synthetic stream probe - publishes a generated test pattern to the live RTMP application and times
+# how long the on_publish hook and the first HLS segment of the broadcast take to appear
+STREAM_PROBE_RTMP_URL = os.getenv("STREAM_PROBE_RTMP_URL", "rtmp://rtmp-server:1935/probe")  # the probe's stream name is appended; not `live`, which records and transcodes
+STREAM_PROBE_HLS_URL = os.getenv("STREAM_PROBE_HLS_URL", "http://rtmp-server:8080/hls")  # serves {name}.m3u8 of the broadcast application
+STREAM_PROBE_PREFIX = os.getenv("STREAM_PROBE_PREFIX", "probe-")  # stream names starting with this are probe streams
+STREAM_PROBE_INTERVAL = float(os.getenv("STREAM_PROBE_INTERVAL", "0"))  # seconds between background runs, 0 to run only on request
+STREAM_PROBE_DURATION = float(os.getenv("STREAM_PROBE_DURATION", "10"))  # seconds of test pattern published per run
+STREAM_PROBE_TIMEOUT = float(os.getenv("STREAM_PROBE_TIMEOUT", "30"))  # seconds to wait for the first segment
+STREAM_PROBE_POLL_INTERVAL = float(os.getenv("STREAM_PROBE_POLL_INTERVAL", "0.05"))  # seconds between playlist fetches
+STREAM_PROBE_HISTORY = int(os.getenv("STREAM_PROBE_HISTORY", "288"))  # runs kept for /health/stream
 
 # Finalizer settings
 THUMBNAIL_TIMESTAMP = os.getenv("THUMBNAIL_TIMESTAMP", "00:00:05")
@@ -102,6 +145,64 @@ THUMBNAIL_SIZE = os.getenv("THUMBNAIL_SIZE", "640x360")
 THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "90"))
 TEMP_DIR = os.getenv("TEMP_DIR", "/tmp")
 FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
+FFMPEG_PROGRESS_PERIOD = os.getenv("FFMPEG_PROGRESS_PERIOD", "0.5")  # seconds, "" to use ffmpeg's default
+
+# Progress streaming settings
+PROGRESS_MIN_INTERVAL = float(os.getenv("PROGRESS_MIN_INTERVAL", "0.25"))
+PROGRESS_RETENTION_SECONDS = int(os.getenv("PROGRESS_RETENTION_SECONDS", "600"))
+PROGRESS_SUBSCRIBER_QUEUE_SIZE = int(os.getenv("PROGRESS_SUBSCRIBER_QUEUE_SIZE", "32"))
+PROGRESS_KEEPALIVE_SECONDS = int(os.getenv("PROGRESS_KEEPALIVE_SECONDS", "15"))
+
+# Storage upload settings
+STORAGE_UPLOAD_PART_SIZE = int(os.getenv("STORAGE_UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))  # bytes, S3 minimum is 5 MiB
+STORAGE_UPLOAD_PARALLELISM = int(os.getenv("STORAGE_UPLOAD_PARALLELISM", "3"))  # parts in flight per upload
+STORAGE_UPLOAD_WORKERS = int(os.getenv("STORAGE_UPLOAD_WORKERS", "8"))  # threads shared by all uploads
+STORAGE_DOWNLOAD_CHUNK_SIZE = int(os.getenv("STORAGE_DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))  # bytes per streamed chunk
+STORAGE_DOWNLOAD_MODE = os.getenv("STORAGE_DOWNLOAD_MODE", "proxy")  # "proxy" or "redirect" to a presigned URL
+
+# Content-addressed uploads - each distinct file is stored once under CAS_OBJECT_PREFIX and the
+# uploaded names become small alias objects; keep this on while aliases exist so downloads resolve them
+STORAGE_DEDUP_ENABLED = os.getenv("STORAGE_DEDUP_ENABLED", "False").lower() == "true"
+CAS_OBJECT_PREFIX = "cas/sha256/"  # blobs, keyed by the sha256 of their content
+CAS_STAGING_PREFIX = "cas/staging/"  # uploads whose digest is not known until they finish
+CAS_LOOKUP_CACHE_TTL = float(os.getenv("CAS_LOOKUP_CACHE_TTL", "300"))  # seconds, blob and alias lookups
+
+# Presigned URL settings - the public endpoint must be reachable by clients, it is part of the signature
+MINIO_PUBLIC_ENDPOINT = os.getenv("MINIO_PUBLIC_ENDPOINT", MINIO_ENDPOINT)
+MINIO_PUBLIC_SECURE = os.getenv("MINIO_PUBLIC_SECURE", str(MINIO_SECURE)).lower() == "true"
+PRESIGN_EXPIRY_SECONDS = int(os.getenv("PRESIGN_EXPIRY_SECONDS", "900"))
+PRESIGN_CACHE_MAX_ENTRIES = int(os.getenv("PRESIGN_CACHE_MAX_ENTRIES", "4096"))
+
+# Metadata read cache settings
+METADATA_CACHE_MAX_BYTES = int(os.getenv("METADATA_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", "30"))  # seconds
+METADATA_CACHE_INVALIDATION = os.getenv("METADATA_CACHE_INVALIDATION", "False").lower() == "true"  # broadcast over RabbitMQ
+
+# Batch metadata settings
+STORAGE_BATCH_CONCURRENCY = int(os.getenv("STORAGE_BATCH_CONCURRENCY", "8"))  # concurrent MinIO requests for batch calls
+STORAGE_BATCH_MAX_ITEMS = int(os.getenv("STORAGE_BATCH_MAX_ITEMS", "1000"))
+STORAGE_BULK_WORKERS = int(os.getenv("STORAGE_BULK_WORKERS", "8"))  # threads for server-side copies and deletes, shared by bulk operations
+
+# Object listing settings
+STORAGE_LIST_PAGE_SIZE = int(os.getenv("STORAGE_LIST_PAGE_SIZE", "1000"))
+STORAGE_LIST_MAX_PAGE_SIZE = int(os.getenv("STORAGE_LIST_MAX_PAGE_SIZE", "10000"))
+PREFIX_SUMMARY_TTL = float(os.getenv("PREFIX_SUMMARY_TTL", "300"))  # seconds
+PREFIX_SUMMARY_MAX_ENTRIES = int(os.getenv("PREFIX_SUMMARY_MAX_ENTRIES", "1024"))
+
+# Thumbnail derivative settings
+DERIVATIVE_OBJECT_PREFIX = "derivatives/"  # resized/re-encoded copies, keyed by source object and parameters
+THUMB_MAX_DIMENSION = int(os.getenv("THUMB_MAX_DIMENSION", "2048"))
+THUMB_DEFAULT_QUALITY = int(os.getenv("THUMB_DEFAULT_QUALITY", "80"))
+THUMB_MEMORY_CACHE_BYTES = int(os.getenv("THUMB_MEMORY_CACHE_BYTES", str(64 * 1024 * 1024)))
+THUMB_MEMORY_CACHE_TTL = float(os.getenv("THUMB_MEMORY_CACHE_TTL", "600"))  # seconds
+THUMB_CACHE_MAX_AGE = int(os.getenv("THUMB_CACHE_MAX_AGE", "86400"))  # seconds, sent in Cache-Control
+THUMB_WORKERS = int(os.getenv("THUMB_WORKERS", "2"))  # threads for decoding/encoding images
+
+# Metadata search index settings
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "/app/data/search-index.json.gz")
+SEARCH_INDEX_FLUSH_INTERVAL = float(os.getenv("SEARCH_INDEX_FLUSH_INTERVAL", "30"))  # seconds between saves of a changed index
+SEARCH_DEFAULT_LIMIT = int(os.getenv("SEARCH_DEFAULT_LIMIT", "50"))
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", "1000"))
 
 # Base storage path for local file access - matches mounted volume in docker-compose
 BASE_STORAGE_PATH = "/mnt/b/rpi_sync"
@@ -115,9 +216,21 @@ STORAGE_PATHS = {
     "metadata_files": f"{BASE_STORAGE_PATH}/{SERVICE_NAME}"
 }
 
+# Local mirror fast path - objects also present on the NAS mount are served from disk instead of MinIO
+LOCAL_MIRROR_ENABLED = os.getenv("LOCAL_MIRROR_ENABLED", "False").lower() == "true"  # needs the NAS mounts in LOCAL_MIRRORS
+LOCAL_MIRRORS = [
+    {"bucket": MINIO_RTMP_BUCKET, "prefix": RECORDING_OBJECT_PREFIX, "root": STORAGE_PATHS["rtmp_recordings"]},
+    {"bucket": MINIO_OBS_BUCKET, "prefix": RECORDING_OBJECT_PREFIX, "root": STORAGE_PATHS["obs_recordings"]},
+    {"bucket": MINIO_ASSETS_BUCKET, "prefix": "", "root": STORAGE_PATHS["shared_assets"]}
+]
+LOCAL_MIRROR_RESCAN_INTERVAL = float(os.getenv("LOCAL_MIRROR_RESCAN_INTERVAL", "60"))  # seconds between walks of the mounts
+LOCAL_MIRROR_SETTLE_SECONDS = float(os.getenv("LOCAL_MIRROR_SETTLE_SECONDS", "10"))  # skip files modified more recently (still being written)
+LOCAL_MIRROR_WORKERS = int(os.getenv("LOCAL_MIRROR_WORKERS", "8"))  # threads for stat/read on the mounts
+
 # Logging configuration - includes services from your compose file
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records waiting for the log writer thread before new ones are dropped
 CONTAINER_LOG_SERVICES = [
     "metadata-service", 
     "rtmp-pi",
@@ -127,6 +240,45 @@ CONTAINER_LOG_SERVICES = [
     "webrtc-pi",
     "rtsp-server"
 ]
+LOG_STREAM_TAIL = int(os.getenv("LOG_STREAM_TAIL", "10"))  # lines of history when a container is first followed
+LOG_STREAM_RECONNECT_MAX = float(os.getenv("LOG_STREAM_RECONNECT_MAX", "30"))  # seconds, cap on backoff when Docker is unreachable
+LOG_CURSOR_PATH = os.getenv("LOG_CURSOR_PATH", "/app/data/log-cursors.json")  # where each followed container's position is kept
+LOG_CURSOR_SAVE_INTERVAL = float(os.getenv("LOG_CURSOR_SAVE_INTERVAL", "5"))  # seconds between cursor saves
+LOG_DEDUP_WINDOW = int(os.getenv("LOG_DEDUP_WINDOW", "64"))  # recent line hashes per container, to skip lines replayed on resume
+LOG_MAX_LINE_BYTES = int(os.getenv("LOG_MAX_LINE_BYTES", str(64 * 1024)))  # a longer unterminated line is emitted as it stands
+# Per-service token buckets for collected container logs, in lines per second; "*" applies to services not listed
+LOG_RATE_LIMITS = json.loads(os.getenv("LOG_RATE_LIMITS", "null")) or {
+    "*": {"rate": 200, "burst": 1000}
+}
+# Keep 1 in `keep` lines matching `pattern` (a regex, applied to the raw line) from `service` ("*" for all)
+LOG_SAMPLING_RULES = json.loads(os.getenv("LOG_SAMPLING_RULES", "null")) or [
+    {"service": "rtmp-pi", "pattern": r"frame=\s*\d+.*speed=", "keep": 4},  # ffmpeg progress, several per second per stream
+    {"service": "*", "pattern": r"\[debug\]", "keep": 50}  # nginx debug-level error_log lines
+]
+LOG_ALWAYS_KEEP = os.getenv("LOG_ALWAYS_KEEP", r"(?i)error|\[(crit|alert|emerg)\]|fatal|panic|exception|traceback")  # never sampled or rate limited
+LOG_BUFFER_MAX_LINES = int(os.getenv("LOG_BUFFER_MAX_LINES", "20000"))  # recent lines kept per service
+LOG_BUFFER_MAX_BYTES = int(os.getenv("LOG_BUFFER_MAX_BYTES", str(2 * 1024 * 1024)))  # per service, message bytes
+LOG_TAIL_MAX_LINES = int(os.getenv("LOG_TAIL_MAX_LINES", "5000"))
+LOG_SUBSCRIBER_QUEUE_SIZE = int(os.getenv("LOG_SUBSCRIBER_QUEUE_SIZE", "1000"))  # undelivered lines per viewer before the oldest are dropped
+LOG_KEEPALIVE_SECONDS = int(os.getenv("LOG_KEEPALIVE_SECONDS", "15"))
+LOG_ARCHIVE_ENABLED = os.getenv("LOG_ARCHIVE_ENABLED", "true").lower() == "true"
+LOG_ARCHIVE_BUCKET = os.getenv("LOG_ARCHIVE_BUCKET", "container-logs")  # kept apart from the metadata bucket, which is indexed and listed
+LOG_ARCHIVE_CODEC = os.getenv("LOG_ARCHIVE_CODEC", "zstd")  # zstd or gzip; zstd falls back to gzip without the zstandard package
+LOG_ARCHIVE_CHUNK_SECONDS = int(os.getenv("LOG_ARCHIVE_CHUNK_SECONDS", "300"))  # time bucket covered by one chunk object
+LOG_ARCHIVE_CHUNK_MAX_BYTES = int(os.getenv("LOG_ARCHIVE_CHUNK_MAX_BYTES", str(8 * 1024 * 1024)))  # uncompressed; a chunk closes early past this
+LOG_ARCHIVE_FLUSH_INTERVAL = float(os.getenv("LOG_ARCHIVE_FLUSH_INTERVAL", "10"))  # seconds between background upload batches
+LOG_ARCHIVE_QUEUE_LINES = int(os.getenv("LOG_ARCHIVE_QUEUE_LINES", "200000"))  # lines waiting to be sorted into chunks before new ones are dropped
+LOG_METRICS_ENABLED = os.getenv("LOG_METRICS_ENABLED", "true").lower() == "true"
+LOG_METRICS_WINDOW_SECONDS = float(os.getenv("LOG_METRICS_WINDOW_SECONDS", "600"))  # history kept per media metric series
+LOG_METRICS_MAX_POINTS = int(os.getenv("LOG_METRICS_MAX_POINTS", "1200"))  # per series, whatever the window
+LOG_METRICS_STALE_SECONDS = float(os.getenv("LOG_METRICS_STALE_SECONDS", "30"))  # alerts on a series with no newer samples resolve
+# Alert when a metric parsed from container logs stays past a threshold for `for` seconds
+LOG_ALERT_RULES = json.loads(os.getenv("LOG_ALERT_RULES", "null")) or [
+    {"name": "ffmpeg_slow", "metric": "ffmpeg_speed", "op": "<", "threshold": 1.0, "for": 10},
+    {"name": "ffmpeg_dropping_frames", "metric": "ffmpeg_drop_rate", "op": ">", "threshold": 0, "for": 10},
+    {"name": "obs_render_lag", "metric": "obs_render_lag_percent", "op": ">", "threshold": 1.0, "for": 0},
+    {"name": "obs_bandwidth_drops", "metric": "obs_dropped_frames_percent", "op": ">", "threshold": 1.0, "for": 0}
+]
 
 # Define metadata tags 
 DEFAULT_METADATA_TAGS = [
@@ -0,0 +1,174 @@
+# app/core/docker_api.py
+
+"""
+Minimal asyncio client for the Docker Engine API on its unix socket.
+
+Only what the log collector needs: JSON requests, and long-lived streams
+(container logs, events) read incrementally. Every request opens its own
+connection, so an idle stream costs a socket and nothing else.
+"""
+
+import asyncio
+import calendar
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, Union
+from urllib.parse import quote, urlencode
+
+from app.core.config import DOCKER_SOCKET, DOCKER_API_TIMEOUT
+
+STREAM_NAMES = {0: "stdin", 1: "stdout", 2: "stderr"}
+READ_SIZE = 64 * 1024
+
+_second_cache: Dict[bytes, int] = {}
+
+def parse_timestamp(value: bytes) -> int:
+    """Nanoseconds since the epoch from Docker's RFC 3339 UTC timestamps, e.g. 2024-05-01T12:00:00.123456789Z"""
+    seconds = _second_cache.get(value[:19])
+    if seconds is None:
+        if len(_second_cache) > 1024:
+            _second_cache.clear()
+        seconds = _second_cache[value[:19]] = calendar.timegm(time.strptime(value[:19].decode(), "%Y-%m-%dT%H:%M:%S"))
+    fraction = value[20:-1] if value[19:20] == b"." else b""
+    return seconds * 1_000_000_000 + (int(fraction.ljust(9, b"0")[:9]) if fraction else 0)
+
+def since_param(ns: int) -> str:
+    """A nanosecond timestamp in the `seconds.nanoseconds` form Docker accepts for `since`"""
+    return f"{ns // 1_000_000_000}.{ns % 1_000_000_000:09d}"
+
+class DockerAPIError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Docker API error {status}: {message}")
+        self.status = status
+
+class DockerAPI:
+    def __init__(self, socket_path: str = DOCKER_SOCKET, timeout: float = DOCKER_API_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    async def _open(self, method: str, path: str, params: Optional[Dict[str, Any]] = None):
+        """Send a request and read the response head"""
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_unix_connection(self.socket_path), self.timeout
+        )
+        try:
+            query = f"?{urlencode(params)}" if params else ""
+            writer.write(
+                f"{method} {quote(path)}{query} HTTP/1.1\r\nHost: docker\r\nConnection: close\r\n\r\n".encode()
+            )
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+            status = int(status_line.split()[1])
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            return reader, writer, status, headers
+        except BaseException:
+            writer.close()
+            raise
+
+    async def _body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> AsyncIterator[bytes]:
+        """Yield the response body as it arrives, undoing chunked transfer encoding"""
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    return
+                data = await reader.readexactly(size)
+                await reader.readexactly(2)
+                yield data
+        elif "content-length" in headers:
+            remaining = int(headers["content-length"])
+            while remaining > 0:
+                data = await reader.read(min(remaining, READ_SIZE))
+                if not data:
+                    return
+                remaining -= len(data)
+                yield data
+        else:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    return
+                yield data
+
+    async def stream(self, path: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[bytes]:
+        """GET a streaming endpoint, yielding body chunks until Docker closes it"""
+        reader, writer, status, headers = await self._open("GET", path, params)
+        try:
+            if status >= 400:
+                body = b"".join([chunk async for chunk in self._body(reader, headers)])
+                raise DockerAPIError(status, body.decode("utf-8", "replace").strip())
+            async for chunk in self._body(reader, headers):
+                yield chunk
+        finally:
+            writer.close()
+
+    async def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        body = bytearray()
+        async for chunk in self.stream(path, params):
+            body += chunk
+        return json.loads(body) if body else None
+
+    async def ping(self) -> bool:
+        """True if the daemon answers /_ping"""
+        body = b"".join([chunk async for chunk in self.stream("/_ping")])
+        return body.strip() == b"OK"
+
+    async def containers(self, all: bool = True):
+        return await self.get_json("/containers/json", {"all": int(all)})
+
+    async def inspect(self, container_id: str) -> Dict[str, Any]:
+        return await self.get_json(f"/containers/{container_id}/json")
+
+    async def events(self, since: Optional[float] = None,
+                     filters: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield daemon events as they happen, from `since` if given"""
+        params: Dict[str, Any] = {}
+        if since is not None:
+            params["since"] = f"{since:.9f}"
+        if filters:
+            params["filters"] = json.dumps(filters)
+        buffer = b""
+        async for chunk in self.stream("/events", params):
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+
+    async def logs(self, container_id: str, tty: bool = False, since: Optional[Union[float, str]] = None,
+                   tail: Optional[int] = None, follow: bool = True,
+                   timestamps: bool = False) -> AsyncIterator[Tuple[str, bytes]]:
+        """
+        Yield (stream name, bytes) from a container's output.
+
+        Without a TTY, Docker multiplexes stdout and stderr into frames with
+        an 8-byte header; a TTY container's output is a single raw stream.
+        With timestamps, every line starts with its RFC 3339 time and a space.
+        """
+        params: Dict[str, Any] = {"follow": int(follow), "stdout": 1, "stderr": 1, "timestamps": int(timestamps)}
+        if since is not None:
+            params["since"] = since if isinstance(since, str) else f"{since:.9f}"
+        params["tail"] = "all" if tail is None else tail
+        if tty:
+            async for chunk in self.stream(f"/containers/{container_id}/logs", params):
+                yield "stdout", chunk
+            return
+
+        buffer = bytearray()
+        async for chunk in self.stream(f"/containers/{container_id}/logs", params):
+            buffer += chunk
+            offset = 0
+            while len(buffer) - offset >= 8:
+                size = int.from_bytes(buffer[offset + 4:offset + 8], "big")
+                end = offset + 8 + size
+                if end > len(buffer):
+                    break
+                yield STREAM_NAMES.get(buffer[offset], "stdout"), bytes(buffer[offset + 8:end])
+                offset = end
+            del buffer[:offset]
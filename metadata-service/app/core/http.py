@@ -0,0 +1,115 @@
+# app/core/http.py
+
+"""Helpers for HTTP caching and byte-range requests (RFC 7232 / RFC 7233)"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+class RangeNotSatisfiable(Exception):
+    """The requested range lies entirely outside the resource"""
+
+def quote_etag(etag: str) -> str:
+    """Return an ETag in its quoted header form"""
+    if etag.startswith('"') or etag.startswith('W/"'):
+        return etag
+    return f'"{etag}"'
+
+def _opaque(etag: str) -> str:
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    return etag.strip('"')
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match / If-Range style list against an ETag"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    target = _opaque(etag)
+    return any(_opaque(candidate) == target for candidate in header.split(","))
+
+def http_date(value: datetime) -> str:
+    """Format a datetime as an IMF-fixdate"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse an HTTP date header, returning None if it is missing or invalid"""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def not_modified(
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+    etag: str,
+    last_modified: Optional[datetime]
+) -> bool:
+    """Whether a GET/HEAD can be answered with 304 Not Modified"""
+    # If-None-Match takes precedence over If-Modified-Since
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    since = parse_http_date(if_modified_since)
+    if since is None or last_modified is None:
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+def range_applies(if_range: Optional[str], etag: str, last_modified: Optional[datetime]) -> bool:
+    """Whether a Range header should be honoured given If-Range"""
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith('W/"'):
+        # Only strong validators may be used with If-Range
+        return not if_range.startswith("W/") and _opaque(if_range) == _opaque(etag)
+    since = parse_http_date(if_range)
+    if since is None or last_modified is None:
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) == since
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `bytes=` Range header into an inclusive (start, end).
+
+    Returns None when the whole resource should be sent (no header, a
+    malformed header, or a multi-range request) and raises
+    RangeNotSatisfiable when the range lies outside the resource.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, min(end, size - 1)
@@ -0,0 +1,110 @@
+# app/core/log_filter.py
+
+"""
+Rate limiting and sampling of collected container log lines.
+
+The filter runs in the collector on the raw bytes of each line, before it
+is decoded or turned into an entry, so a noisy source (ffmpeg progress
+several times a second per stream, nginx at debug level) costs a regex
+scan per line and nothing downstream: buffers, viewers, the archive and
+the metrics parsers only see what was kept.
+
+For each line, in order:
+  1. lines matching the always-keep pattern (errors) are kept;
+  2. the first sampling rule whose pattern matches keeps 1 in `keep`;
+  3. the service's token bucket drops lines past its rate and burst.
+Suppressed lines are counted per service and reason.
+"""
+
+import re
+import time
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+from app.core.config import LOG_RATE_LIMITS, LOG_SAMPLING_RULES, LOG_ALWAYS_KEEP
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+class ServiceFilter:
+    """Sampling counters, token bucket and suppression counts of one service"""
+
+    def __init__(self, rules: List[Tuple[Pattern[bytes], int]], limit: Optional[Dict[str, float]]):
+        self.rules = rules
+        self.seen = [0] * len(rules)
+        self.bucket = TokenBucket(limit["rate"], limit.get("burst", limit["rate"])) if limit else None
+        self.kept = 0
+        self.sampled = 0
+        self.rate_limited = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kept": self.kept,
+            "sampled_out": self.sampled,
+            "rate_limited": self.rate_limited,
+            "suppressed": self.sampled + self.rate_limited
+        }
+
+class LogFilter:
+    """
+    Decides which lines of each service are kept.
+
+    `limits` maps a service to {"rate": lines/s, "burst": lines}, with "*"
+    as the default; a service mapped to null is not rate limited. Sampling
+    rules are {"service", "pattern", "keep"}, "*" matching any service.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Optional[Dict[str, float]]]] = None,
+        sampling: Optional[List[Dict[str, Any]]] = None,
+        always_keep: Optional[str] = LOG_ALWAYS_KEEP
+    ):
+        self.limits = LOG_RATE_LIMITS if limits is None else limits
+        self.sampling = [
+            (rule.get("service", "*"), re.compile(rule["pattern"].encode()), max(int(rule.get("keep", 1)), 1))
+            for rule in (LOG_SAMPLING_RULES if sampling is None else sampling)
+        ]
+        self.always_keep = re.compile(always_keep.encode()) if always_keep else None
+        self._services: Dict[str, ServiceFilter] = {}
+
+    def _service(self, service: str) -> ServiceFilter:
+        state = self._services.get(service)
+        if state is None:
+            rules = [(pattern, keep) for name, pattern, keep in self.sampling if name in ("*", service)]
+            state = self._services[service] = ServiceFilter(rules, self.limits.get(service, self.limits.get("*")))
+        return state
+
+    def allow(self, service: str, line: bytes) -> bool:
+        state = self._service(service)
+        if self.always_keep is not None and self.always_keep.search(line):
+            state.kept += 1
+            return True
+        for i, (pattern, keep) in enumerate(state.rules):
+            if pattern.search(line):
+                state.seen[i] += 1
+                if (state.seen[i] - 1) % keep:
+                    state.sampled += 1
+                    return False
+                break
+        if state.bucket is not None and not state.bucket.take(time.monotonic()):
+            state.rate_limited += 1
+            return False
+        state.kept += 1
+        return True
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {service: state.stats() for service, state in self._services.items()}
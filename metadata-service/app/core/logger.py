@@ -1,65 +1,109 @@
 # app/core/logger.py
+
+"""
+Application logging through a queue.
+
+Loggers returned by setup_logger are plain `logging.Logger`s that propagate
+to one QueueHandler on the root logger. A log call on the request path
+only builds the LogRecord and puts it on a bounded queue; message
+formatting (`%` arguments, tracebacks, timestamps) and the write to stderr
+happen on a QueueListener thread. When the queue is full, records are
+dropped and counted rather than blocking the caller.
+
+Pass arguments instead of pre-formatting, `logger.info("Uploaded %s", name)`,
+so nothing is formatted for records below the logger's level.
+"""
+
+import atexit
 import logging
-from app.core.logging import log_streamer
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from app.core.config import LOG_FORMAT, LOG_QUEUE_SIZE
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Enqueue records as they are; drop instead of waiting when the queue is full"""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+        # Records come from every thread; the counters are only touched under this
+        self._count_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler formats here, on the caller's thread; the listener does it instead
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        # Claim the pending drop count, so two threads don't both report it
+        with self._count_lock:
+            unreported, self._unreported = self._unreported, 0
+        try:
+            if unreported:
+                self.queue.put_nowait(self._dropped_record(unreported))
+                unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Whatever was not reported is still owed, plus this record
+            with self._count_lock:
+                self.dropped += 1
+                self._unreported += unreported + 1
+
+    @staticmethod
+    def _dropped_record(count: int) -> logging.LogRecord:
+        return logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            "Dropped %d log records while the log queue was full", (count,), None
+        )
+
+class DrainingQueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room: on shutdown everything queued should still be written
+        self.queue.put(self._sentinel)
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[DrainingQueueListener] = None
+_lock = threading.Lock()
+
+def configure_logging() -> NonBlockingQueueHandler:
+    """Install the queue handler and start its listener; safe to call repeatedly"""
+    global _handler, _listener
+    if _handler is None:
+        with _lock:
+            if _handler is None:
+                log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+                output = logging.StreamHandler()
+                output.setFormatter(logging.Formatter(LOG_FORMAT, datefmt="%Y-%m-%d %H:%M:%S"))
+                _listener = DrainingQueueListener(log_queue, output, respect_handler_level=True)
+                _listener.start()
+                atexit.register(shutdown_logging)
+                _handler = NonBlockingQueueHandler(log_queue)
+                # Root keeps its level, so third-party loggers stay at WARNING as before
+                logging.getLogger().addHandler(_handler)
+    return _handler
+
+def shutdown_logging():
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+def logging_stats() -> Dict[str, Any]:
+    return {
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "capacity": LOG_QUEUE_SIZE,
+        "dropped": _handler.dropped if _handler else 0
+    }
 
 def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
-    """Create or get a logger with the given name and level.
-    Also integrates with the LogStreamer singleton.
-    
-    This provides a unified interface for both standard logging
-    and the specialized container log streaming.
-    """
-    
-    # Get a standard logger
+    """Get a named logger at the given level, writing through the shared log queue"""
+    configure_logging()
     logger = logging.getLogger(name)
-    
-    # Only set up the logger if it hasn't been configured yet
-    if not logger.handlers:
+    if logger.level == logging.NOTSET:
         logger.setLevel(level)
-        
-        # Create a console handler
-        handler = logging.StreamHandler()
-        handler.setLevel(level)
-        
-        # Create a formatter
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
-        handler.setFormatter(formatter)
-        
-        # Add the handler to the logger
-        logger.addHandler(handler)
-    
-    # Create a wrapper class that logs to both the standard logger and LogStreamer
-    class LoggerWrapper:
-        def __init__(self, std_logger, streamer):
-            self.logger = std_logger
-            self.streamer = streamer
-            
-        def info(self, msg, *args, **kwargs):
-            self.logger.info(msg, *args, **kwargs)
-            self.streamer.info(f"[{name}] {msg}")
-            
-        def warning(self, msg, *args, **kwargs):
-            self.logger.warning(msg, *args, **kwargs)
-            self.streamer.warning(f"[{name}] {msg}")
-            
-        def error(self, msg, *args, **kwargs):
-            self.logger.error(msg, *args, **kwargs)
-            self.streamer.error(f"[{name}] {msg}")
-            
-        def debug(self, msg, *args, **kwargs):
-            self.logger.debug(msg, *args, **kwargs)
-            # Don't send debug messages to LogStreamer to avoid noise
-            
-        def critical(self, msg, *args, **kwargs):
-            self.logger.critical(msg, *args, **kwargs)
-            self.streamer.critical(f"[{name}] {msg}")
-            
-        def exception(self, msg, *args, exc_info=True, **kwargs):
-            self.logger.exception(msg, *args, exc_info=exc_info, **kwargs)
-            self.streamer.error(f"[{name}] Exception: {msg}")
-    
-    # Return the wrapper that logs to both standard logger and LogStreamer
-    return LoggerWrapper(logger, log_streamer)
\ No newline at end of file
+    return logger
@@ -1,9 +1,342 @@
+import asyncio
+import json
+import os
 import threading
 import time
 import logging
-import docker
-import weakref
-from typing import Optional, Callable, Dict, List, Any
+import re
+import zlib
+from collections import deque
+from typing import Optional, Callable, Deque, Dict, List, Set, Tuple, Any
+
+from app.core.config import (
+    LOG_STREAM_TAIL, LOG_STREAM_RECONNECT_MAX, LOG_CURSOR_PATH, LOG_CURSOR_SAVE_INTERVAL, LOG_DEDUP_WINDOW,
+    LOG_MAX_LINE_BYTES
+)
+from app.core.docker_api import DockerAPI, DockerAPIError, parse_timestamp, since_param
+from app.core.log_filter import LogFilter
+
+# Container events that change which containers are followed
+FOLLOW_EVENTS = ["start", "rename", "destroy"]
+# Cursors of containers not seen for this long are dropped
+CURSOR_MAX_AGE = 7 * 86400
+# ffmpeg ends its progress updates with a bare carriage return
+LINE_BREAK = re.compile(rb"\r\n|\r|\n")
+
+class LogCursor:
+    """
+    How far a container's logs have been read: the Docker timestamp of the
+    last line, and hashes of the latest lines. Docker's `since` is
+    inclusive, so lines at the cursor's own timestamp come back on resume;
+    the hashes recognise them.
+    """
+
+    __slots__ = ("ns", "updated", "_recent", "_seen")
+
+    def __init__(self, ns: int = 0, recent: Optional[List[int]] = None, window: int = LOG_DEDUP_WINDOW,
+                 updated: Optional[float] = None):
+        self.ns = ns
+        self.updated = updated or time.time()
+        self._recent: Deque[int] = deque(recent or (), maxlen=window)
+        self._seen: Set[int] = set(self._recent)
+
+    def accept(self, ns: int, digest: int) -> bool:
+        """Advance past a line; False if it was already read"""
+        if ns < self.ns or digest in self._seen:
+            return False
+        if len(self._recent) == self._recent.maxlen:
+            self._seen.discard(self._recent[0])
+        self._recent.append(digest)
+        self._seen.add(digest)
+        self.ns = ns
+        self.updated = time.time()
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"ns": self.ns, "updated": self.updated, "recent": list(self._recent)}
+
+class LogCursorStore:
+    """Cursors by container id, saved to a JSON file so restarts resume where they stopped"""
+
+    def __init__(self, path: Optional[str] = LOG_CURSOR_PATH, window: int = LOG_DEDUP_WINDOW):
+        self.path = path
+        self.window = window
+        self._cursors: Dict[str, LogCursor] = {}
+        self._saved: Dict[str, int] = {}
+        self.load()
+
+    def get(self, container_id: str) -> LogCursor:
+        cursor = self._cursors.get(container_id)
+        if cursor is None:
+            cursor = self._cursors[container_id] = LogCursor(window=self.window)
+        return cursor
+
+    def position(self, container_id: str) -> Optional[int]:
+        cursor = self._cursors.get(container_id)
+        return cursor.ns if cursor is not None and cursor.ns else None
+
+    def forget(self, container_id: str):
+        self._cursors.pop(container_id, None)
+
+    def load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logging.getLogger(__name__).warning("Ignoring unreadable log cursors %s: %s", self.path, e)
+            return
+        self._cursors = {
+            container_id: LogCursor(entry["ns"], entry.get("recent"), self.window, entry.get("updated"))
+            for container_id, entry in data.items()
+        }
+        self._saved = {container_id: cursor.ns for container_id, cursor in self._cursors.items()}
+
+    def save(self):
+        """Write the cursors atomically if any moved"""
+        if not self.path:
+            return
+        cutoff = time.time() - CURSOR_MAX_AGE
+        for container_id in [c for c, cursor in self._cursors.items() if cursor.updated < cutoff]:
+            del self._cursors[container_id]
+        positions = {container_id: cursor.ns for container_id, cursor in self._cursors.items()}
+        if positions == self._saved:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({container_id: cursor.to_dict() for container_id, cursor in self._cursors.items()}, f)
+        os.replace(tmp, self.path)
+        self._saved = positions
+
+class ContainerLogCollector:
+    """
+    Follows the logs of every container matching a set of service names,
+    all on one event loop.
+
+    Containers are resolved from a single listing and then tracked through
+    the Docker events stream, so restarted, recreated and renamed containers
+    are picked up without polling. Each followed container has one task for
+    its lifetime: when its log stream ends it waits for the next start, and
+    when the connection fails it reconnects with backoff. Either way it
+    resumes from the container's cursor, so nothing is skipped or repeated.
+    Lines the filter suppresses still advance the cursor.
+    """
+
+    def __init__(
+        self,
+        services: List[str],
+        emit: Callable[[Dict[str, Any]], None],
+        api: Optional[DockerAPI] = None,
+        tail: int = LOG_STREAM_TAIL,
+        on_error: Optional[Callable[[str], None]] = None,
+        cursors: Optional[LogCursorStore] = None,
+        log_filter: Optional[LogFilter] = None
+    ):
+        self.services = list(services)
+        self.emit = emit
+        self.api = api or DockerAPI()
+        self.tail = tail
+        self.on_error = on_error
+        self.cursors = cursors if cursors is not None else LogCursorStore()
+        self.filter = log_filter
+        # Container id -> (log task, set when the container starts again)
+        self._followers: Dict[str, Tuple["asyncio.Task[None]", asyncio.Event]] = {}
+        self.lines = 0
+        self.follows = 0
+        self.resumes = 0
+        self.duplicates = 0
+
+    def match(self, container_name: str) -> Optional[str]:
+        """The service a container belongs to, by partial name"""
+        container_name = container_name.lstrip("/")
+        for service in self.services:
+            if service in container_name:
+                return service
+        return None
+
+    async def run(self):
+        """Follow containers until cancelled, reconnecting to Docker with backoff"""
+        since: Optional[float] = None
+        delay = 1.0
+        saver = asyncio.ensure_future(self._save_cursors())
+        try:
+            while True:
+                try:
+                    if since is None:
+                        # Events from here on are replayed, so nothing starting during the listing is missed
+                        since = time.time()
+                        for container in await self.api.containers(all=False):
+                            name = container["Names"][0].lstrip("/") if container.get("Names") else container["Id"][:12]
+                            self._follow(container["Id"], name)
+                    async for event in self.api.events(since=since, filters={"type": ["container"], "event": FOLLOW_EVENTS}):
+                        since = event.get("timeNano", since * 1e9) / 1e9
+                        delay = 1.0
+                        self._on_event(event)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self._error(f"Docker events stream failed: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, LOG_STREAM_RECONNECT_MAX)
+        finally:
+            tasks = [task for task, _ in self._followers.values()]
+            for task in tasks + [saver]:
+                task.cancel()
+            await asyncio.gather(*tasks, saver, return_exceptions=True)
+            self._followers.clear()
+            self.cursors.save()
+
+    async def _save_cursors(self):
+        while True:
+            await asyncio.sleep(LOG_CURSOR_SAVE_INTERVAL)
+            try:
+                self.cursors.save()
+            except Exception as e:
+                self._error(f"Failed to save log cursors: {e}")
+
+    def _on_event(self, event: Dict[str, Any]):
+        action = event.get("Action") or event.get("status")
+        actor = event.get("Actor", {})
+        container_id = actor.get("ID") or event.get("id")
+        name = actor.get("Attributes", {}).get("name", "")
+        if not container_id:
+            return
+        at = event.get("timeNano", 0) / 1e9 or float(event.get("time", 0))
+        current = self._followers.get(container_id)
+        if action == "destroy":
+            if current is not None:
+                current[0].cancel()
+            self.cursors.forget(container_id)
+        elif action == "rename":
+            if current is not None:
+                if self.match(name) is None:
+                    current[0].cancel()
+            else:
+                self._follow(container_id, name, since=at)
+        elif action == "start":
+            if current is not None:
+                current[1].set()
+            else:
+                self._follow(container_id, name, since=at)
+
+    def _follow(self, container_id: str, name: str, since: Optional[float] = None):
+        service = self.match(name)
+        if service is None or container_id in self._followers:
+            return
+        started = asyncio.Event()
+        task = asyncio.ensure_future(self._follow_logs(container_id, name, service, since, started))
+        self._followers[container_id] = (task, started)
+        task.add_done_callback(
+            lambda t: self._followers.get(container_id, (None,))[0] is t and self._followers.pop(container_id)
+        )
+        self.follows += 1
+
+    async def _follow_logs(self, container_id: str, name: str, service: str,
+                           since: Optional[float], started: asyncio.Event):
+        cursor = self.cursors.get(container_id)
+        delay = 1.0
+        while True:
+            started.clear()
+            try:
+                info = await self.api.inspect(container_id)
+                tty = bool(info.get("Config", {}).get("Tty"))
+                if cursor.ns:
+                    self.resumes += 1
+                    position, tail = since_param(cursor.ns), None
+                elif since is not None:
+                    position, tail = since, None
+                else:
+                    # First sight of a running container: a little history, not all of it
+                    position, tail = None, self.tail
+                if await self._read_logs(container_id, name, service, cursor, tty, position, tail):
+                    delay = 1.0
+                running = (await self.api.inspect(container_id)).get("State", {}).get("Running", False)
+            except asyncio.CancelledError:
+                raise
+            except DockerAPIError as e:
+                if e.status == 404:
+                    return
+                self._error(f"Error streaming logs from {service} ({name}): {e}")
+                running = True
+            except Exception as e:
+                self._error(f"Error streaming logs from {service} ({name}): {e}")
+                running = True
+
+            if running:
+                # The connection dropped while the container kept running
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, LOG_STREAM_RECONNECT_MAX)
+            else:
+                await started.wait()
+
+    async def _read_logs(self, container_id: str, name: str, service: str, cursor: LogCursor,
+                         tty: bool, since: Any, tail: Optional[int]) -> bool:
+        """Read until the stream ends; True if any new line arrived"""
+        short_id = container_id[:12]
+        pending: Dict[str, bytes] = {}
+        received = False
+        async for stream, data in self.api.logs(container_id, tty=tty, since=since, tail=tail, timestamps=True):
+            lines = LINE_BREAK.split(pending.pop(stream, b"") + data)
+            rest = lines.pop()
+            if len(rest) > LOG_MAX_LINE_BYTES:
+                # Output that never ends a line is passed on rather than buffered without bound
+                lines.append(rest)
+            elif rest:
+                pending[stream] = rest
+            for line in lines:
+                if line:
+                    received |= self._accept(service, name, short_id, stream, cursor, line)
+        # Output that did not end with a newline before the stream ended
+        for stream, line in pending.items():
+            received |= self._accept(service, name, short_id, stream, cursor, line)
+        return received
+
+    def _accept(self, service: str, name: str, short_id: str, stream: str, cursor: LogCursor, line: bytes) -> bool:
+        stamp, _, message = line.partition(b" ")
+        try:
+            ns = parse_timestamp(stamp)
+        except ValueError:
+            ns, message = cursor.ns, line
+        if not cursor.accept(ns, zlib.crc32(line, stream == "stderr")):
+            self.duplicates += 1
+            return False
+        if self.filter is not None and not self.filter.allow(service, message):
+            return True
+        self._emit_line(service, name, short_id, stream, ns / 1e9, message)
+        return True
+
+    def _emit_line(self, service: str, name: str, short_id: str, stream: str, timestamp: float, line: bytes):
+        message = line.decode("utf-8", "replace").strip()
+        if not message:
+            return
+        self.lines += 1
+        self.emit({
+            "service": service,
+            "container": name,
+            "container_id": short_id,
+            "stream": stream,
+            "timestamp": timestamp,
+            "message": message
+        })
+
+    def _error(self, message: str):
+        if self.on_error is not None:
+            self.on_error(message)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "services": self.services,
+            "following": len(self._followers),
+            "follows": self.follows,
+            "resumes": self.resumes,
+            "lines": self.lines,
+            "duplicates_skipped": self.duplicates,
+            "filtered": self.filter.stats() if self.filter is not None else None
+        }
 
 class LogStreamer(logging.Logger):
     _instance: Optional["LogStreamer"] = None
@@ -14,16 +347,24 @@ class LogStreamer(logging.Logger):
             if cls._instance is None:
                 cls._instance = super().__new__(cls)
                 logging.Logger.__init__(cls._instance, name, level)
+                # Not created through getLogger, so attach it to the root logger's handlers by hand
+                cls._instance.parent = logging.getLogger()
                 cls._instance._init_streamer()
         return cls._instance
 
+    def __init__(self, name="LogStreamer", level=logging.INFO):
+        # Initialized once in __new__; repeated construction returns the same instance
+        pass
+
     def _init_streamer(self):
-        self.client = docker.from_env()
         self.services: List[str] = []
-        self.threads: Dict[str, threading.Thread] = {}
         self.running = False
         self.log_callback: Optional[Callable[[Dict[str, Any]], None]] = None
         self._log_level = logging.INFO
+        self._collector: Optional[ContainerLogCollector] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional["asyncio.Task[None]"] = None
 
     def set_services(self, services: List[str]):
         """Set services to stream logs from"""
@@ -37,40 +378,45 @@ class LogStreamer(logging.Logger):
         """Only emit logs at this level or above"""
         self._log_level = level
 
-    def get_container(self, service_name: str):
-        """Locate container by partial service name"""
-        for container in self.client.containers.list(all=True):
-            if service_name in container.name:
-                return container
-        raise ValueError(f"No container found for service '{service_name}'")
-
-    def _stream_logs(self, service: str):
-        try:
-            container = self.get_container(service)
-            logs = container.logs(stream=True, follow=True, tail=10)
-
-            for line in logs:
-                if not self.running:
-                    break
-
-                msg = line.decode("utf-8").strip()
-                if not msg:
-                    continue
-
-                log_entry = {
-                    "service": service,
-                    "container_id": container.id[:12],
-                    "timestamp": time.time(),
-                    "message": msg
-                }
+    def _emit(self, log_entry: Dict[str, Any]):
+        if self.log_callback:
+            self.log_callback(log_entry)
+        elif self.isEnabledFor(self._log_level):
+            self.log(self._log_level, "[%s] %s", log_entry["service"], log_entry["message"])
 
-                if self.log_callback:
-                    self.log_callback(log_entry)
-                elif self.isEnabledFor(self._log_level):
-                    self.log(self._log_level, f"[{service}] {msg}")
+    async def _supervise(self):
+        """Run the collector, restarting it with backoff if it fails"""
+        delay = 1.0
+        while True:
+            started = time.monotonic()
+            try:
+                await self._collector.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.error("Log collector failed, restarting in %.0fs: %s", delay, e)
+            if time.monotonic() - started > LOG_STREAM_RECONNECT_MAX:
+                delay = 1.0
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LOG_STREAM_RECONNECT_MAX)
 
+    def _run_collector(self, ready: threading.Event):
+        """Thread body: one event loop multiplexing every followed container"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        try:
+            self._task = loop.create_task(self._supervise())
+            ready.set()
+            loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
         except Exception as e:
-            self.error(f"Error streaming logs from {service}: {str(e)}")
+            self.error(f"Log collector stopped: {e}")
+        finally:
+            ready.set()
+            loop.close()
+            self._loop = None
 
     def start(self):
         if self.running:
@@ -82,23 +428,36 @@ class LogStreamer(logging.Logger):
             return
 
         self.running = True
-        for service in self.services:
-            if service not in self.threads or not self.threads[service].is_alive():
-                thread = threading.Thread(target=self._stream_logs, args=(service,), daemon=True)
-                self.threads[service] = thread
-                thread.start()
+        self._collector = ContainerLogCollector(self.services, self._emit, on_error=self.error,
+                                                log_filter=LogFilter())
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_collector, args=(ready,),
+                                        name="log-collector", daemon=True)
+        self._thread.start()
+        ready.wait(timeout=2)
 
         self.info(f"LogStreamer started for: {self.services}")
 
     def stop(self):
         self.running = False
-        for service, thread in list(self.threads.items()):
-            if thread.is_alive():
-                thread.join(timeout=2)
-        self.threads.clear()
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # loop already closed
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=2)
+        self._thread = None
+        self._task = None
         self.info("LogStreamer stopped")
 
+    def stats(self) -> Dict[str, Any]:
+        """Followed containers and lines seen by the collector"""
+        stats = self._collector.stats() if self._collector else {"services": self.services}
+        return {"running": self.running, **stats}
+
 # Singleton-style access
 log_streamer: LogStreamer = LogStreamer()
 
-# Example usage: log_streamer.info("Hello from metadata!")
\ No newline at end of file
+# Example usage: log_streamer.info("Hello from metadata!")
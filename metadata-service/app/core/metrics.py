@@ -0,0 +1,62 @@
+# app/core/metrics.py
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator
+
+class LatencyMetrics:
+    """
+    Per-operation call counts, error counts and latency percentiles.
+
+    Percentiles come from a bounded window of the most recent samples, so
+    memory stays constant and the numbers reflect current behaviour.
+    """
+
+    def __init__(self, window: int = 512):
+        self.window = window
+        self._ops: Dict[str, Dict[str, Any]] = {}
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, op: str, seconds: float, error: bool = False):
+        with self._lock:
+            stats = self._ops.get(op)
+            if stats is None:
+                stats = self._ops[op] = {"count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+                self._samples[op] = deque(maxlen=self.window)
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            self._samples[op].append(seconds)
+
+    @contextmanager
+    def timed(self, op: str) -> Iterator[None]:
+        """Time a block, counting it as an error if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.record(op, time.perf_counter() - start, error=True)
+            raise
+        self.record(op, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-operation stats with latencies in milliseconds"""
+        with self._lock:
+            result = {}
+            for op, stats in self._ops.items():
+                samples = sorted(self._samples[op])
+                pick = lambda q: round(samples[min(int(len(samples) * q), len(samples) - 1)] * 1000, 2)
+                result[op] = {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "mean_ms": round(stats["total_seconds"] / stats["count"] * 1000, 2),
+                    "p50_ms": pick(0.5),
+                    "p95_ms": pick(0.95),
+                    "p99_ms": pick(0.99),
+                    "max_ms": round(stats["max_seconds"] * 1000, 2)
+                }
+            return result
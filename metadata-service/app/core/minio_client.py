@@ -0,0 +1,406 @@
+from minio import Minio
+from minio.commonconfig import CopySource
+from minio.datatypes import Object, Part
+from minio.deleteobjects import DeleteObject
+from minio.error import S3Error
+from typing import BinaryIO, Callable, Dict, Any, Iterator, List, Optional, Tuple, TypeVar, Union
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from io import BytesIO
+from itertools import chain, islice
+import asyncio
+import certifi
+import json
+import os
+import socket
+import threading
+import time
+import urllib3
+from urllib3.connection import HTTPConnection
+from app.core.config import (
+    MINIO_ENDPOINT, MINIO_ACCESS_KEY, MINIO_SECRET_KEY, MINIO_SECURE, MINIO_REGION,
+    MINIO_POOL_SIZE, MINIO_CONNECT_TIMEOUT, MINIO_READ_TIMEOUT, MINIO_EXECUTOR_WORKERS
+)
+from app.core.logger import setup_logger
+from app.core.metrics import LatencyMetrics
+
+logger = setup_logger("minio_client")
+
+T = TypeVar("T")
+
+# Latency of every MinIO request made by this process, by SDK operation
+minio_metrics = LatencyMetrics()
+
+# Dedicated threads for blocking SDK calls made from async code
+minio_executor = ThreadPoolExecutor(max_workers=MINIO_EXECUTOR_WORKERS, thread_name_prefix="minio")
+
+def build_http_client(secure: bool = MINIO_SECURE) -> urllib3.PoolManager:
+    """Connection pool sized for concurrent callers, with TCP keep-alive"""
+    socket_options = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    return urllib3.PoolManager(
+        num_pools=4,
+        maxsize=MINIO_POOL_SIZE,
+        block=False,
+        timeout=urllib3.Timeout(connect=MINIO_CONNECT_TIMEOUT, read=MINIO_READ_TIMEOUT),
+        retries=urllib3.Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+        socket_options=socket_options,
+        cert_reqs="CERT_REQUIRED" if secure else "CERT_NONE",
+        ca_certs=certifi.where() if secure else None
+    )
+
+class MinIOClient:
+    def __init__(
+        self,
+        endpoint: str = MINIO_ENDPOINT,
+        access_key: str = MINIO_ACCESS_KEY,
+        secret_key: str = MINIO_SECRET_KEY,
+        secure: bool = MINIO_SECURE
+    ):
+        self.endpoint = endpoint
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.secure = secure
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._known_buckets = set()
+        self.aio = AsyncMinIOClient(self)
+
+    @property
+    def client(self) -> Minio:
+        """Lazy initialization of MinIO client"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = Minio(
+                        endpoint=self.endpoint,
+                        access_key=self.access_key,
+                        secret_key=self.secret_key,
+                        secure=self.secure,
+                        region=MINIO_REGION,
+                        http_client=build_http_client(self.secure)
+                    )
+        return self._client
+
+    def _call(self, op: str, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Make one SDK request, recording its latency"""
+        with minio_metrics.timed(op):
+            return fn(*args, **kwargs)
+
+    def check_connection(self) -> bool:
+        """Check if MinIO connection is working"""
+        try:
+            # List buckets as a connection test
+            self._call("list_buckets", self.client.list_buckets)
+            return True
+        except Exception as e:
+            logger.error(f"MinIO connection check failed: {e}")
+            return False
+
+    def ensure_bucket_exists(self, bucket_name: str) -> bool:
+        """Ensure a bucket exists, create it if it doesn't"""
+        if bucket_name in self._known_buckets:
+            return True
+        try:
+            if not self._call("bucket_exists", self.client.bucket_exists, bucket_name):
+                self._call("make_bucket", self.client.make_bucket, bucket_name)
+                logger.info("Created bucket: %s", bucket_name)
+            self._known_buckets.add(bucket_name)
+            return True
+        except S3Error as e:
+            logger.error(f"Failed to create bucket {bucket_name}: {e}")
+            return False
+
+    def upload_file(
+        self,
+        bucket_name: str,
+        object_name: str,
+        file_data: Union[BinaryIO, bytes, str],
+        content_type: str = 'application/octet-stream',
+        metadata: Optional[Dict[str, str]] = None
+    ) -> bool:
+        """Upload a file to MinIO bucket"""
+        try:
+            # Ensure bucket exists
+            if not self.ensure_bucket_exists(bucket_name):
+                return False
+
+            # Handle different input types
+            if isinstance(file_data, str):
+                # Convert string to bytes
+                file_data = BytesIO(file_data.encode('utf-8'))
+                if content_type == 'application/octet-stream':
+                    content_type = 'text/plain'
+            elif isinstance(file_data, bytes):
+                file_data = BytesIO(file_data)
+
+            # Get file size for BytesIO objects
+            if isinstance(file_data, BytesIO):
+                file_data.seek(0, os.SEEK_END)
+                file_length = file_data.tell()
+                file_data.seek(0)
+            else:
+                # For file-like objects, use automatic length detection
+                file_length = -1
+
+            # Upload file
+            self._call(
+                "put_object",
+                self.client.put_object,
+                bucket_name=bucket_name,
+                object_name=object_name,
+                data=file_data,
+                length=file_length,
+                part_size=10 * 1024 * 1024 if file_length == -1 else 0,
+                content_type=content_type,
+                metadata=metadata
+            )
+            logger.info("Uploaded %s to %s", object_name, bucket_name)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to upload file to MinIO: {e}")
+            return False
+
+    def upload_json(self, bucket_name: str, object_name: str, data: Dict[str, Any]) -> bool:
+        """Upload JSON data to MinIO bucket"""
+        try:
+            json_data = json.dumps(data, default=str)
+            return self.upload_file(
+                bucket_name=bucket_name,
+                object_name=object_name,
+                file_data=json_data,
+                content_type='application/json'
+            )
+        except Exception as e:
+            logger.error(f"Failed to upload JSON to MinIO: {e}")
+            return False
+
+    # Multipart upload primitives; these raise on failure so callers can abort
+
+    def create_multipart_upload(self, bucket_name: str, object_name: str,
+                                content_type: str = 'application/octet-stream') -> str:
+        """Start a multipart upload and return its upload id"""
+        return self._call(
+            "create_multipart_upload", self.client._create_multipart_upload,
+            bucket_name, object_name, {"Content-Type": content_type}
+        )
+
+    def upload_part(self, bucket_name: str, object_name: str, upload_id: str,
+                    part_number: int, data: bytes) -> Part:
+        """Upload one part of a multipart upload"""
+        etag = self._call(
+            "upload_part", self.client._upload_part,
+            bucket_name, object_name, data, None, upload_id, part_number
+        )
+        return Part(part_number, etag)
+
+    def complete_multipart_upload(self, bucket_name: str, object_name: str,
+                                  upload_id: str, parts: List[Part]) -> str:
+        """Complete a multipart upload and return the object's etag"""
+        parts = sorted(parts, key=lambda part: part.part_number)
+        result = self._call(
+            "complete_multipart_upload", self.client._complete_multipart_upload,
+            bucket_name, object_name, upload_id, parts
+        )
+        return result.etag
+
+    def abort_multipart_upload(self, bucket_name: str, object_name: str, upload_id: str):
+        """Abort a multipart upload, discarding uploaded parts"""
+        try:
+            self._call("abort_multipart_upload", self.client._abort_multipart_upload, bucket_name, object_name, upload_id)
+        except Exception as e:
+            logger.error(f"Failed to abort multipart upload of {object_name}: {e}")
+
+    def fetch_file(self, bucket_name: str, object_name: str) -> Optional[bytes]:
+        """Download a file, returning None only if it does not exist; other errors raise"""
+        try:
+            response = self._call("get_object", self.client.get_object, bucket_name, object_name)
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchBucket"):
+                return None
+            raise
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def download_file(self, bucket_name: str, object_name: str) -> Optional[bytes]:
+        """Download a file from MinIO bucket"""
+        try:
+            return self.fetch_file(bucket_name, object_name)
+        except Exception as e:
+            logger.error(f"Failed to download file from MinIO: {e}")
+            return None
+
+    def stat_object(self, bucket_name: str, object_name: str) -> Optional[Object]:
+        """Get an object's size, etag, content type and modification time"""
+        try:
+            return self._call("stat_object", self.client.stat_object, bucket_name, object_name)
+        except Exception as e:
+            logger.error(f"Failed to stat object in MinIO: {e}")
+            return None
+
+    def find_object(self, bucket_name: str, object_name: str) -> Optional[Object]:
+        """Stat an object, returning None only if it does not exist; other errors raise"""
+        try:
+            return self._call("stat_object", self.client.stat_object, bucket_name, object_name)
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchBucket"):
+                return None
+            raise
+
+    def copy_object(self, bucket_name: str, source_name: str, object_name: str,
+                    source_bucket: Optional[str] = None) -> str:
+        """
+        Server-side copy, returning the new object's etag; raises on failure.
+
+        Sources over 5 GiB are copied part by part with UploadPartCopy.
+        """
+        result = self._call(
+            "copy_object", self.client.copy_object,
+            bucket_name, object_name, CopySource(source_bucket or bucket_name, source_name)
+        )
+        return result.etag
+
+    def remove_objects(self, bucket_name: str, object_names: List[str]) -> Dict[str, str]:
+        """Delete up to 1000 objects with one request, returning the error for each one that failed"""
+        errors = self._call(
+            "remove_objects", lambda: list(self.client.remove_objects(
+                bucket_name, [DeleteObject(name) for name in object_names]
+            ))
+        )
+        return {error.name: error.message or error.code for error in errors}
+
+    def stream_object(
+        self,
+        bucket_name: str,
+        object_name: str,
+        offset: int = 0,
+        length: int = 0,
+        chunk_size: int = 1024 * 1024
+    ) -> Iterator[bytes]:
+        """Stream an object (or a byte range of it) with a single ranged GET"""
+        response = self._call(
+            "get_object", self.client.get_object, bucket_name, object_name, offset=offset, length=length
+        )
+        try:
+            for chunk in response.stream(chunk_size):
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+    def presigned_url(self, method: str, bucket_name: str, object_name: str, expires_seconds: int) -> str:
+        """Sign a URL for one request against an object; computed locally, no round trip"""
+        return self.client.get_presigned_url(
+            method, bucket_name, object_name, expires=timedelta(seconds=expires_seconds)
+        )
+
+    def download_json(self, bucket_name: str, object_name: str) -> Optional[Dict[str, Any]]:
+        """Download and parse JSON data from MinIO bucket"""
+        try:
+            data = self.download_file(bucket_name, object_name)
+            if data:
+                return json.loads(data.decode('utf-8'))
+            return None
+        except Exception as e:
+            logger.error(f"Failed to download or parse JSON from MinIO: {e}")
+            return None
+
+    def iter_objects(
+        self,
+        bucket_name: str,
+        prefix: str = '',
+        recursive: bool = True,
+        start_after: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield objects as MinIO returns them, without materializing the listing"""
+        objects = self.client.list_objects(
+            bucket_name, prefix=prefix, recursive=recursive, start_after=start_after
+        )
+        # Listing is lazy; the first page's latency is what callers wait on
+        start = time.perf_counter()
+        try:
+            first = next(objects, None)
+        except Exception:
+            minio_metrics.record("list_objects", time.perf_counter() - start, error=True)
+            raise
+        minio_metrics.record("list_objects", time.perf_counter() - start)
+        if first is None:
+            return
+        for obj in chain((first,), objects):
+            yield {
+                "name": obj.object_name,
+                "size": obj.size,
+                "last_modified": obj.last_modified,
+                "etag": obj.etag
+            }
+
+    def list_page(
+        self,
+        bucket_name: str,
+        prefix: str = '',
+        limit: int = 1000,
+        start_after: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """List at most `limit` objects after `start_after`, and whether more remain"""
+        page = list(islice(self.iter_objects(bucket_name, prefix, start_after=start_after), limit + 1))
+        return page[:limit], len(page) > limit
+
+    def list_objects(self, bucket_name: str, prefix: str = '', recursive: bool = True) -> List[Dict[str, Any]]:
+        """List objects in a bucket with optional prefix"""
+        try:
+            return list(self.iter_objects(bucket_name, prefix=prefix, recursive=recursive))
+        except Exception as e:
+            logger.error(f"Failed to list objects in MinIO: {e}")
+            return []
+
+    def remove_file(self, bucket_name: str, object_name: str) -> bool:
+        """Remove a file from MinIO bucket"""
+        try:
+            self._call("remove_object", self.client.remove_object, bucket_name, object_name)
+            logger.info("Removed %s from %s", object_name, bucket_name)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to remove file from MinIO: {e}")
+            return False
+
+class AsyncMinIOClient:
+    """
+    Awaitable facade over a MinIOClient.
+
+    Every method of the wrapped client is available as a coroutine that runs
+    on the dedicated MinIO thread pool, e.g. `await minio.aio.stat_object(...)`.
+    Generators (iter_objects, stream_object) are not wrapped.
+    """
+
+    def __init__(self, sync: MinIOClient):
+        self._sync = sync
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run any blocking callable on the MinIO thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(minio_executor, partial(fn, *args, **kwargs))
+
+    def __getattr__(self, name: str):
+        method = getattr(self._sync, name)
+        if not callable(method) or name.startswith("_") or name in ("iter_objects", "stream_object"):
+            raise AttributeError(f"{name} is not available on the async MinIO client")
+
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+        call.__name__ = name
+        return call
+
+_shared_client: Optional[MinIOClient] = None
+_shared_lock = threading.Lock()
+
+def get_minio_client() -> MinIOClient:
+    """The process-wide MinIO client; its connection pool is shared by every caller"""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = MinIOClient()
+    return _shared_client
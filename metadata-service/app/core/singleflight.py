@@ -0,0 +1,44 @@
+# app/core/singleflight.py
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one in-flight computation.
+
+    Every caller awaiting a key gets the result (or exception) of the single
+    shared call. A caller that is cancelled detaches without cancelling the
+    computation for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            self.started += 1
+            future.add_done_callback(lambda f, key=key: self._done(key, f))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def _done(self, key: Hashable, future: "asyncio.Future[Any]"):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Mark the exception retrieved in case every caller went away
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._calls), "started": self.started, "coalesced": self.coalesced}
@@ -2,16 +2,26 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import events, health, control, storage, finalizer
+from app.api import events, health, control, storage, finalizer, logs
 from app.core.logger import setup_logger
 from app.services.minio_init import initialize_minio
+from app.services.metadata_cache import metadata_cache
+from app.services.search_index import search_index
+from app.services.local_mirror import local_mirror
+from app.services.log_buffer import log_hub
+from app.services.log_archive import log_archiver
+from app.services.media_metrics import media_metrics
+from app.services.health_monitor import health_monitor
+from app.services.stream_probe import stream_probe
+from app.core.minio_client import get_minio_client
 from app.core.logging import log_streamer
+import asyncio
 import logging
 from typing import Dict, Any
 from app.core.config import (
     PROJECT_NAME, PROJECT_DESCRIPTION, VERSION, 
     CORS_ORIGINS, HOST, PORT, DEBUG,
-    CONTAINER_LOG_SERVICES
+    CONTAINER_LOG_SERVICES, LOCAL_MIRROR_ENABLED, LOG_ARCHIVE_ENABLED, LOG_METRICS_ENABLED
 )
 
 # Setup application logger
@@ -40,15 +50,22 @@ app.include_router(events.router, prefix="/events", tags=["Events"])
 app.include_router(control.router, prefix="/control", tags=["Control Plane"])
 app.include_router(storage.router, prefix="/storage", tags=["Storage"])
 app.include_router(finalizer.router, prefix="/finalize", tags=["Finalizer"])
+app.include_router(logs.router, prefix="/logs", tags=["Logs"])
 
 @app.on_event("startup")
 async def startup_event():
     logger.info(f"Starting {PROJECT_NAME} v{VERSION}")
     
-    # Configure LogStreamer to monitor all services
+    # Buffer container logs per service, fan them out to /logs viewers, archive them
+    # to MinIO and parse media metrics out of them
     def callback(log: Dict[str, Any]):
-        print(f"[{log['service']}] {log['message']}")
+        log_hub.ingest(log)
+        if LOG_ARCHIVE_ENABLED:
+            log_archiver.ingest(log)
+        if LOG_METRICS_ENABLED:
+            media_metrics.ingest(log)
 
+    log_hub.bind_loop(asyncio.get_running_loop())
     log_streamer.set_services(CONTAINER_LOG_SERVICES)
     log_streamer.set_callback(callback)
     log_streamer.set_level_filter(logging.INFO)
@@ -61,6 +78,27 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to initialize MinIO: {e}")
     
+    if LOG_ARCHIVE_ENABLED:
+        await log_archiver.start(get_minio_client())
+    
+    # Probe RabbitMQ, Docker and MinIO in the background; /health answers from the last round
+    await health_monitor.start()
+    # Publish a synthetic stream every STREAM_PROBE_INTERVAL seconds, if set
+    await stream_probe.start()
+    
+    # Listen for metadata cache invalidations from other processes
+    metadata_cache.start()
+    
+    # Load the metadata search index, rebuilding it from MinIO if there is no saved copy
+    try:
+        await search_index.start(get_minio_client())
+    except Exception as e:
+        logger.error(f"Failed to start search index: {e}")
+    
+    # Index the NAS mirror mounts so downloads can skip MinIO
+    if LOCAL_MIRROR_ENABLED:
+        await local_mirror.start()
+    
     # Start finalizer service
     try:
         from app.services.finalizer_service import finalizer_service
@@ -83,8 +121,19 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"Error stopping finalizer service: {e}")
     
-    # Stop the LogStreamer
+    metadata_cache.stop()
+    await local_mirror.stop()
+    await health_monitor.stop()
+    await stream_probe.stop()
+    
+    try:
+        await search_index.stop(get_minio_client())
+    except Exception as e:
+        logger.error(f"Failed to save search index: {e}")
+    
+    # Stop the LogStreamer, then upload whatever it left in the log archive
     log_streamer.stop()
+    await log_archiver.stop()
     logger.info(f"Shutdown complete for {PROJECT_NAME}")
 
 @app.get("/")
@@ -101,7 +150,8 @@ async def root():
             "events": "/events",
             "control": "/control",
             "storage": "/storage",
-            "finalizer": "/finalize"
+            "finalizer": "/finalize",
+            "logs": "/logs"
         },
         "status": "operational"
     }
@@ -4,6 +4,9 @@ import os
 
 def default_metadata(video_path: str, thumb_path: str) -> Dict[str, Any]:
     """Default CDA Metadata."""
+    # Imported here: the finalizer imports this module at load time
+    from app.services.finalizer import calculate_sha256
+
     base = os.path.basename(video_path)
     return {
         "video_filename": base,
@@ -0,0 +1,225 @@
+# app/services/bulk_storage.py
+
+"""
+Server-side bulk copy, move and delete.
+
+Objects are copied with S3 CopyObject (UploadPartCopy above 5 GiB) and
+deleted with multi-object DeleteObjects, so no object data passes through
+this service. Operations run in the background, a batch of up to 1000
+objects at a time, and report through the progress tracker under their
+operation id. A move deletes each batch's sources once they are copied,
+so a cancelled or failed move never loses objects.
+"""
+
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import (
+    STORAGE_BULK_WORKERS, STORAGE_DEDUP_ENABLED, CAS_OBJECT_PREFIX, CAS_STAGING_PREFIX
+)
+from app.core.minio_client import MinIOClient
+from app.core.logger import setup_logger
+from app.services.dedup import content_store, alias_digest, blob_name
+from app.services.progress import progress_tracker, TERMINAL_STATUSES
+
+logger = setup_logger("bulk_storage")
+
+# Threads issuing the copy and delete requests, shared by all operations
+bulk_executor = ThreadPoolExecutor(max_workers=STORAGE_BULK_WORKERS, thread_name_prefix="bulk")
+
+BULK_OPERATIONS = ("copy", "move", "delete")
+BATCH_SIZE = 1000  # most keys S3 accepts in one DeleteObjects request
+MAX_REPORTED_ERRORS = 20
+
+ChangeCallback = Callable[[MinIOClient, str, str], Awaitable[None]]
+
+class BulkOperation:
+    def __init__(
+        self,
+        operation: str,
+        bucket: str,
+        prefix: Optional[str] = None,
+        keys: Optional[List[str]] = None,
+        dest_bucket: Optional[str] = None,
+        dest_prefix: Optional[str] = None,
+        whole_bucket: bool = False
+    ):
+        if operation not in BULK_OPERATIONS:
+            raise ValueError(f"Unknown bulk operation: {operation}")
+        if (prefix is None) == (keys is None):
+            raise ValueError("Select objects with either 'prefix' or 'keys'")
+        # An empty prefix selects the whole bucket; removing its objects must be asked for explicitly
+        if prefix == "" and operation in ("move", "delete") and not whole_bucket:
+            raise ValueError(f"An empty prefix would {operation} the whole bucket; set 'whole_bucket' to confirm")
+        self.id = f"bulk-{uuid.uuid4().hex[:12]}"
+        self.operation = operation
+        self.bucket = bucket
+        self.prefix = prefix
+        self.keys = keys
+        self.dest_bucket = dest_bucket or bucket
+        self.dest_prefix = dest_prefix if dest_prefix is not None else (prefix or "")
+        if operation != "delete" and self.dest_bucket == bucket and self.dest_prefix == (prefix or ""):
+            raise ValueError("Destination is the same as the source")
+        self.total: Optional[int] = None
+        self.done = 0
+        self.failed = 0
+        self.bytes = 0
+        self.errors: List[Dict[str, str]] = []
+        self.task: Optional["asyncio.Task[None]"] = None
+
+    def destination(self, name: str) -> str:
+        if self.prefix and name.startswith(self.prefix):
+            name = name[len(self.prefix):]
+        return self.dest_prefix + name
+
+    def error(self, name: str, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"object": name, "error": message})
+
+    def report(self, stage: str, status: str = "processing", force: bool = False, **extra: Any):
+        if status == "completed" or self.total == 0:
+            percent = 100.0
+        else:
+            percent = (self.done + self.failed) * 100.0 / self.total if self.total else None
+        return progress_tracker.update(self.id, stage, percent=percent, status=status,
+                                       force=force or status in TERMINAL_STATUSES, **self._fields(), **extra)
+
+    def _fields(self) -> Dict[str, Any]:
+        return {
+            "operation": self.operation,
+            "bucket": self.bucket,
+            "prefix": self.prefix,
+            "dest_bucket": self.dest_bucket if self.operation != "delete" else None,
+            "dest_prefix": self.dest_prefix if self.operation != "delete" else None,
+            "total": self.total,
+            "done": self.done,
+            "failed": self.failed,
+            "bytes": self.bytes,
+            "errors": list(self.errors),
+        }
+
+class BulkStorage:
+    def __init__(self):
+        self._operations: Dict[str, BulkOperation] = {}
+
+    def start(self, minio: MinIOClient, operation: BulkOperation,
+              on_change: Optional[ChangeCallback] = None) -> BulkOperation:
+        """Run an operation in the background"""
+        self._prune()
+        self._operations[operation.id] = operation
+        operation.report("queued", status="queued", force=True)
+        operation.task = asyncio.create_task(self._run(minio, operation, on_change))
+        return operation
+
+    def cancel(self, operation_id: str) -> bool:
+        operation = self._operations.get(operation_id)
+        if operation is None or operation.task is None or operation.task.done():
+            return False
+        operation.task.cancel()
+        return True
+
+    def running(self) -> List[str]:
+        return [op_id for op_id, op in self._operations.items() if op.task is not None and not op.task.done()]
+
+    def _prune(self):
+        for op_id in [op_id for op_id, op in self._operations.items() if op.task is not None and op.task.done()]:
+            del self._operations[op_id]
+
+    async def _run(self, minio: MinIOClient, operation: BulkOperation, on_change: Optional[ChangeCallback]):
+        loop = asyncio.get_running_loop()
+        stage = "listing"
+        try:
+            operation.report(stage, force=True)
+            objects = await loop.run_in_executor(bulk_executor, self._select, minio, operation)
+            operation.total = len(objects)
+            if operation.operation != "delete":
+                if not await loop.run_in_executor(bulk_executor, minio.ensure_bucket_exists, operation.dest_bucket):
+                    raise RuntimeError(f"Bucket {operation.dest_bucket} is not available")
+
+            stage = {"copy": "copying", "move": "moving", "delete": "deleting"}[operation.operation]
+            for start in range(0, len(objects), BATCH_SIZE):
+                batch = objects[start:start + BATCH_SIZE]
+                await self._run_batch(loop, minio, operation, batch, on_change)
+                operation.report(stage)
+
+            operation.report(stage, status="completed")
+            logger.info(f"Bulk {operation.operation} {operation.id} finished: "
+                        f"{operation.done} done, {operation.failed} failed")
+        except asyncio.CancelledError:
+            operation.report(stage, status="failed", error="Cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Bulk {operation.operation} {operation.id} failed: {e}")
+            operation.report(stage, status="failed", error=str(e))
+
+    async def _run_batch(self, loop, minio: MinIOClient, operation: BulkOperation,
+                         batch: List[Tuple[str, Optional[int]]], on_change: Optional[ChangeCallback]):
+        changed: List[Tuple[str, str]] = []
+        if operation.operation == "delete":
+            removed = await self._remove(loop, minio, operation, [name for name, _ in batch])
+            for name, size in batch:
+                if name in removed:
+                    operation.done += 1
+                    operation.bytes += size or 0
+            changed = [(operation.bucket, name) for name in removed]
+        else:
+            results = await asyncio.gather(*(
+                loop.run_in_executor(bulk_executor, self._copy_one, minio, operation, name, size)
+                for name, size in batch
+            ), return_exceptions=True)
+            copied = []
+            for (name, _), result in zip(batch, results):
+                if isinstance(result, BaseException):
+                    operation.error(name, str(result))
+                else:
+                    copied.append((name, result))
+                    changed.append((operation.dest_bucket, operation.destination(name)))
+
+            if operation.operation == "move" and copied:
+                # Sources go only once their copies exist
+                removed = await self._remove(loop, minio, operation, [name for name, _ in copied])
+                changed += [(operation.bucket, name) for name, _ in copied if name in removed]
+                copied = [(name, size) for name, size in copied if name in removed]
+            for _, size in copied:
+                operation.done += 1
+                operation.bytes += size or 0
+
+        if on_change is not None:
+            for bucket, name in changed:
+                await on_change(minio, bucket, name)
+
+    async def _remove(self, loop, minio: MinIOClient, operation: BulkOperation, names: List[str]) -> set:
+        """Delete one batch of source objects, returning the names that are gone"""
+        try:
+            errors = await loop.run_in_executor(bulk_executor, minio.remove_objects, operation.bucket, names)
+        except Exception as e:
+            errors = {name: str(e) for name in names}
+        for name, message in errors.items():
+            operation.error(name, message)
+        return set(names) - set(errors)
+
+    def _select(self, minio: MinIOClient, operation: BulkOperation) -> List[Tuple[str, Optional[int]]]:
+        """The (name, size) of every object to act on; sizes of explicit keys are not known"""
+        if operation.keys is not None:
+            return [(key, None) for key in dict.fromkeys(operation.keys)]
+        return [
+            (obj["name"], obj["size"]) for obj in minio.iter_objects(operation.bucket, prefix=operation.prefix)
+            # Content-addressed blobs move with their aliases, not by prefix
+            if not obj["name"].startswith((CAS_OBJECT_PREFIX, CAS_STAGING_PREFIX))
+        ]
+
+    def _copy_one(self, minio: MinIOClient, operation: BulkOperation, name: str, size: Optional[int]) -> Optional[int]:
+        if STORAGE_DEDUP_ENABLED and not size and operation.dest_bucket != operation.bucket:
+            # An alias needs its blob in the destination bucket too
+            digest = alias_digest(minio.find_object(operation.bucket, name))
+            if digest and content_store.blob_size(minio, operation.dest_bucket, digest) is None:
+                minio.copy_object(operation.dest_bucket, blob_name(digest), blob_name(digest),
+                                  source_bucket=operation.bucket)
+        minio.copy_object(operation.dest_bucket, name, operation.destination(name), source_bucket=operation.bucket)
+        return size
+
+# Singleton instance
+bulk_storage = BulkStorage()
@@ -0,0 +1,118 @@
+# app/services/dedup.py
+
+"""
+Content-addressed storage for uploads.
+
+Each distinct file is stored once per bucket, as a blob named by its sha256
+under CAS_OBJECT_PREFIX. The name a file was uploaded as becomes an empty
+alias object whose user metadata holds the digest, and downloads follow the
+alias to the blob. Blobs are never rewritten, so lookups are safe to cache.
+"""
+
+import re
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import CAS_OBJECT_PREFIX, CAS_LOOKUP_CACHE_TTL
+from app.core.minio_client import MinIOClient
+
+# Stored on aliases as x-amz-meta-cas-sha256
+ALIAS_METADATA_KEY = "cas-sha256"
+ALIAS_HEADER = f"x-amz-meta-{ALIAS_METADATA_KEY}"
+
+# Lookups are cached per entry, not by size
+LOOKUP_CACHE_ENTRIES = 65536
+
+_HEX_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+def normalize_digest(value: Optional[str]) -> Optional[str]:
+    """A lowercase hex sha256 (an optional "sha256:" prefix is dropped), None if empty"""
+    if not value:
+        return None
+    digest = value.strip().lower()
+    if digest.startswith("sha256:"):
+        digest = digest[len("sha256:"):]
+    if not _HEX_SHA256.fullmatch(digest):
+        raise ValueError(f"Not a hex sha256 digest: {value}")
+    return digest
+
+def blob_name(digest: str) -> str:
+    return f"{CAS_OBJECT_PREFIX}{digest[:2]}/{digest}"
+
+def alias_digest(stat) -> Optional[str]:
+    """The blob digest an object points at, or None if it is not an alias"""
+    if stat is None or stat.size:
+        return None
+    metadata = stat.metadata or {}
+    return metadata.get(ALIAS_HEADER)
+
+class ContentStore:
+    def __init__(self, ttl: float = CAS_LOOKUP_CACHE_TTL):
+        # Blob sizes by (bucket, digest)
+        self._blobs = LRUCache(LOOKUP_CACHE_ENTRIES, ttl)
+        # Name holding the bytes by (bucket, object name); itself for plain objects
+        self._targets = LRUCache(LOOKUP_CACHE_ENTRIES, ttl)
+        self._lock = threading.Lock()
+        self.counters = {
+            "uploads": 0,
+            "deduplicated": 0,
+            "transfers_skipped": 0,
+            "checks": 0,
+            "check_hits": 0,
+            "bytes_received": 0,
+            "bytes_stored": 0,
+            "bytes_saved": 0,
+        }
+
+    def blob_size(self, minio: MinIOClient, bucket: str, digest: str) -> Optional[int]:
+        """Size of the stored blob with this digest, or None if there is none"""
+        size = self._blobs.get((bucket, digest))
+        if size is not None:
+            return size
+        stat = minio.find_object(bucket, blob_name(digest))
+        if stat is None:
+            return None
+        self._blobs.set((bucket, digest), stat.size, 1)
+        return stat.size
+
+    def stored(self, bucket: str, digest: str, size: int):
+        self._blobs.set((bucket, digest), size, 1)
+
+    def link(self, minio: MinIOClient, bucket: str, object_name: str, digest: str,
+             content_type: Optional[str] = None) -> bool:
+        """Write object_name as an alias of the blob with this digest"""
+        if not minio.upload_file(bucket, object_name, b"", content_type or "application/octet-stream",
+                                 metadata={ALIAS_METADATA_KEY: digest}):
+            return False
+        self._targets.set((bucket, object_name), blob_name(digest), 1)
+        return True
+
+    def resolve(self, minio: MinIOClient, bucket: str, object_name: str) -> str:
+        """The object holding the bytes for a name: its blob if it is an alias, otherwise itself"""
+        target = self._targets.get((bucket, object_name))
+        if target is not None:
+            return target
+        digest = alias_digest(minio.find_object(bucket, object_name))
+        target = blob_name(digest) if digest else object_name
+        self._targets.set((bucket, object_name), target, 1)
+        return target
+
+    def forget(self, bucket: str, object_name: str):
+        self._targets.invalidate((bucket, object_name))
+
+    def count(self, **amounts: int):
+        with self._lock:
+            for name, amount in amounts.items():
+                self.counters[name] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        # Every upload's bytes were either stored or saved
+        uploaded = counters["bytes_stored"] + counters["bytes_saved"]
+        counters["saved_ratio"] = round(counters["bytes_saved"] / uploaded, 4) if uploaded else 0.0
+        return counters
+
+# Singleton instance
+content_store = ContentStore()
@@ -1,16 +1,19 @@
 import os
 import subprocess
 import hashlib
-import shutil
+import urllib.parse
 import urllib.request
 import tempfile
+import time
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Tuple, Dict, Optional, Union
+from typing import Any, Callable, Dict, IO, Iterator, Optional, Tuple, Union
 from app.profiles.metadata_profiles import METADATA_PROFILES
 from app.services.metadata_enhancer import enrich_metadata
 
 from app.core.config import (
     FFMPEG_PATH,
+    FFMPEG_PROGRESS_PERIOD,
     TEMP_DIR,
     THUMBNAIL_TIMESTAMP,
     THUMBNAIL_SIZE,
@@ -21,6 +24,113 @@ from app.core.logger import setup_logger
 
 logger = setup_logger("finalizer")
 
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+# Progress reporter for the finalization running in the current thread
+_progress_reporter: ContextVar[Optional[ProgressCallback]] = ContextVar("progress_reporter", default=None)
+
+def _report(stage: str, **fields: Any):
+    """Forward a progress update to the active reporter, if any."""
+    reporter = _progress_reporter.get()
+    if reporter is not None:
+        try:
+            reporter(stage, fields)
+        except Exception as e:
+            logger.warning(f"Progress reporter failed: {e}")
+
+def _eta(done: float, total: float, started: float) -> Optional[float]:
+    """Estimate remaining seconds from throughput so far."""
+    elapsed = time.monotonic() - started
+    if done <= 0 or elapsed <= 0:
+        return None
+    return (total - done) / (done / elapsed)
+
+def _copy_with_progress(src: IO[bytes], dst: IO[bytes], total: int, stage: str, chunk_size: int = 1024 * 1024):
+    """Copy a stream while reporting byte progress."""
+    started = time.monotonic()
+    done = 0
+    for chunk in iter(lambda: src.read(chunk_size), b""):
+        dst.write(chunk)
+        done += len(chunk)
+        if total > 0:
+            _report(stage, percent=done * 100.0 / total, eta=_eta(done, total, started))
+        else:
+            _report(stage, bytes=done)
+
+def parse_ffmpeg_progress(lines: Iterator[str], duration_us: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Incrementally parse ffmpeg `-progress` output.
+
+    ffmpeg emits blocks of key=value lines terminated by a `progress=continue`
+    or `progress=end` line; one snapshot is yielded per block.
+    """
+    block: Dict[str, str] = {}
+    for raw in lines:
+        key, sep, value = raw.strip().partition("=")
+        if not sep:
+            continue
+        block[key] = value.strip()
+        if key != "progress":
+            continue
+
+        snapshot: Dict[str, Any] = {"done": value.strip() == "end"}
+        try:
+            snapshot["fps"] = float(block.get("fps", "0"))
+        except ValueError:
+            snapshot["fps"] = None
+        try:
+            snapshot["speed"] = float(block.get("speed", "").rstrip("x"))
+        except ValueError:
+            snapshot["speed"] = None
+        # out_time_ms is reported in microseconds as well (long-standing ffmpeg quirk)
+        out_time = block.get("out_time_us") or block.get("out_time_ms") or ""
+        snapshot["out_time_us"] = int(out_time) if out_time.lstrip("-").isdigit() else None
+
+        if snapshot["done"]:
+            snapshot["percent"] = 100.0
+            snapshot["eta"] = 0.0
+        elif duration_us and snapshot["out_time_us"] is not None:
+            out_us = max(snapshot["out_time_us"], 0)
+            snapshot["percent"] = min(out_us * 100.0 / duration_us, 100.0)
+            speed = snapshot["speed"]
+            snapshot["eta"] = (duration_us - out_us) / 1e6 / speed if speed else None
+        else:
+            snapshot["percent"] = None
+            snapshot["eta"] = None
+
+        yield snapshot
+        block = {}
+
+def run_ffmpeg(args: list, stage: str, duration_us: Optional[int] = None):
+    """Run ffmpeg with machine-readable progress on stdout, reporting as it goes."""
+    cmd = [FFMPEG_PATH, "-y", "-nostats", "-progress", "pipe:1"]
+    if FFMPEG_PROGRESS_PERIOD:
+        cmd += ["-stats_period", FFMPEG_PROGRESS_PERIOD]
+    cmd += args
+
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, bufsize=1) as proc:
+        for snapshot in parse_ffmpeg_progress(proc.stdout, duration_us):
+            _report(stage, percent=snapshot["percent"], fps=snapshot["fps"], eta=snapshot["eta"])
+        returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+def normalize_source(source: str) -> str:
+    """
+    Canonical identity of a video source, used to coalesce duplicate work.
+
+    URLs get a lowercased scheme/host, no default port and no fragment;
+    local paths are resolved to their real path.
+    """
+    if source.startswith(("http://", "https://")):
+        parts = urllib.parse.urlsplit(source)
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        port = parts.port
+        netloc = host if port in (None, 80 if scheme == "http" else 443) else f"{host}:{port}"
+        return urllib.parse.urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+    return os.path.realpath(source)
+
 def download_video(src: Union[str, bytes]) -> Tuple[str, bool]:
     """
     Prepare or download the video.
@@ -37,6 +147,7 @@ def download_video(src: Union[str, bytes]) -> Tuple[str, bool]:
         logger.info(f"Saving video bytes to temporary file {tmp.name}")
         with open(tmp.name, "wb") as f:
             f.write(src)
+        _report("download", percent=100.0, eta=0.0)
         return tmp.name, True
 
     if isinstance(src, str):
@@ -44,7 +155,8 @@ def download_video(src: Union[str, bytes]) -> Tuple[str, bool]:
             tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4", dir=TEMP_DIR)
             logger.info(f"Downloading remote video: {src}")
             with urllib.request.urlopen(src) as resp, open(tmp.name, "wb") as out:
-                shutil.copyfileobj(resp, out)
+                total = int(resp.headers.get("Content-Length") or 0)
+                _copy_with_progress(resp, out, total, "download")
             return tmp.name, True
         elif os.path.exists(src):
             logger.info(f"Using local video: {src}")
@@ -64,21 +176,27 @@ def generate_thumbnail(
 ):
     """Generate a thumbnail from the video."""
     logger.info(f"Generating thumbnail for {video_path} at {timestamp} with size {size}")
-    subprocess.run([
-        FFMPEG_PATH, "-y", "-i", video_path,
+    run_ffmpeg([
+        "-i", video_path,
         "-ss", timestamp, "-frames:v", "1",
         "-s", size, "-q:v", str(quality),
         output_path
-    ], check=True)
+    ], stage="thumbnail")
     logger.info(f"Thumbnail saved to {output_path}")
 
 def calculate_sha256(path: str) -> str:
     """Calculate SHA256 hash of the file."""
     logger.info(f"Calculating SHA256 for {path}")
     h = hashlib.sha256()
+    total = os.path.getsize(path)
+    started = time.monotonic()
+    done = 0
     with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
             h.update(chunk)
+            done += len(chunk)
+            if total:
+                _report("hashing", percent=done * 100.0 / total, eta=_eta(done, total, started))
     return h.hexdigest()
 
 def create_metadata(
@@ -113,7 +231,8 @@ def finalize_video(
     custom_timestamp: Optional[str] = None,
     custom_size: Optional[str] = None,
     custom_quality: Optional[int] = None,
-    extra_tags: Optional[list] = None
+    extra_tags: Optional[list] = None,
+    on_progress: Optional[ProgressCallback] = None
 ) -> Dict[str, Optional[Union[str, Dict]]]:
     """
     Finalize a video:
@@ -122,6 +241,9 @@ def finalize_video(
     - Generate thumbnail (optional)
     - Create metadata (optional)
 
+    If on_progress is given it is called as on_progress(stage, fields) with
+    percent/fps/eta fields while each stage runs.
+
     Returns a dict:
     {
       "thumbnail_path": str or None,
@@ -129,11 +251,14 @@ def finalize_video(
     }
     """
     logger.info(f"Finalizing video: {source}")
-    video_path, is_temp = download_video(source)
+    token = _progress_reporter.set(on_progress)
+    video_path, is_temp = None, False
     thumb_path = None
     metadata = None
 
     try:
+        video_path, is_temp = download_video(source)
+
         if generate_thumb:
             thumb_path = os.path.splitext(video_path)[0] + "_thumb.jpg"
             generate_thumbnail(
@@ -145,6 +270,7 @@ def finalize_video(
             )
         
         if generate_meta:
+            _report("metadata")
             metadata = create_metadata(
                 video_path,
                 thumb_path=thumb_path if generate_thumb else None,
@@ -158,6 +284,7 @@ def finalize_video(
         }
 
     finally:
+        _progress_reporter.reset(token)
         if is_temp:
             logger.info(f"Cleaning up temporary video file: {video_path}")
             try:
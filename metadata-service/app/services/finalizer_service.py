@@ -1,32 +1,118 @@
 # app/services/finalizer_service.py
 
-import os
-import json
 import asyncio
-import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from app.core.minio_client import MinIOClient
+from typing import Dict, List, Any, Optional, Tuple
+from app.core.minio_client import get_minio_client
 from app.core.config import (
-    MINIO_METADATA_BUCKET, THUMBNAIL_OBJECT_PREFIX, 
-    METADATA_OBJECT_PREFIX, JOBS_OBJECT_PREFIX
+    HOSTNAME, MINIO_METADATA_BUCKET, JOBS_OBJECT_PREFIX, FINALIZER_EMBEDDED_WORKERS,
+    FINALIZER_SYNC_CONCURRENCY, FINALIZER_COALESCE_WINDOW
 )
+from app.core.logger import setup_logger
 from app.core.logging import log_streamer
-from app.services.finalizer import finalize_video
+from app.core.singleflight import SingleFlight
+from app.services.finalizer import normalize_source
+from app.services.finalizer_worker import FinalizerWorker
+from app.services.job_queue import get_job_queue
+from app.services.metadata_cache import metadata_cache
+from app.services.progress import progress_tracker, TERMINAL_STATUSES
+from app.services.search_index import search_index
+from app.services.thumbnails import thumbnail_derivatives
+
+logger = setup_logger("finalizer_service")
+
+# Shared executor for finalizations run on behalf of synchronous requests
+finalizer_executor = ThreadPoolExecutor(
+    max_workers=FINALIZER_SYNC_CONCURRENCY, thread_name_prefix="finalizer"
+)
+
+def _new_job_id() -> str:
+    return f"fin-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
 
-# Regular logger setup
-logger = logging.getLogger("finalizer_service")
-logger.setLevel(logging.INFO)
-handler = logging.StreamHandler()
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-handler.setFormatter(formatter)
-logger.addHandler(handler)
+def _split_s3_uri(uri: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(bucket, object) from an s3://bucket/object URI"""
+    if not uri or not uri.startswith("s3://"):
+        return None
+    bucket, _, object_name = uri[len("s3://"):].partition("/")
+    return (bucket, object_name) if object_name else None
 
 class FinalizerService:
     def __init__(self):
-        self.minio = MinIOClient()
-        self.pending_queue = []
+        self.minio = get_minio_client()
+        self.queue = get_job_queue()
+        self.workers: List[FinalizerWorker] = []
         self.is_running = False
+        # Normalized source -> job currently finalizing it (sync or queued)
+        self.active_sources: Dict[str, str] = {}
+        self.flights = SingleFlight()
+        self._sync_worker: Optional[FinalizerWorker] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _active_job(self, key: str) -> Optional[str]:
+        """Return the job still working on a source, forgetting finished ones"""
+        job_id = self.active_sources.get(key)
+        if job_id is None:
+            return None
+        state = progress_tracker.get(job_id)
+        if (
+            state is None
+            or state["status"] in TERMINAL_STATUSES
+            or time.time() - state["updated_at"] > FINALIZER_COALESCE_WINDOW
+        ):
+            self.active_sources.pop(key, None)
+            return None
+        return job_id
+    
+    async def finalize_now(self, source: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Finalize a source and wait for the result.
+        
+        Concurrent calls for the same source share one run; if a queued job is
+        already working on it, its result is awaited instead.
+        """
+        key = normalize_source(source)
+        job_id = self._active_job(key)
+        if job_id is not None and not self.flights.in_flight(key):
+            logger.info(f"Attaching to in-flight job {job_id} for {source}")
+            try:
+                state = await progress_tracker.wait(job_id, idle_timeout=FINALIZER_COALESCE_WINDOW)
+            except asyncio.TimeoutError:
+                raise RuntimeError(
+                    f"Job {job_id} reported no progress for {FINALIZER_COALESCE_WINDOW}s"
+                ) from None
+            return {"job_id": job_id, **state}
+        return await self.flights.do(key, lambda: self._run_now(key, source, metadata or {}))
+    
+    async def _run_now(self, key: str, source: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        if self._sync_worker is None:
+            self._sync_worker = FinalizerWorker(
+                queue=self.queue, worker_id=f"{HOSTNAME}-sync", progress=progress_tracker
+            )
+        
+        job_id = _new_job_id()
+        job = {
+            "job_id": job_id,
+            "source": source,
+            "metadata": metadata,
+            "status": "queued",
+            "created_at": datetime.utcnow().isoformat()
+        }
+        self.active_sources[key] = job_id
+        progress_tracker.update(job_id, "queued", status="queued", force=True)
+        try:
+            loop = asyncio.get_running_loop()
+            job = await loop.run_in_executor(finalizer_executor, self._sync_worker.process_job, job)
+            if job["status"] == "completed":
+                await self._outputs_changed(job["results"])
+            return job
+        finally:
+            if self.active_sources.get(key) == job_id:
+                del self.active_sources[key]
     
     async def start(self):
         """Start the finalizer service"""
@@ -35,22 +121,65 @@ class FinalizerService:
             return
         
         self.is_running = True
-        msg = "Finalizer service started"
+        self._loop = asyncio.get_running_loop()
+        progress_tracker.bind_loop(self._loop)
+        
+        # Live progress from every worker (local or remote) arrives on the status channel
+        self.queue.subscribe_status(self._on_status)
+        
+        # Embedded workers keep a single-node deployment self-sufficient
+        for i in range(FINALIZER_EMBEDDED_WORKERS):
+            worker = FinalizerWorker(queue=get_job_queue(), worker_id=f"{HOSTNAME}-embedded-{i}")
+            threading.Thread(target=worker.run, name=f"finalizer-worker-{i}", daemon=True).start()
+            self.workers.append(worker)
+        
+        msg = f"Finalizer service started with {len(self.workers)} embedded worker(s)"
         logger.info(msg)
         log_streamer.info(msg)
-        
-        asyncio.create_task(self._process_queue())
+    
+    def _on_status(self, state: Dict[str, Any]):
+        """Apply a worker's status; completed jobs get their outputs refreshed in this process"""
+        progress_tracker.apply(state)
+        if state.get("status") == "completed" and state.get("results") and self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._outputs_changed(state["results"]), self._loop)
+    
+    async def _outputs_changed(self, results: Dict[str, Any]):
+        """Re-index a finished job's metadata and drop derivatives of the thumbnail it replaced"""
+        try:
+            thumbnail = _split_s3_uri(results.get("thumbnail"))
+            if thumbnail:
+                await self.minio.aio.run(
+                    thumbnail_derivatives.invalidate, self.minio, os.path.basename(thumbnail[1])
+                )
+            metadata = _split_s3_uri(results.get("metadata"))
+            if metadata:
+                await self.minio.aio.run(search_index.refresh, self.minio, *metadata)
+        except Exception as e:
+            logger.warning(f"Failed to refresh outputs of a finished job: {e}")
     
     async def stop(self):
         """Stop the finalizer service"""
         self.is_running = False
+        for worker in self.workers:
+            worker.stop()
+        self.workers.clear()
+        self.queue.close()
         msg = "Finalizer service stopped"
         logger.info(msg)
         log_streamer.info(msg)
     
     async def queue_finalization(self, source: str, metadata: Dict[str, Any]) -> str:
-        """Add a video to the finalization queue"""
-        job_id = f"fin-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+        """Publish a video to the finalizer job queue, reusing an in-flight job for the same source"""
+        key = normalize_source(source)
+        existing = self._active_job(key)
+        if existing is not None:
+            msg = f"Finalization of {source} already in flight as job {existing}"
+            logger.info(msg)
+            log_streamer.info(msg)
+            return existing
+        
+        job_id = _new_job_id()
+        self.active_sources[key] = job_id
         
         job = {
             "job_id": job_id,
@@ -60,123 +189,39 @@ class FinalizerService:
             "created_at": datetime.utcnow().isoformat()
         }
         
-        self.pending_queue.append(job)
-        
         # Save job to MinIO using the proper job prefix
         job_key = f"{JOBS_OBJECT_PREFIX}{job_id}.json"
-        self.minio.upload_json(
+        await self.minio.aio.run(
+            metadata_cache.put_json,
+            self.minio,
             bucket_name=MINIO_METADATA_BUCKET,
             object_name=job_key,
             data=job
         )
         
+        # Hand the job to whichever worker is free
+        progress_tracker.update(job_id, "queued", status="queued", force=True)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self.queue.publish, job)
+        except Exception:
+            self.active_sources.pop(key, None)
+            progress_tracker.finish(job_id, "failed", error="Failed to publish job")
+            raise
+        
         msg = f"Queued finalization job {job_id} for {source}"
         logger.info(msg)
         log_streamer.info(msg)
         
         return job_id
     
-    async def _process_queue(self):
-        """Process the finalization queue"""
-        while self.is_running:
-            if not self.pending_queue:
-                await asyncio.sleep(5)
-                continue
-            
-            job = self.pending_queue.pop(0)
-            await self._process_job(job)
-    
-    async def _process_job(self, job: Dict[str, Any]):
-        """Process a single finalization job"""
-        job_id = job["job_id"]
-        source = job["source"]
-        
-        try:
-            msg = f"Processing finalization job {job_id} for {source}"
-            logger.info(msg)
-            log_streamer.info(msg)
-            
-            # Update job status
-            job["status"] = "processing"
-            job["updated_at"] = datetime.utcnow().isoformat()
-            job_key = f"{JOBS_OBJECT_PREFIX}{job_id}.json"
-            self.minio.upload_json(
-                bucket_name=MINIO_METADATA_BUCKET,
-                object_name=job_key,
-                data=job
-            )
-            
-            # Perform finalization (run in thread pool to not block event loop)
-            loop = asyncio.get_event_loop()
-            thumb_path, metadata = await loop.run_in_executor(
-                None, lambda: finalize_video(source)
-            )
-            
-            # Merge with provided metadata
-            metadata.update(job["metadata"])
-            
-            # Upload thumbnail and metadata to the correct paths
-            base_name = os.path.basename(thumb_path)
-            file_name = os.path.splitext(base_name)[0]
-            
-            thumb_key = f"{THUMBNAIL_OBJECT_PREFIX}{base_name}"
-            meta_key = f"{METADATA_OBJECT_PREFIX}{file_name}.json"
-            
-            with open(thumb_path, "rb") as f:
-                self.minio.upload_file(
-                    bucket_name=MINIO_METADATA_BUCKET,
-                    object_name=thumb_key,
-                    file_data=f,
-                    content_type="image/jpeg"
-                )
-            
-            self.minio.upload_json(
-                bucket_name=MINIO_METADATA_BUCKET,
-                object_name=meta_key,
-                data=metadata
-            )
-            
-            # Update job status
-            job["status"] = "completed"
-            job["results"] = {
-                "thumbnail": f"s3://{MINIO_METADATA_BUCKET}/{thumb_key}",
-                "metadata": f"s3://{MINIO_METADATA_BUCKET}/{meta_key}"
-            }
-            job["completed_at"] = datetime.utcnow().isoformat()
-            
-            self.minio.upload_json(
-                bucket_name=MINIO_METADATA_BUCKET,
-                object_name=job_key,
-                data=job
-            )
-            
-            msg = f"Completed finalization job {job_id}"
-            logger.info(msg)
-            log_streamer.info(msg)
-            
-            # Clean up temporary files
-            if os.path.exists(thumb_path):
-                os.unlink(thumb_path)
-                
-        except Exception as e:
-            error_msg = f"Error processing job {job_id}: {str(e)}"
-            logger.error(error_msg)
-            log_streamer.error(error_msg)
-            
-            job["status"] = "failed"
-            job["error"] = str(e)
-            job["updated_at"] = datetime.utcnow().isoformat()
-            self.minio.upload_json(
-                bucket_name=MINIO_METADATA_BUCKET,
-                object_name=job_key,
-                data=job
-            )
-    
     async def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Get the status of a finalization job"""
         try:
             job_key = f"{JOBS_OBJECT_PREFIX}{job_id}.json"
-            data = self.minio.download_json(
+            data = await self.minio.aio.run(
+                metadata_cache.get_json,
+                self.minio,
                 bucket_name=MINIO_METADATA_BUCKET,
                 object_name=job_key
             )
@@ -187,30 +232,55 @@ class FinalizerService:
             log_streamer.error(error_msg)
             return None
     
-    async def list_jobs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
-        """List finalization jobs"""
+    async def list_jobs(
+        self,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        start_after: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List finalization jobs, walking the job prefix lazily.
+        
+        Returns up to `limit` jobs and the object name to resume after when
+        more may remain.
+        """
         try:
-            objects = self.minio.list_objects(
-                bucket_name=MINIO_METADATA_BUCKET,
-                prefix=JOBS_OBJECT_PREFIX
-            )
-            
-            jobs = []
-            for obj in objects:
-                job_data = self.minio.download_json(
-                    bucket_name=MINIO_METADATA_BUCKET,
-                    object_name=obj["name"]
-                )
-                
-                if job_data and (status is None or job_data.get("status") == status):
-                    jobs.append(job_data)
-            
-            return jobs
+            return await self.minio.aio.run(self._collect_jobs, status, limit, start_after)
         except Exception as e:
             error_msg = f"Error listing jobs: {str(e)}"
             logger.error(error_msg)
             log_streamer.error(error_msg)
-            return []
+            return [], None
+    
+    def _collect_jobs(
+        self,
+        status: Optional[str],
+        limit: Optional[int],
+        start_after: Optional[str]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        jobs = []
+        last_name = None
+        for obj in self.minio.iter_objects(
+            bucket_name=MINIO_METADATA_BUCKET,
+            prefix=JOBS_OBJECT_PREFIX,
+            start_after=start_after
+        ):
+            if limit is not None and len(jobs) >= limit:
+                return jobs, last_name
+            last_name = obj["name"]
+            if not last_name.endswith(".json"):
+                continue
+            
+            job_data = metadata_cache.get_json(
+                self.minio,
+                bucket_name=MINIO_METADATA_BUCKET,
+                object_name=last_name
+            )
+            
+            if job_data and (status is None or job_data.get("status") == status):
+                jobs.append(job_data)
+        
+        return jobs, None
 
 # Singleton instance
 finalizer_service = FinalizerService()
\ No newline at end of file
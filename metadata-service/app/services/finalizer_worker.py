@@ -0,0 +1,166 @@
+# app/services/finalizer_worker.py
+
+"""
+Standalone finalizer worker.
+
+Pulls jobs from the finalizer job queue, runs finalize_video on them and
+reports status back (job documents in MinIO, live progress on the status
+exchange). Search indexing and thumbnail derivatives belong to the API
+process, which refreshes them when it sees a job complete. Run as many
+as you have nodes:
+
+    RABBITMQ_HOST=<control-node> MINIO_ENDPOINT=<control-node>:9000 \\
+        python -m app.services.finalizer_worker
+"""
+
+import os
+import signal
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.minio_client import get_minio_client
+from app.core.config import (
+    HOSTNAME, MINIO_METADATA_BUCKET, THUMBNAIL_OBJECT_PREFIX,
+    METADATA_OBJECT_PREFIX, JOBS_OBJECT_PREFIX, FINALIZER_MAX_ATTEMPTS
+)
+from app.core.logger import setup_logger
+from app.services.finalizer import finalize_video
+from app.services.job_queue import get_job_queue
+from app.services.metadata_cache import metadata_cache
+from app.services.progress import ProgressTracker
+
+logger = setup_logger("finalizer_worker")
+
+class RelayedProgressTracker(ProgressTracker):
+    """Progress tracker that publishes its (coalesced) updates to the job queue"""
+
+    def __init__(self, queue):
+        super().__init__()
+        self.queue = queue
+
+    def _dispatch(self, job_id: str, state: Dict[str, Any], terminal: bool):
+        try:
+            self.queue.publish_status(state)
+        except Exception as e:
+            logger.warning(f"Failed to relay progress for {job_id}: {e}")
+
+class FinalizerWorker:
+    def __init__(self, queue=None, worker_id: Optional[str] = None, progress: Optional[ProgressTracker] = None):
+        self.queue = queue or get_job_queue()
+        self.minio = get_minio_client()
+        self.worker_id = worker_id or f"{HOSTNAME}-{os.getpid()}"
+        self.progress = progress or RelayedProgressTracker(self.queue)
+        self._stop = threading.Event()
+
+    def run(self):
+        """Consume jobs until stopped"""
+        logger.info(f"Finalizer worker {self.worker_id} started")
+        self.queue.consume(self.process_job, self._stop)
+        logger.info(f"Finalizer worker {self.worker_id} stopped")
+
+    def stop(self):
+        self._stop.set()
+
+    def _save_job(self, job: Dict[str, Any]):
+        metadata_cache.put_json(
+            self.minio,
+            bucket_name=MINIO_METADATA_BUCKET,
+            object_name=f"{JOBS_OBJECT_PREFIX}{job['job_id']}.json",
+            data=job
+        )
+
+    def process_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Process a single finalization job, returning the updated job document"""
+        job_id = job["job_id"]
+        source = job["source"]
+        redelivered = job.pop("redelivered", False)
+
+        try:
+            # Redelivered jobs carry their attempt count in the stored document
+            if redelivered:
+                stored = self.minio.download_json(
+                    bucket_name=MINIO_METADATA_BUCKET,
+                    object_name=f"{JOBS_OBJECT_PREFIX}{job_id}.json"
+                ) or {}
+                job["attempts"] = stored.get("attempts", job.get("attempts", 0))
+            job["attempts"] = job.get("attempts", 0) + 1
+
+            if job["attempts"] > FINALIZER_MAX_ATTEMPTS:
+                raise RuntimeError(f"Giving up after {FINALIZER_MAX_ATTEMPTS} attempts")
+
+            logger.info(f"Worker {self.worker_id} processing job {job_id} for {source} (attempt {job['attempts']})")
+            job["status"] = "processing"
+            job["worker"] = self.worker_id
+            job["updated_at"] = datetime.utcnow().isoformat()
+            self._save_job(job)
+            self.progress.update(job_id, "starting", force=True, worker=self.worker_id)
+
+            def report(stage: str, fields: Dict[str, Any]):
+                self.progress.update(job_id, stage, worker=self.worker_id, **fields)
+
+            result = finalize_video(source, on_progress=report)
+            thumb_path = result["thumbnail_path"]
+            metadata = result["metadata"]
+
+            # Merge with provided metadata
+            metadata.update(job["metadata"])
+            self.progress.update(job_id, "uploading", force=True, worker=self.worker_id)
+
+            # Upload thumbnail and metadata to the correct paths
+            base_name = os.path.basename(thumb_path)
+            file_name = os.path.splitext(base_name)[0]
+
+            thumb_key = f"{THUMBNAIL_OBJECT_PREFIX}{base_name}"
+            meta_key = f"{METADATA_OBJECT_PREFIX}{file_name}.json"
+
+            with open(thumb_path, "rb") as f:
+                self.minio.upload_file(
+                    bucket_name=MINIO_METADATA_BUCKET,
+                    object_name=thumb_key,
+                    file_data=f,
+                    content_type="image/jpeg"
+                )
+            metadata_cache.put_json(
+                self.minio,
+                bucket_name=MINIO_METADATA_BUCKET,
+                object_name=meta_key,
+                data=metadata
+            )
+
+            # Update job status
+            job["status"] = "completed"
+            job["results"] = {
+                "thumbnail": f"s3://{MINIO_METADATA_BUCKET}/{thumb_key}",
+                "metadata": f"s3://{MINIO_METADATA_BUCKET}/{meta_key}"
+            }
+            job["completed_at"] = datetime.utcnow().isoformat()
+            self._save_job(job)
+            self.progress.finish(job_id, "completed", results=job["results"], worker=self.worker_id)
+            logger.info(f"Completed finalization job {job_id}")
+
+            # Clean up temporary files
+            if os.path.exists(thumb_path):
+                os.unlink(thumb_path)
+
+        except Exception as e:
+            logger.error(f"Error processing job {job_id}: {str(e)}")
+            self.progress.finish(job_id, "failed", error=str(e), worker=self.worker_id)
+            job["status"] = "failed"
+            job["error"] = str(e)
+            job["updated_at"] = datetime.utcnow().isoformat()
+            try:
+                self._save_job(job)
+            except Exception as save_error:
+                logger.error(f"Failed to record failure of job {job_id}: {save_error}")
+
+        return job
+
+def main():
+    worker = FinalizerWorker()
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    worker.run()
+
+if __name__ == "__main__":
+    main()
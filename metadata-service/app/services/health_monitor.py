@@ -0,0 +1,218 @@
+# app/services/health_monitor.py
+
+"""
+Component health, probed in the background.
+
+Every HEALTH_PROBE_INTERVAL seconds the probes run concurrently, each
+bounded by HEALTH_PROBE_TIMEOUT, and the results are cached with their
+latency and the time each component last changed status. /health answers
+from the cache; a fresh check joins the round already in flight, if any,
+rather than starting another.
+
+Deep checks, such as the synthetic stream probe, are too slow and heavy
+for every round; they run only when a request asks for them, with their
+own timeout, and are reported only in that request's answer.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import pika
+
+from app.core.config import (
+    HEALTH_PROBE_INTERVAL, HEALTH_PROBE_TIMEOUT, HEALTH_MAX_AGE, STREAM_PROBE_TIMEOUT,
+    RABBITMQ_HOST, RABBITMQ_PORT, RABBITMQ_USER, RABBITMQ_PASS, RABBITMQ_VHOST
+)
+from app.core.docker_api import DockerAPI
+from app.core.logger import setup_logger
+from app.core.minio_client import get_minio_client
+from app.core.singleflight import SingleFlight
+from app.services.stream_probe import stream_probe
+
+logger = setup_logger("health_monitor")
+
+# A probe raises, or returns False, when its component is unhealthy. A dict
+# result is kept as the component's detail, and its "ok"/"error" keys count.
+Probe = Callable[[], Awaitable[Any]]
+
+class ComponentHealth:
+    def __init__(self, name: str):
+        self.name = name
+        self.status = "unknown"
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.changed_at: Optional[float] = None
+        self.detail: Optional[Dict[str, Any]] = None
+
+    def update(self, healthy: bool, latency_ms: float, error: Optional[str], now: float,
+               detail: Optional[Dict[str, Any]] = None) -> bool:
+        """Record a probe result; True if the status changed"""
+        status = "healthy" if healthy else "unhealthy"
+        changed = status != self.status
+        if changed:
+            self.status = status
+            self.changed_at = now
+        self.latency_ms = round(latency_ms, 2)
+        self.error = error
+        self.checked_at = now
+        self.detail = detail
+        return changed
+
+    def to_dict(self) -> Dict[str, Any]:
+        health = {
+            "status": self.status,
+            "latency_ms": self.latency_ms,
+            "error": self.error,
+            "checked_at": self.checked_at,
+            "changed_at": self.changed_at
+        }
+        if self.detail is not None:
+            health["detail"] = self.detail
+        return health
+
+class HealthMonitor:
+    def __init__(
+        self,
+        probes: Dict[str, Probe],
+        deep_probes: Optional[Dict[str, Tuple[Probe, float]]] = None,
+        interval: float = HEALTH_PROBE_INTERVAL,
+        timeout: float = HEALTH_PROBE_TIMEOUT,
+        max_age: float = HEALTH_MAX_AGE
+    ):
+        self.probes = probes
+        self.interval = interval
+        self.timeout = timeout
+        self.max_age = max_age
+        self.components = {name: ComponentHealth(name) for name in probes}
+        # Name -> (probe, timeout)
+        self.deep_probes = deep_probes or {}
+        self.deep_components = {name: ComponentHealth(name) for name in self.deep_probes}
+        self.checked_at: Optional[float] = None
+        self.rounds = 0
+        self._flight = SingleFlight()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _probe_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Health probe round failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self):
+        """Probe every component now, or wait for the round already running"""
+        await self._flight.do("round", self._round)
+
+    async def _round(self):
+        await self._probe_all(self.probes, self.timeout, self.components)
+        self.checked_at = time.time()
+        self.rounds += 1
+
+    async def _deep_round(self):
+        await asyncio.gather(*(
+            self._probe_all({name: probe}, timeout, self.deep_components)
+            for name, (probe, timeout) in self.deep_probes.items()
+        ))
+
+    async def _probe_all(self, probes: Dict[str, Probe], timeout: float, components: Dict[str, ComponentHealth]):
+        results = await asyncio.gather(*(self._probe(name, probe, timeout) for name, probe in probes.items()))
+        now = time.time()
+        for name, healthy, latency_ms, error, detail in results:
+            component = components[name]
+            previous = component.status
+            if component.update(healthy, latency_ms, error, now, detail):
+                if healthy:
+                    logger.info("%s is healthy (was %s)", name, previous)
+                else:
+                    logger.warning("%s is unhealthy: %s", name, error)
+
+    async def _probe(self, name: str, probe: Probe,
+                     timeout: float) -> Tuple[str, bool, float, Optional[str], Optional[Dict[str, Any]]]:
+        started = time.perf_counter()
+        detail = None
+        try:
+            result = await asyncio.wait_for(probe(), timeout)
+            if isinstance(result, dict):
+                detail = result
+                healthy, error = bool(result.get("ok", True)), result.get("error")
+            else:
+                healthy = result is not False
+                error = None if healthy else "probe failed"
+        except asyncio.TimeoutError:
+            healthy, error = False, f"no answer within {timeout:g}s"
+        except Exception as e:
+            healthy, error = False, str(e) or type(e).__name__
+        return name, healthy, (time.perf_counter() - started) * 1000, error, detail
+
+    async def check(self, fresh: bool = False, deep: bool = False) -> Dict[str, Any]:
+        """The cached health, probing first if asked to or if the cache is missing or too old"""
+        pending = []
+        if fresh or self.checked_at is None or time.time() - self.checked_at > self.max_age:
+            pending.append(self.refresh())
+        if deep and self.deep_probes:
+            pending.append(self._flight.do("deep", self._deep_round))
+        await asyncio.gather(*pending)
+        return self.snapshot(deep)
+
+    def snapshot(self, deep: bool = False) -> Dict[str, Any]:
+        components = dict(self.components)
+        if deep:
+            components.update(self.deep_components)
+        healthy = all(component.status == "healthy" for component in components.values())
+        return {
+            "status": "healthy" if healthy else "degraded",
+            "checked_at": self.checked_at,
+            "age_seconds": round(time.time() - self.checked_at, 3) if self.checked_at else None,
+            "components": {
+                "api": {"status": "healthy"},
+                **{name: component.to_dict() for name, component in components.items()}
+            }
+        }
+
+def _rabbitmq_connect(timeout: float):
+    credentials = pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS)
+    parameters = pika.ConnectionParameters(
+        host=RABBITMQ_HOST,
+        port=RABBITMQ_PORT,
+        virtual_host=RABBITMQ_VHOST,
+        credentials=credentials,
+        connection_attempts=1,
+        socket_timeout=timeout,
+        stack_timeout=timeout,
+        blocked_connection_timeout=timeout
+    )
+    pika.BlockingConnection(parameters).close()
+
+async def probe_rabbitmq():
+    # pika blocks; its own timeouts bound the thread once wait_for gives up on it
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, _rabbitmq_connect, HEALTH_PROBE_TIMEOUT)
+
+async def probe_docker():
+    return await DockerAPI(timeout=HEALTH_PROBE_TIMEOUT).ping()
+
+async def probe_minio():
+    minio = get_minio_client()
+    await minio.aio.run(minio.client.list_buckets)
+
+def default_probes() -> Dict[str, Probe]:
+    return {"rabbitmq": probe_rabbitmq, "docker": probe_docker, "minio": probe_minio}
+
+def default_deep_probes() -> Dict[str, Tuple[Probe, float]]:
+    # The stream probe bounds its own wait; the margin covers stopping ffmpeg and the hook grace period
+    return {"stream": (stream_probe.run, STREAM_PROBE_TIMEOUT + 10)}
+
+# Singleton instance
+health_monitor = HealthMonitor(default_probes(), default_deep_probes())
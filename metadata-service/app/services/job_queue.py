@@ -0,0 +1,291 @@
+# app/services/job_queue.py
+
+"""
+Work queue backends for finalizer jobs.
+
+Both backends hand each worker one job at a time (prefetch=1) and only
+acknowledge it once the worker is done, so a worker that dies or stops
+heartbeating has its job redelivered to another worker.
+
+RabbitMQ also redelivers a job whose delivery stays unacked longer than its
+`consumer_timeout` (30 minutes by default), even if the worker is alive and
+still running it. event-broker/config/rabbitmq.conf raises it to 6 hours;
+keep it above the longest finalization, or a long job runs twice.
+
+- RabbitMQJobQueue: the durable `finalizer_jobs` queue on RabbitMQ.
+- LocalJobQueue: a stand-in broker served over a multiprocessing manager,
+  for running several local worker processes without RabbitMQ:
+
+    python -m app.services.job_queue serve
+    FINALIZER_QUEUE_BACKEND=local python -m app.services.finalizer_worker
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from multiprocessing.managers import BaseManager
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import (
+    QUEUE_FINALIZER_JOBS, EXCHANGE_FINALIZER_STATUS,
+    FINALIZER_QUEUE_BACKEND, FINALIZER_LOCAL_BROKER, FINALIZER_LOCAL_BROKER_AUTHKEY,
+    FINALIZER_WORKER_HEARTBEAT
+)
+from app.core.logger import setup_logger
+from app.services.rabbitmq_service import get_rabbitmq_connection, FanoutPublisher, FanoutSubscriber
+import pika
+
+logger = setup_logger("job_queue")
+
+JobHandler = Callable[[Dict[str, Any]], None]
+StatusCallback = Callable[[Dict[str, Any]], None]
+
+class RabbitMQJobQueue:
+    """Finalizer jobs on a durable RabbitMQ queue with fair dispatch"""
+
+    def __init__(self, queue: str = QUEUE_FINALIZER_JOBS, heartbeat: int = FINALIZER_WORKER_HEARTBEAT):
+        self.queue = queue
+        self.heartbeat = heartbeat
+        self._publisher = None
+        self._status_publisher = None
+        self._status_subscriber = None
+        self._lock = threading.Lock()
+
+    def publish(self, job: Dict[str, Any]):
+        """Publish a job; raises if the broker is unreachable"""
+        body = json.dumps(job, default=str)
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    if self._publisher is None or self._publisher.is_closed:
+                        self._publisher = get_rabbitmq_connection()
+                    channel = self._publisher.channel()
+                    channel.queue_declare(queue=self.queue, durable=True)
+                    channel.basic_publish(
+                        exchange="",
+                        routing_key=self.queue,
+                        body=body,
+                        properties=pika.BasicProperties(delivery_mode=2, content_type="application/json")
+                    )
+                    channel.close()
+                    return
+                except Exception:
+                    self._publisher = None
+                    if attempt == 2:
+                        raise
+
+    def consume(self, handler: JobHandler, stop: threading.Event):
+        """Process jobs one at a time until stop is set, reconnecting on failure"""
+        while not stop.is_set():
+            try:
+                connection = get_rabbitmq_connection(heartbeat=self.heartbeat)
+                channel = connection.channel()
+                channel.queue_declare(queue=self.queue, durable=True)
+                channel.basic_qos(prefetch_count=1)
+
+                for method, _props, body in channel.consume(self.queue, inactivity_timeout=1):
+                    if stop.is_set():
+                        break
+                    if method is None:
+                        continue
+
+                    job = json.loads(body)
+                    job["redelivered"] = bool(method.redelivered)
+                    runner = threading.Thread(target=handler, args=(job,), daemon=True)
+                    runner.start()
+                    # Keep servicing heartbeats while the job runs; a dead or
+                    # partitioned worker gets its job redelivered by the broker
+                    started = time.monotonic()
+                    while runner.is_alive():
+                        connection.sleep(1.0)
+                    if channel.is_closed:
+                        # Most likely the broker's consumer_timeout: the job has been redelivered
+                        logger.error("Channel closed after %.0fs while job %s ran; it will be run again",
+                                     time.monotonic() - started, job.get("job_id"))
+                        break
+                    channel.basic_ack(method.delivery_tag)
+
+                channel.cancel()
+                connection.close()
+            except Exception as e:
+                logger.warning(f"Job consumer connection lost: {e}")
+                stop.wait(5)
+
+    def publish_status(self, state: Dict[str, Any]):
+        if self._status_publisher is None:
+            self._status_publisher = FanoutPublisher(EXCHANGE_FINALIZER_STATUS)
+        self._status_publisher.publish(state)
+
+    def subscribe_status(self, callback: StatusCallback):
+        self._status_subscriber = FanoutSubscriber(EXCHANGE_FINALIZER_STATUS, callback)
+        self._status_subscriber.start()
+
+    def close(self):
+        if self._status_subscriber is not None:
+            self._status_subscriber.stop()
+        if self._status_publisher is not None:
+            self._status_publisher.close()
+        with self._lock:
+            if self._publisher is not None and self._publisher.is_open:
+                self._publisher.close()
+            self._publisher = None
+
+class StandinBroker:
+    """
+    In-memory broker with RabbitMQ-like delivery semantics.
+
+    Deliveries are leased to a worker; leases are extended by heartbeats and
+    requeued (marked redelivered) when a worker stops heartbeating.
+    """
+
+    def __init__(self, lease_seconds: float = FINALIZER_WORKER_HEARTBEAT * 2):
+        self.lease_seconds = lease_seconds
+        self._ready: Deque[Tuple[str, bool]] = deque()
+        self._unacked: Dict[int, Tuple[str, str, float]] = {}
+        self._statuses: List[Dict[str, Any]] = []
+        self._status_base = 0
+        self._next_tag = 1
+        self._lock = threading.Lock()
+
+    def publish(self, body: str):
+        with self._lock:
+            self._ready.append((body, False))
+
+    def get(self, worker_id: str) -> Optional[Tuple[int, str, bool]]:
+        with self._lock:
+            self._requeue_expired(time.monotonic())
+            if not self._ready:
+                return None
+            body, redelivered = self._ready.popleft()
+            tag = self._next_tag
+            self._next_tag += 1
+            self._unacked[tag] = (body, worker_id, time.monotonic() + self.lease_seconds)
+            return tag, body, redelivered
+
+    def heartbeat(self, worker_id: str):
+        deadline = time.monotonic() + self.lease_seconds
+        with self._lock:
+            for tag, (body, owner, _) in list(self._unacked.items()):
+                if owner == worker_id:
+                    self._unacked[tag] = (body, owner, deadline)
+
+    def ack(self, tag: int):
+        with self._lock:
+            self._unacked.pop(tag, None)
+
+    def publish_status(self, state: Dict[str, Any]):
+        with self._lock:
+            self._statuses.append(state)
+            # Keep a bounded backlog for late pollers
+            if len(self._statuses) > 10000:
+                drop = len(self._statuses) - 10000
+                del self._statuses[:drop]
+                self._status_base += drop
+
+    def statuses(self, since: int) -> Tuple[int, List[Dict[str, Any]]]:
+        with self._lock:
+            start = max(since - self._status_base, 0)
+            return self._status_base + len(self._statuses), self._statuses[start:]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"ready": len(self._ready), "unacked": len(self._unacked)}
+
+    def _requeue_expired(self, now: float):
+        for tag, (body, owner, deadline) in list(self._unacked.items()):
+            if deadline < now:
+                logger.warning(f"Worker {owner} missed its heartbeat, requeueing delivery {tag}")
+                del self._unacked[tag]
+                self._ready.appendleft((body, True))
+
+class _BrokerManager(BaseManager):
+    pass
+
+def _broker_address() -> Tuple[str, int]:
+    host, _, port = FINALIZER_LOCAL_BROKER.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def serve_standin_broker():
+    """Serve a StandinBroker until interrupted"""
+    broker = StandinBroker()
+    _BrokerManager.register("broker", callable=lambda: broker)
+    manager = _BrokerManager(address=_broker_address(), authkey=FINALIZER_LOCAL_BROKER_AUTHKEY.encode())
+    logger.info(f"Stand-in finalizer broker listening on {FINALIZER_LOCAL_BROKER}")
+    manager.get_server().serve_forever()
+
+class LocalJobQueue:
+    """Client of the stand-in broker, mirroring RabbitMQJobQueue"""
+
+    def __init__(self, heartbeat: int = FINALIZER_WORKER_HEARTBEAT):
+        self.heartbeat = heartbeat
+        self.worker_id = f"{os.uname().nodename}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._broker = None
+        self._status_thread: Optional[threading.Thread] = None
+        self._stop_status = threading.Event()
+
+    @property
+    def broker(self):
+        if self._broker is None:
+            _BrokerManager.register("broker")
+            manager = _BrokerManager(address=_broker_address(), authkey=FINALIZER_LOCAL_BROKER_AUTHKEY.encode())
+            manager.connect()
+            self._broker = manager.broker()
+        return self._broker
+
+    def publish(self, job: Dict[str, Any]):
+        self.broker.publish(json.dumps(job, default=str))
+
+    def consume(self, handler: JobHandler, stop: threading.Event):
+        while not stop.is_set():
+            delivery = self.broker.get(self.worker_id)
+            if delivery is None:
+                stop.wait(0.5)
+                continue
+
+            tag, body, redelivered = delivery
+            job = json.loads(body)
+            job["redelivered"] = redelivered
+            runner = threading.Thread(target=handler, args=(job,), daemon=True)
+            runner.start()
+            while runner.is_alive():
+                self.broker.heartbeat(self.worker_id)
+                runner.join(timeout=max(self.heartbeat / 3, 0.1))
+            self.broker.ack(tag)
+
+    def publish_status(self, state: Dict[str, Any]):
+        self.broker.publish_status(state)
+
+    def subscribe_status(self, callback: StatusCallback):
+        def poll():
+            cursor, _ = self.broker.statuses(sys.maxsize)
+            while not self._stop_status.is_set():
+                try:
+                    cursor, states = self.broker.statuses(cursor)
+                    for state in states:
+                        callback(state)
+                except Exception as e:
+                    logger.warning(f"Status poll failed: {e}")
+                self._stop_status.wait(0.2)
+
+        self._status_thread = threading.Thread(target=poll, name="finalizer-status", daemon=True)
+        self._status_thread.start()
+
+    def close(self):
+        self._stop_status.set()
+
+def get_job_queue():
+    """Create the configured finalizer job queue backend"""
+    if FINALIZER_QUEUE_BACKEND == "local":
+        return LocalJobQueue()
+    return RabbitMQJobQueue()
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["serve"]:
+        serve_standin_broker()
+    else:
+        print("usage: python -m app.services.job_queue serve")
+        sys.exit(2)
@@ -0,0 +1,107 @@
+# app/services/listing.py
+
+"""Cursor pagination, NDJSON streaming and cached prefix summaries for object listings"""
+
+import base64
+import binascii
+import json
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import PREFIX_SUMMARY_TTL, PREFIX_SUMMARY_MAX_ENTRIES
+from app.core.logger import setup_logger
+from app.core.minio_client import MinIOClient
+from app.core.singleflight import SingleFlight
+
+logger = setup_logger("listing")
+
+NDJSON_BATCH = 100
+
+def encode_cursor(object_name: str) -> str:
+    """Opaque continuation token for the listing position after object_name"""
+    return base64.urlsafe_b64encode(object_name.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> str:
+    """Object name a continuation token resumes after; raises ValueError if malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.b64decode(padded.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def ndjson_objects(
+    minio: MinIOClient,
+    bucket_name: str,
+    prefix: str = "",
+    start_after: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Iterator[bytes]:
+    """Yield objects as newline-delimited JSON while MinIO pages through the listing"""
+    lines = []
+    count = 0
+    try:
+        for obj in minio.iter_objects(bucket_name, prefix, start_after=start_after):
+            lines.append(json.dumps(obj, default=str))
+            count += 1
+            if len(lines) >= NDJSON_BATCH:
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+                lines = []
+            if limit is not None and count >= limit:
+                break
+    except Exception as e:
+        # Headers are already sent; report the failure in-band
+        logger.error(f"Streaming listing of {bucket_name}/{prefix} failed: {e}")
+        lines.append(json.dumps({"error": str(e)}))
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+class PrefixSummaries:
+    """Cached object counts and total sizes per bucket prefix"""
+
+    def __init__(self, ttl: float = PREFIX_SUMMARY_TTL, max_entries: int = PREFIX_SUMMARY_MAX_ENTRIES):
+        # Every entry has size 1, so the byte bound acts as an entry bound
+        self.cache = LRUCache(max_bytes=max_entries, ttl=ttl)
+        self.flights = SingleFlight()
+
+    async def get(self, minio: MinIOClient, bucket_name: str, prefix: str = "", fresh: bool = False) -> Dict[str, Any]:
+        """Summarize a prefix, walking the bucket only on a cache miss"""
+        key = (bucket_name, prefix)
+        if not fresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return {**cached, "cached": True}
+
+        async def compute():
+            summary = await minio.aio.run(self._walk, minio, bucket_name, prefix)
+            self.cache.set(key, summary, 1)
+            return summary
+
+        summary = await self.flights.do(key, compute)
+        return {**summary, "cached": False}
+
+    def _walk(self, minio: MinIOClient, bucket_name: str, prefix: str) -> Dict[str, Any]:
+        count = 0
+        total_size = 0
+        for obj in minio.iter_objects(bucket_name, prefix):
+            count += 1
+            total_size += obj["size"] or 0
+        return {
+            "bucket": bucket_name,
+            "prefix": prefix,
+            "count": count,
+            "total_size": total_size,
+            "computed_at": time.time()
+        }
+
+    def invalidate(self, bucket_name: str, object_name: str):
+        """Drop summaries of every prefix containing object_name"""
+        self.cache.invalidate_where(
+            lambda key: key[0] == bucket_name and object_name.startswith(key[1])
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+# Singleton instance
+prefix_summaries = PrefixSummaries()
@@ -0,0 +1,206 @@
+# app/services/local_mirror.py
+
+"""
+Serve objects from the NAS mirror mounts instead of MinIO when a copy exists.
+
+The mounts in LOCAL_MIRRORS are walked periodically into an index of
+(bucket, object name) -> path, so a lookup is a dict hit and a miss costs no
+filesystem calls. Hits are re-checked with one stat before serving, and
+files modified within LOCAL_MIRROR_SETTLE_SECONDS are skipped since they may
+still be being written.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import (
+    LOCAL_MIRRORS, LOCAL_MIRROR_RESCAN_INTERVAL, LOCAL_MIRROR_SETTLE_SECONDS,
+    LOCAL_MIRROR_WORKERS, STORAGE_DOWNLOAD_CHUNK_SIZE
+)
+from app.core.logger import setup_logger
+
+logger = setup_logger("local_mirror")
+
+# Reads and stats on the mounts can block for a while on a network filesystem
+mirror_executor = ThreadPoolExecutor(max_workers=LOCAL_MIRROR_WORKERS, thread_name_prefix="local-mirror")
+
+class LocalFile:
+    def __init__(self, path: str, st: os.stat_result):
+        self.path = path
+        self.size = st.st_size
+        self.last_modified = datetime.fromtimestamp(st.st_mtime, timezone.utc)
+        # Not MinIO's ETag, but stable for as long as the file is unchanged
+        self.etag = f"{st.st_size:x}-{st.st_mtime_ns:x}"
+
+class LocalMirror:
+    def __init__(self, mirrors: List[Dict[str, str]] = LOCAL_MIRRORS,
+                 settle_seconds: float = LOCAL_MIRROR_SETTLE_SECONDS):
+        self.mirrors = mirrors
+        self.settle_seconds = settle_seconds
+        self._index: Dict[Tuple[str, str], str] = {}
+        self._scan_task: Optional[asyncio.Task] = None
+        self.last_scan: Optional[Dict[str, Any]] = None
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def scan(self) -> Dict[str, Any]:
+        """Walk every mirror root and replace the index"""
+        started = time.perf_counter()
+        index = {}
+        total_bytes = 0
+        for mirror in self.mirrors:
+            root = mirror["root"]
+            if not os.path.isdir(root):
+                continue
+            stack = [root]
+            while stack:
+                directory = stack.pop()
+                try:
+                    entries = list(os.scandir(directory))
+                except OSError as e:
+                    logger.warning(f"Cannot scan {directory}: {e}")
+                    continue
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            relative = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                            index[(mirror["bucket"], mirror["prefix"] + relative)] = entry.path
+                            total_bytes += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        self._index = index
+        self.last_scan = {
+            "files": len(index),
+            "bytes": total_bytes,
+            "seconds": round(time.perf_counter() - started, 3),
+            "finished_at": datetime.utcnow().isoformat()
+        }
+        return self.last_scan
+
+    def resolve(self, bucket_name: str, object_name: str) -> Optional[LocalFile]:
+        """The local copy of an object, or None if it has to come from MinIO"""
+        path = self._index.get((bucket_name, object_name))
+        if path is None:
+            self.misses += 1
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            # Removed since the last scan
+            self._index.pop((bucket_name, object_name), None)
+            self.stale += 1
+            return None
+        if time.time() - st.st_mtime < self.settle_seconds:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return LocalFile(path, st)
+
+    async def resolve_async(self, bucket_name: str, object_name: str) -> Optional[LocalFile]:
+        if (bucket_name, object_name) not in self._index:
+            self.misses += 1
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(mirror_executor, self.resolve, bucket_name, object_name)
+
+    async def start(self):
+        if self._scan_task is None and self.mirrors:
+            self._scan_task = asyncio.create_task(self._scan_loop())
+
+    async def stop(self):
+        if self._scan_task is not None:
+            self._scan_task.cancel()
+            self._scan_task = None
+
+    async def _scan_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                result = await loop.run_in_executor(mirror_executor, self.scan)
+                logger.debug(f"Local mirror scan: {result}")
+            except Exception as e:
+                logger.error(f"Local mirror scan failed: {e}")
+            await asyncio.sleep(LOCAL_MIRROR_RESCAN_INTERVAL)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "files": len(self._index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "last_scan": self.last_scan,
+            "roots": [m["root"] for m in self.mirrors if os.path.isdir(m["root"])]
+        }
+
+class LocalFileResponse(Response):
+    """
+    A byte range of a local file.
+
+    Servers offering the ASGI zero-copy send extension get the file
+    descriptor and send it with sendfile(2). Otherwise the file is read with
+    pread on the mirror threads, one chunk ahead of the chunk being sent.
+    """
+
+    def __init__(self, path: str, offset: int, length: int, status_code: int = 200,
+                 headers: Optional[Dict[str, str]] = None, media_type: Optional[str] = None,
+                 chunk_size: int = STORAGE_DOWNLOAD_CHUNK_SIZE):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.chunk_size = chunk_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if scope.get("method") == "HEAD" or self.length <= 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            elif "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({"type": "http.response.zerocopysend", "file": fd,
+                            "offset": self.offset, "count": self.length, "more_body": False})
+            else:
+                fd, owned = -1, fd
+                await self._send_chunks(owned, send)
+        finally:
+            if fd >= 0:
+                os.close(fd)
+
+    async def _send_chunks(self, fd: int, send: Send):
+        """Send the range read with pread; closes fd once no read is in flight"""
+        position, end = self.offset, self.offset + self.length
+
+        def read_at(pos: int):
+            # The executor's own future, which is only done once the thread is off the descriptor
+            return mirror_executor.submit(os.pread, fd, min(self.chunk_size, end - pos), pos)
+
+        pending = None
+        try:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, self.offset, self.length, os.POSIX_FADV_SEQUENTIAL)
+            pending = read_at(position)
+            while pending is not None:
+                chunk = await asyncio.wrap_future(pending)
+                position += len(chunk)
+                # A truncated file ends the body early rather than hanging the client
+                pending = read_at(position) if chunk and position < end else None
+                await send({"type": "http.response.body", "body": chunk, "more_body": pending is not None})
+        finally:
+            if pending is not None and not pending.done():
+                # The client went away mid-read; don't close the descriptor under the reader
+                pending.add_done_callback(lambda f: os.close(fd))
+            else:
+                os.close(fd)
+
+# Singleton instance
+local_mirror = LocalMirror()
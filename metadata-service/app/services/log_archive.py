@@ -0,0 +1,401 @@
+# app/services/log_archive.py
+
+"""
+Container logs archived to MinIO as compressed, time-bucketed chunks.
+
+Lines are queued from the log collector's thread and never wait on MinIO;
+past LOG_ARCHIVE_QUEUE_LINES new lines are dropped and counted. A
+background task sorts them into one open chunk per service and time bucket
+of LOG_ARCHIVE_CHUNK_SECONDS. Closed chunks are compressed (zstd, or gzip
+without the zstandard package) and uploaded as one batch, then each
+affected day's index object is rewritten once. Range queries read the day
+indexes and fetch only the chunks overlapping the range.
+
+Chunks live in their own bucket, LOG_ARCHIVE_BUCKET, so nothing that lists
+the metadata bucket has to step over them:
+
+    <LOG_OBJECT_PREFIX><service>/<YYYY-MM-DD>/index.json
+    <LOG_OBJECT_PREFIX><service>/<YYYY-MM-DD>/<first line ms>-<token>.ndjson.zst
+"""
+
+import asyncio
+import gzip
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; chunks are gzipped without it
+    zstandard = None
+
+from app.core.config import (
+    LOG_ARCHIVE_BUCKET, LOG_OBJECT_PREFIX, LOG_ARCHIVE_CODEC, LOG_ARCHIVE_CHUNK_SECONDS,
+    LOG_ARCHIVE_CHUNK_MAX_BYTES, LOG_ARCHIVE_FLUSH_INTERVAL, LOG_ARCHIVE_QUEUE_LINES
+)
+from app.core.logger import setup_logger
+from app.core.minio_client import MinIOClient
+
+logger = setup_logger("log_archive")
+
+CODECS = {
+    "zstd": (".zst", "application/zstd"),
+    "gzip": (".gz", "application/gzip"),
+}
+# Chunks that failed to upload are retried on later flushes, up to this many
+MAX_RETRY_CHUNKS = 64
+# Chunks fetched concurrently by a range query
+FETCH_CONCURRENCY = 4
+
+# Compression and decompression stay off the event loop
+archive_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="log-archive")
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+def decompress(data: bytes, object_name: str) -> bytes:
+    if object_name.endswith(CODECS["zstd"][0]):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {object_name}")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+def day_of(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+class LogChunk:
+    """Lines of one service within one time bucket, as encoded NDJSON"""
+
+    def __init__(self, service: str, bucket: float):
+        self.service = service
+        self.bucket = bucket
+        self.lines: List[bytes] = []
+        self.raw_bytes = 0
+        self.start = float("inf")
+        self.end = 0.0
+        self.object_name: Optional[str] = None
+        self.data: Optional[bytes] = None
+
+    def add(self, entry: Dict[str, Any]):
+        timestamp = entry["timestamp"]
+        line = json.dumps({
+            "timestamp": round(timestamp, 6),
+            "stream": entry.get("stream", "stdout"),
+            "container_id": entry.get("container_id", ""),
+            "message": entry["message"]
+        }, separators=(",", ":")).encode("utf-8")
+        self.lines.append(line)
+        self.raw_bytes += len(line) + 1
+        self.start = min(self.start, timestamp)
+        self.end = max(self.end, timestamp)
+
+    def seal(self, prefix: str, codec: str):
+        """Compress the lines and name the object they will be stored as"""
+        suffix = CODECS[codec][0]
+        self.object_name = (f"{prefix}{self.service}/{day_of(self.bucket)}/"
+                            f"{int(self.start * 1000)}-{uuid.uuid4().hex[:8]}.ndjson{suffix}")
+        self.data = compress(b"\n".join(self.lines) + b"\n", codec)
+
+    def index_entry(self) -> Dict[str, Any]:
+        return {
+            "key": self.object_name,
+            "start": self.start,
+            "end": self.end,
+            "lines": len(self.lines),
+            "raw_bytes": self.raw_bytes,
+            "size": len(self.data)
+        }
+
+    def decoded(self) -> List[Dict[str, Any]]:
+        return [json.loads(line) for line in self.lines]
+
+class LogArchiver:
+    def __init__(
+        self,
+        bucket: str = LOG_ARCHIVE_BUCKET,
+        prefix: str = LOG_OBJECT_PREFIX,
+        codec: str = LOG_ARCHIVE_CODEC,
+        chunk_seconds: int = LOG_ARCHIVE_CHUNK_SECONDS,
+        chunk_max_bytes: int = LOG_ARCHIVE_CHUNK_MAX_BYTES,
+        flush_interval: float = LOG_ARCHIVE_FLUSH_INTERVAL,
+        queue_lines: int = LOG_ARCHIVE_QUEUE_LINES
+    ):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown log archive codec: {codec}")
+        if codec == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed; archiving logs with gzip")
+            codec = "gzip"
+        self.bucket = bucket
+        self.prefix = prefix
+        self.codec = codec
+        self.chunk_seconds = max(chunk_seconds, 1)
+        self.chunk_max_bytes = chunk_max_bytes
+        self.flush_interval = flush_interval
+        self.queue_lines = queue_lines
+        self._client: Optional[MinIOClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._open: Dict[Tuple[str, float], LogChunk] = {}
+        self._retry: List[LogChunk] = []
+        self._uploading: List[LogChunk] = []
+        # (service, day) -> index document, for days this process writes to
+        self._indexes: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._unindexed: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._dirty: Set[Tuple[str, str]] = set()
+        self.dropped = 0
+        self.chunks = 0
+        self.lines = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.failed_uploads = 0
+        self.lost_lines = 0
+
+    def index_name(self, service: str, day: str) -> str:
+        return f"{self.prefix}{service}/{day}/index.json"
+
+    def ingest(self, entry: Dict[str, Any]):
+        """Queue a line; called on the log collector's thread and never blocks on I/O"""
+        with self._lock:
+            if len(self._pending) >= self.queue_lines:
+                self.dropped += 1
+                return
+            self._pending.append(entry)
+
+    async def start(self, client: MinIOClient):
+        if self._task is None:
+            self._client = client
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._flush_loop())
+            logger.info(f"Archiving container logs to {self.bucket}/{self.prefix} every "
+                        f"{self.chunk_seconds}s chunk ({self.codec})")
+
+    async def stop(self):
+        """Upload everything still buffered"""
+        if self._task is None:
+            return
+        # Let a flush in progress finish rather than cancelling it mid-upload
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            final = self._stopping.is_set()
+            try:
+                await self.flush(final=final)
+            except Exception as e:
+                logger.error(f"Log archive flush failed: {e}")
+            if final:
+                return
+
+    def _sort_pending(self) -> List[LogChunk]:
+        """Move queued lines into open chunks; returns chunks that filled up"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        full = []
+        for entry in pending:
+            timestamp = entry["timestamp"]
+            key = (entry["service"], timestamp - timestamp % self.chunk_seconds)
+            chunk = self._open.get(key)
+            if chunk is None:
+                chunk = self._open[key] = LogChunk(*key)
+            chunk.add(entry)
+            if chunk.raw_bytes >= self.chunk_max_bytes:
+                full.append(self._open.pop(key))
+        return full
+
+    async def flush(self, final: bool = False):
+        """Upload chunks whose time bucket has passed (all of them if final) and update the indexes"""
+        closed = self._sort_pending()
+        # Lines carry Docker's timestamps, so a collector resuming after a gap can
+        # still deliver lines for a bucket that was already closed. They go into a
+        # new chunk for it; a bucket may hold several chunks, each indexed.
+        horizon = time.time() - self.flush_interval
+        for key, chunk in list(self._open.items()):
+            if final or chunk.bucket + self.chunk_seconds <= horizon:
+                closed.append(self._open.pop(key))
+
+        # Queries keep seeing these lines until their chunks are indexed
+        self._uploading = closed
+        try:
+            if closed:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(archive_executor, self._seal_all, closed)
+            batch, self._retry = self._retry + closed, []
+            if batch:
+                await self._upload(batch)
+            if self._unindexed or self._dirty:
+                await self._write_indexes()
+        finally:
+            self._uploading = []
+
+    def _seal_all(self, chunks: List[LogChunk]):
+        for chunk in chunks:
+            chunk.seal(self.prefix, self.codec)
+
+    async def _upload(self, chunks: List[LogChunk]):
+        results = await asyncio.gather(*(
+            self._client.aio.upload_file(
+                bucket_name=self.bucket,
+                object_name=chunk.object_name,
+                file_data=chunk.data,
+                content_type=CODECS[self.codec][1]
+            ) for chunk in chunks
+        ))
+        for chunk, ok in zip(chunks, results):
+            if not ok:
+                self.failed_uploads += 1
+                self._retry.append(chunk)
+                continue
+            self._unindexed.setdefault((chunk.service, day_of(chunk.bucket)), []).append(chunk.index_entry())
+            self.chunks += 1
+            self.lines += len(chunk.lines)
+            self.raw_bytes += chunk.raw_bytes
+            self.stored_bytes += len(chunk.data)
+        if len(self._retry) > MAX_RETRY_CHUNKS:
+            lost, self._retry = self._retry[:-MAX_RETRY_CHUNKS], self._retry[-MAX_RETRY_CHUNKS:]
+            self.lost_lines += sum(len(chunk.lines) for chunk in lost)
+            logger.error(f"Discarded {len(lost)} log chunks that could not be uploaded")
+
+    async def _fetch_index(self, service: str, day: str) -> Optional[Dict[str, Any]]:
+        """A day's index from MinIO; None if there is none, raises on other errors"""
+        data = await self._client.aio.fetch_file(self.bucket, self.index_name(service, day))
+        return json.loads(data) if data is not None else None
+
+    async def _write_indexes(self):
+        for key in list(self._unindexed):
+            if key not in self._indexes:
+                try:
+                    # Indexes written before a restart are extended, not replaced
+                    self._indexes[key] = await self._fetch_index(*key) or {
+                        "service": key[0], "day": key[1], "codec": self.codec, "chunks": []
+                    }
+                except Exception as e:
+                    logger.warning(f"Could not read log index for {key[0]} {key[1]}, will retry: {e}")
+                    continue
+            chunks = self._indexes[key]["chunks"]
+            chunks.extend(self._unindexed.pop(key))
+            chunks.sort(key=lambda c: c["start"])
+            self._dirty.add(key)
+
+        for key in list(self._dirty):
+            if await self._client.aio.upload_json(self.bucket, self.index_name(*key), self._indexes[key]):
+                self._dirty.discard(key)
+
+        # Only today's and yesterday's indexes are still being appended to
+        keep = {day_of(time.time()), day_of(time.time() - 86400)}
+        for key in list(self._indexes):
+            if key[1] not in keep and key not in self._dirty:
+                del self._indexes[key]
+
+    async def _index_days(self, service: str, first: str, last: str) -> List[str]:
+        """Days between first and last (inclusive) that have an index for a service"""
+        base = f"{self.prefix}{service}/"
+
+        def list_days() -> List[str]:
+            days = []
+            # Listed without recursion, each day is one common prefix: <base><day>/
+            for obj in self._client.iter_objects(self.bucket, base, recursive=False, start_after=f"{base}{first}"):
+                day = obj["name"][len(base):].rstrip("/")
+                if day > last:
+                    break
+                days.append(day)
+            return days
+
+        days = set(await self._client.aio.run(list_days))
+        # Indexes held here may not have reached MinIO yet
+        days.update(day for key_service, day in self._indexes if key_service == service and first <= day <= last)
+        return sorted(days)
+
+    async def query(self, service: str, start: float, end: float, limit: int) -> Dict[str, Any]:
+        """Archived and still-buffered lines of a service between start and end, oldest first"""
+        if self._client is None:
+            raise RuntimeError("Log archive is not running")
+
+        # A chunk is indexed under the day its bucket starts, which can be before `start`
+        days = await self._index_days(service, day_of(start - self.chunk_seconds), day_of(end))
+        async def load(day: str) -> Optional[Dict[str, Any]]:
+            return self._indexes.get((service, day)) or await self._fetch_index(service, day)
+
+        candidates = []
+        for i in range(0, len(days), FETCH_CONCURRENCY):
+            indexes = await asyncio.gather(*(load(day) for day in days[i:i + FETCH_CONCURRENCY]))
+            for index in indexes:
+                if index:
+                    candidates += [c for c in index["chunks"] if c["end"] >= start and c["start"] <= end]
+        candidates.sort(key=lambda c: c["start"])
+
+        lines: List[Dict[str, Any]] = []
+        fetched = 0
+        loop = asyncio.get_running_loop()
+        for i in range(0, len(candidates), FETCH_CONCURRENCY):
+            group = candidates[i:i + FETCH_CONCURRENCY]
+            blobs = await asyncio.gather(*(self._client.aio.fetch_file(self.bucket, c["key"]) for c in group))
+            for chunk, blob in zip(group, blobs):
+                if blob is None:
+                    continue
+                fetched += 1
+                raw = await loop.run_in_executor(archive_executor, decompress, blob, chunk["key"])
+                lines += [line for line in map(json.loads, raw.splitlines())
+                          if start <= line["timestamp"] <= end]
+            lines.sort(key=lambda line: line["timestamp"])
+            # Later chunks start after everything we would return
+            following = candidates[i + FETCH_CONCURRENCY:i + FETCH_CONCURRENCY + 1]
+            if len(lines) >= limit and following and following[0]["start"] > lines[limit - 1]["timestamp"]:
+                break
+
+        # Lines not in any chunk object yet
+        with self._lock:
+            pending = [e for e in self._pending if e["service"] == service]
+        seen = {c["key"] for c in candidates}
+        buffered = [c for c in list(self._open.values()) + self._retry + self._uploading
+                    if c.service == service and c.object_name not in seen]
+        recent = [line for chunk in buffered for line in chunk.decoded()]
+        for entry in pending:
+            recent.append({key: entry.get(key) for key in ("timestamp", "stream", "container_id", "message")})
+        lines += [line for line in recent if start <= line["timestamp"] <= end]
+        lines.sort(key=lambda line: line["timestamp"])
+
+        return {
+            "service": service,
+            "from": start,
+            "to": end,
+            "chunks": fetched,
+            "count": min(len(lines), limit),
+            "truncated": len(lines) > limit,
+            "lines": lines[:limit]
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queued = len(self._pending)
+        return {
+            "running": self._task is not None,
+            "codec": self.codec,
+            "chunks": self.chunks,
+            "lines": self.lines,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+            "compression_ratio": round(self.raw_bytes / self.stored_bytes, 2) if self.stored_bytes else None,
+            "queued": queued,
+            "open_chunks": len(self._open),
+            "retrying_chunks": len(self._retry),
+            "dropped": self.dropped,
+            "failed_uploads": self.failed_uploads,
+            "lost_lines": self.lost_lines
+        }
+
+# Singleton instance
+log_archiver = LogArchiver()
@@ -0,0 +1,236 @@
+# app/services/log_buffer.py
+
+"""
+Recent container log lines per service, and live fan-out to viewers.
+
+Each service gets a ring of fixed capacity holding the UTF-8 bytes of each
+line, with timestamps and stream/container indexes in parallel arrays, and
+a byte budget that evicts the oldest lines first. Lines arrive on the log
+collector's thread; they are handed to the event loop in batches, encoded
+once, and offered to every subscriber. A subscriber that falls behind
+loses its oldest undelivered lines rather than slowing ingestion.
+"""
+
+import asyncio
+import json
+import threading
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
+
+from app.core.config import (
+    LOG_BUFFER_MAX_BYTES, LOG_BUFFER_MAX_LINES, LOG_SUBSCRIBER_QUEUE_SIZE
+)
+
+STREAMS = ("stdout", "stderr")
+
+class LogRing:
+    """Bounded buffer of one service's lines, oldest evicted first"""
+
+    def __init__(self, capacity: int = LOG_BUFFER_MAX_LINES, max_bytes: int = LOG_BUFFER_MAX_BYTES):
+        self.capacity = max(capacity, 1)
+        self.max_bytes = max_bytes
+        self._lines: List[Optional[bytes]] = [None] * self.capacity
+        self._times = array("d", bytes(8 * self.capacity))
+        self._streams = array("B", bytes(self.capacity))
+        self._sources = array("H", bytes(2 * self.capacity))
+        # Container ids are few, so lines refer to them by index; an index is
+        # freed for reuse once no line in the ring refers to it
+        self._containers: List[Optional[str]] = []
+        self._container_refs: List[int] = []
+        self._container_index: Dict[str, int] = {}
+        self._free_sources: List[int] = []
+        self._start = 0
+        self._count = 0
+        self.bytes = 0
+        self.total = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: float, message: str, stream: str = "stdout", container_id: str = ""):
+        data = message.encode("utf-8")
+        with self._lock:
+            while self._count and (self._count == self.capacity or self.bytes + len(data) > self.max_bytes):
+                self._evict()
+            source = self._source(container_id)
+            slot = (self._start + self._count) % self.capacity
+            self._lines[slot] = data
+            # Out-of-order stamps are clamped so `since` lookups can bisect
+            last = self._times[(slot - 1) % self.capacity] if self._count else timestamp
+            self._times[slot] = max(timestamp, last)
+            self._streams[slot] = 1 if stream == "stderr" else 0
+            self._sources[slot] = source
+            self._count += 1
+            self.bytes += len(data)
+            self.total += 1
+
+    def _source(self, container_id: str) -> int:
+        """Index of a container id, referenced once more; call with the lock held"""
+        source = self._container_index.get(container_id)
+        if source is None:
+            # Every index in use: drop the oldest lines until one is released
+            while not self._free_sources and len(self._containers) >= 0xFFFF and self._count:
+                self._evict()
+            if self._free_sources:
+                source = self._free_sources.pop()
+                self._containers[source] = container_id
+            else:
+                source = len(self._containers)
+                self._containers.append(container_id)
+                self._container_refs.append(0)
+            self._container_index[container_id] = source
+        self._container_refs[source] += 1
+        return source
+
+    def _evict(self):
+        self.bytes -= len(self._lines[self._start])
+        self._lines[self._start] = None
+        source = self._sources[self._start]
+        self._container_refs[source] -= 1
+        if not self._container_refs[source]:
+            del self._container_index[self._containers[source]]
+            self._containers[source] = None
+            self._free_sources.append(source)
+        self._start = (self._start + 1) % self.capacity
+        self._count -= 1
+        self.evicted += 1
+
+    def _time_at(self, i: int) -> float:
+        return self._times[(self._start + i) % self.capacity]
+
+    def tail(self, n: int, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """The last n lines, optionally only those at or after since"""
+        with self._lock:
+            first = max(self._count - n, 0)
+            if since is not None:
+                first = max(first, bisect_left(_Times(self), since))
+            rows = []
+            for i in range(first, self._count):
+                slot = (self._start + i) % self.capacity
+                rows.append((self._times[slot], self._lines[slot], self._streams[slot],
+                             self._containers[self._sources[slot]]))
+        return [{
+            "timestamp": timestamp,
+            "stream": STREAMS[stream],
+            "container_id": container_id,
+            "message": data.decode("utf-8", "replace")
+        } for timestamp, data, stream, container_id in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "lines": self._count,
+                "bytes": self.bytes,
+                "total": self.total,
+                "evicted": self.evicted,
+                "oldest": self._time_at(0) if self._count else None,
+                "newest": self._time_at(self._count - 1) if self._count else None
+            }
+
+class _Times:
+    """Sequence view of a ring's timestamps in logical order, for bisect"""
+
+    def __init__(self, ring: LogRing):
+        self._ring = ring
+
+    def __len__(self):
+        return self._ring._count
+
+    def __getitem__(self, i: int) -> float:
+        return self._ring._time_at(i)
+
+class LogSubscription:
+    """One live viewer; keeps at most maxsize undelivered lines, dropping the oldest"""
+
+    def __init__(self, services: Optional[Set[str]], maxsize: int = LOG_SUBSCRIBER_QUEUE_SIZE):
+        self.services = services
+        self.queue: Deque[str] = deque(maxlen=maxsize)
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def offer(self, payload: str):
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(payload)
+        self._ready.set()
+
+    async def get(self, timeout: Optional[float] = None) -> List[str]:
+        """Wait for lines and take all of them; empty on timeout"""
+        if not self.queue:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        batch = list(self.queue)
+        self.queue.clear()
+        return batch
+
+class LogHub:
+    def __init__(self):
+        self._rings: Dict[str, LogRing] = {}
+        self._subscribers: Set[LogSubscription] = set()
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Bind the event loop that subscribers live on"""
+        self._loop = loop
+
+    def ring(self, service: str) -> Optional[LogRing]:
+        return self._rings.get(service)
+
+    def services(self) -> List[str]:
+        return sorted(self._rings)
+
+    def ingest(self, entry: Dict[str, Any]):
+        """LogStreamer callback; runs on the collector's thread"""
+        service = entry["service"]
+        ring = self._rings.get(service)
+        if ring is None:
+            ring = self._rings.setdefault(service, LogRing())
+        ring.append(entry["timestamp"], entry["message"], entry.get("stream", "stdout"), entry.get("container_id", ""))
+
+        loop = self._loop
+        if not self._subscribers or loop is None or loop.is_closed():
+            return
+        with self._pending_lock:
+            self._pending.append(entry)
+            schedule = len(self._pending) == 1
+        if schedule:
+            # One hand-off per batch, not per line
+            loop.call_soon_threadsafe(self._fanout)
+
+    def _fanout(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        subscribers = list(self._subscribers)
+        for entry in pending:
+            payload = None
+            for sub in subscribers:
+                if sub.services is None or entry["service"] in sub.services:
+                    if payload is None:
+                        payload = json.dumps(entry)
+                    sub.offer(payload)
+
+    def subscribe(self, services: Optional[Iterable[str]] = None) -> LogSubscription:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        sub = LogSubscription(set(services) if services else None)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: LogSubscription):
+        self._subscribers.discard(sub)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "services": {service: ring.stats() for service, ring in sorted(self._rings.items())},
+            "subscribers": len(self._subscribers),
+            "subscriber_dropped": sum(sub.dropped for sub in self._subscribers)
+        }
+
+# Singleton instance
+log_hub = LogHub()
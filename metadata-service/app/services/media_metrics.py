@@ -0,0 +1,339 @@
+# app/services/media_metrics.py
+
+"""
+Live media metrics parsed out of container log lines.
+
+Parsers are registered per service. Each declares literal prefilter
+substrings that are checked before its regex runs, so the common case, a
+line that concerns no parser, costs a dict lookup and a few `in` scans.
+Parsed values become time series per (service, label, metric), where the
+label identifies the stream (an ffmpeg input name, an OBS output, an RTMP
+stream key). Alert rules fire when a metric stays past a threshold for a
+given duration, e.g. ffmpeg speed < 1.0x for 10 s.
+"""
+
+import operator
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from app.core.config import (
+    LOG_ALERT_RULES, LOG_METRICS_WINDOW_SECONDS, LOG_METRICS_MAX_POINTS, LOG_METRICS_STALE_SECONDS
+)
+from app.core.logger import setup_logger
+
+logger = setup_logger("media_metrics")
+
+OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge, "==": operator.eq}
+# Cumulative counters are turned into per-second rates over at least this interval
+RATE_MIN_INTERVAL = 1.0
+
+Sample = Tuple[Optional[str], Dict[str, float]]
+
+class LineParser:
+    """
+    Turns matching lines of some services into (label, {metric: value}).
+
+    Subclasses implement extract(); it only sees lines containing one of
+    the prefilter substrings. `rates` maps cumulative counter metrics to
+    the name of the per-second rate derived from them.
+    """
+
+    rates: Dict[str, str] = {}
+
+    def __init__(self, name: str, services: Iterable[str], prefilter: Iterable[str]):
+        self.name = name
+        self.services = set(services)
+        self.prefilter = tuple(prefilter)
+
+    def parse(self, message: str) -> Optional[Sample]:
+        for needle in self.prefilter:
+            if needle in message:
+                return self.extract(message)
+        return None
+
+    def extract(self, message: str) -> Optional[Sample]:
+        raise NotImplementedError
+
+    def context(self, message: str) -> Optional[str]:
+        """A label for this container's following samples, from lines like ffmpeg's input banner"""
+        return None
+
+class RegexParser(LineParser):
+    """Named groups become metrics; a group called `label` names the stream"""
+
+    def __init__(self, name: str, services: Iterable[str], prefilter: Iterable[str],
+                 pattern: str, metrics: Dict[str, str]):
+        super().__init__(name, services, prefilter)
+        self.pattern: Pattern[str] = re.compile(pattern)
+        self.metrics = metrics
+
+    def extract(self, message: str) -> Optional[Sample]:
+        match = self.pattern.search(message)
+        if match is None:
+            return None
+        groups = match.groupdict()
+        values = {metric: float(groups[group]) for group, metric in self.metrics.items()
+                  if groups.get(group) is not None}
+        return (groups.get("label"), values) if values else None
+
+class FFmpegProgressParser(LineParser):
+    """ffmpeg's `frame= fps= ... bitrate= dup= drop= speed=` status lines"""
+
+    PROGRESS = re.compile(r"\b(frame|fps|bitrate|dup|drop|speed)=\s*([\d.]+)")
+    INPUT = re.compile(r"Input #\d+, [\w,]+, from '(?:[^']*/)?([^/']+)'")
+    rates = {"ffmpeg_drop": "ffmpeg_drop_rate", "ffmpeg_dup": "ffmpeg_dup_rate"}
+
+    def __init__(self, services: Iterable[str]):
+        super().__init__("ffmpeg", services, ("speed=",))
+
+    def extract(self, message: str) -> Optional[Sample]:
+        # Status updates end in \r rather than \n, so one line can hold many; keep the latest
+        start = message.rfind("frame=")
+        values = {f"ffmpeg_{key}": float(value) for key, value in self.PROGRESS.findall(message[max(start, 0):])}
+        return (None, values) if values else None
+
+    def context(self, message: str) -> Optional[str]:
+        if "Input #" not in message:
+            return None
+        match = self.INPUT.search(message)
+        return match.group(1) if match else None
+
+def readable_seconds(text: str) -> float:
+    """nginx-rtmp's session time, e.g. `1h 2m 3s`"""
+    units = {"h": 3600, "m": 60, "s": 1}
+    return float(sum(int(value) * units[unit] for value, unit in re.findall(r"(\d+)([hms])", text)))
+
+class RTMPSessionParser(RegexParser):
+    """nginx-rtmp access log: bytes and duration of each finished PUBLISH/PLAY session"""
+
+    def __init__(self, services: Iterable[str]):
+        super().__init__(
+            "rtmp_session", services, ('PUBLISH "', 'PLAY "'),
+            r'\] (?P<command>PUBLISH|PLAY) "[^"]*" "(?P<label>[^"]*)" "[^"]*" - '
+            r'(?P<bytes_in>\d+) (?P<bytes_out>\d+) "[^"]*" "[^"]*" \((?P<duration>[^)]*)\)',
+            {}
+        )
+
+    def extract(self, message: str) -> Optional[Sample]:
+        match = self.pattern.search(message)
+        if match is None:
+            return None
+        seconds = readable_seconds(match.group("duration"))
+        direction, count = ("in", match.group("bytes_in")) if match.group("command") == "PUBLISH" \
+            else ("out", match.group("bytes_out"))
+        values = {f"rtmp_{match.group('command').lower()}_seconds": seconds}
+        if seconds > 0:
+            values[f"rtmp_{match.group('command').lower()}_kbps_{direction}"] = int(count) * 8 / 1000 / seconds
+        return match.group("label"), values
+
+def default_parsers() -> List[LineParser]:
+    rtmp = ("rtmp-pi",)
+    obs = ("obs-pi",)
+    # Per-output lines name the output; others are labelled with the container
+    obs_output = r"(?:Output '(?P<label>[^']+)': .*?)?"
+    return [
+        FFmpegProgressParser(rtmp),
+        RTMPSessionParser(rtmp),
+        RegexParser(
+            "obs_render_lag", obs, ("rendering lag",),
+            obs_output + r"rendering lag/stalls: (?P<frames>\d+) \((?P<percent>[\d.]+)%\)",
+            {"frames": "obs_render_lag_frames", "percent": "obs_render_lag_percent"}
+        ),
+        RegexParser(
+            "obs_encoding_lag", obs, ("encoding lag",),
+            obs_output + r"encoding lag: (?P<frames>\d+)/\d+ \((?P<percent>[\d.]+)%\)",
+            {"frames": "obs_encoding_lag_frames", "percent": "obs_encoding_lag_percent"}
+        ),
+        RegexParser(
+            "obs_dropped_frames", obs, ("insufficient bandwidth",),
+            obs_output + r"connection stalls: (?P<frames>\d+) \((?P<percent>[\d.]+)%\)",
+            {"frames": "obs_dropped_frames", "percent": "obs_dropped_frames_percent"}
+        ),
+    ]
+
+class MediaMetrics:
+    def __init__(
+        self,
+        parsers: Optional[List[LineParser]] = None,
+        rules: List[Dict[str, Any]] = LOG_ALERT_RULES,
+        window: float = LOG_METRICS_WINDOW_SECONDS,
+        max_points: int = LOG_METRICS_MAX_POINTS,
+        stale_seconds: float = LOG_METRICS_STALE_SECONDS
+    ):
+        self.parsers: List[LineParser] = []
+        self._by_service: Dict[str, List[LineParser]] = {}
+        self.window = window
+        self.max_points = max_points
+        self.stale_seconds = stale_seconds
+        self._rules: Dict[str, List[Dict[str, Any]]] = {}
+        for rule in rules:
+            if rule["op"] not in OPS:
+                raise ValueError(f"Unknown operator in alert rule {rule['name']}: {rule['op']}")
+            self._rules.setdefault(rule["metric"], []).append(rule)
+        # (container id, parser name) -> (label from an earlier line, its timestamp)
+        self._labels: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._series: Dict[Tuple[str, str, str], Deque[Tuple[float, float]]] = {}
+        self._counters: Dict[Tuple[str, str, str], Tuple[float, float]] = {}
+        self._alerts: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=100)
+        self._lock = threading.Lock()
+        self._pruned_at = 0.0
+        self.lines = 0
+        self.matched = 0
+        for parser in parsers if parsers is not None else default_parsers():
+            self.register(parser)
+
+    def register(self, parser: LineParser):
+        self.parsers.append(parser)
+        self._by_service.clear()
+
+    def ingest(self, entry: Dict[str, Any]):
+        """LogStreamer callback; runs on the collector's thread"""
+        self.lines += 1
+        service = entry["service"]
+        parsers = self._by_service.get(service)
+        if parsers is None:
+            parsers = self._by_service[service] = [p for p in self.parsers if service in p.services]
+        if not parsers:
+            return
+        message = entry["message"]
+        container_id = entry.get("container_id", "")
+        for parser in parsers:
+            sample = parser.parse(message)
+            if sample is None:
+                label = parser.context(message)
+                if label is not None:
+                    with self._lock:
+                        self._labels[(container_id, parser.name)] = (label, entry["timestamp"])
+                continue
+            label, values = sample
+            if label is None:
+                with self._lock:
+                    known = self._labels.get((container_id, parser.name))
+                label = (known and known[0]) or entry.get("container") or container_id
+            self.matched += 1
+            self._record(parser, service, label, entry["timestamp"], values)
+
+    def _record(self, parser: LineParser, service: str, label: str, timestamp: float, values: Dict[str, float]):
+        with self._lock:
+            if timestamp - self._pruned_at >= self.window / 10:
+                self._prune(timestamp)
+            for metric, value in list(values.items()):
+                rate_metric = parser.rates.get(metric)
+                if rate_metric is not None:
+                    key = (service, label, metric)
+                    previous = self._counters.get(key)
+                    if previous is None or value < previous[1]:
+                        # First sample, or the counter restarted with a new process
+                        self._counters[key] = (timestamp, value)
+                    elif timestamp - previous[0] >= RATE_MIN_INTERVAL:
+                        values[rate_metric] = (value - previous[1]) / (timestamp - previous[0])
+                        self._counters[key] = (timestamp, value)
+            for metric, value in values.items():
+                key = (service, label, metric)
+                points = self._series.get(key)
+                if points is None:
+                    points = self._series[key] = deque(maxlen=self.max_points)
+                points.append((timestamp, value))
+                while points[0][0] < timestamp - self.window:
+                    points.popleft()
+                for rule in self._rules.get(metric, ()):
+                    self._evaluate(rule, service, label, timestamp, value)
+
+    def _evaluate(self, rule: Dict[str, Any], service: str, label: str, timestamp: float, value: float):
+        key = (rule["name"], service, label)
+        alert = self._alerts.get(key)
+        if OPS[rule["op"]](value, rule["threshold"]):
+            if alert is None:
+                alert = self._alerts[key] = {
+                    "rule": rule["name"], "service": service, "label": label, "metric": rule["metric"],
+                    "condition": f"{rule['metric']} {rule['op']} {rule['threshold']} for {rule['for']}s",
+                    "since": timestamp, "firing": False
+                }
+            alert["value"] = value
+            alert["last_seen"] = timestamp
+            if not alert["firing"] and timestamp - alert["since"] >= rule["for"]:
+                alert["firing"] = True
+                alert["fired_at"] = timestamp
+                self.history.append(dict(alert))
+                logger.warning(f"Alert {rule['name']} firing for {service}/{label}: {rule['metric']}={value:g}")
+        elif alert is not None:
+            self._resolve(key, timestamp)
+
+    def _prune(self, now: float):
+        """Forget series, counters and labels with nothing newer than the window; call with the lock held"""
+        horizon = now - self.window
+        for key in [key for key, points in self._series.items() if points[-1][0] < horizon]:
+            del self._series[key]
+        for key in [key for key, (timestamp, _) in self._counters.items() if timestamp < horizon]:
+            del self._counters[key]
+        for key in [key for key, (_, timestamp) in self._labels.items() if timestamp < horizon]:
+            del self._labels[key]
+        self._pruned_at = now
+
+    def _resolve(self, key: Tuple[str, str, str], timestamp: float):
+        alert = self._alerts.pop(key)
+        if alert["firing"]:
+            self.history.append({**alert, "firing": False, "resolved_at": timestamp})
+            logger.info(f"Alert {alert['rule']} resolved for {alert['service']}/{alert['label']}")
+
+    def alerts(self) -> Dict[str, Any]:
+        """Firing and pending alerts; those whose series stopped reporting are resolved"""
+        now = time.time()
+        with self._lock:
+            for key, alert in list(self._alerts.items()):
+                if now - alert["last_seen"] > self.stale_seconds:
+                    self._resolve(key, now)
+            active = [dict(alert) for alert in self._alerts.values()]
+            history = list(self.history)
+        return {
+            "firing": [alert for alert in active if alert["firing"]],
+            "pending": [alert for alert in active if not alert["firing"]],
+            "history": history
+        }
+
+    def summary(self, service: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Latest value and window min/avg/max of every series"""
+        with self._lock:
+            self._prune(time.time())
+            series = [(key, list(points)) for key, points in self._series.items()
+                      if service is None or key[0] == service]
+        result = []
+        for (series_service, label, metric), points in sorted(series):
+            values = [value for _, value in points]
+            result.append({
+                "service": series_service,
+                "label": label,
+                "metric": metric,
+                "timestamp": points[-1][0],
+                "value": values[-1],
+                "min": min(values),
+                "avg": sum(values) / len(values),
+                "max": max(values),
+                "points": len(values)
+            })
+        return result
+
+    def points(self, service: str, metric: str, label: Optional[str] = None,
+               since: Optional[float] = None) -> Dict[str, List[List[float]]]:
+        """[timestamp, value] pairs of a metric, per label"""
+        with self._lock:
+            return {
+                key[1]: [[t, v] for t, v in points if since is None or t >= since]
+                for key, points in self._series.items()
+                if key[0] == service and key[2] == metric and (label is None or key[1] == label)
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "parsers": [{"name": p.name, "services": sorted(p.services)} for p in self.parsers],
+            "lines": self.lines,
+            "matched": self.matched,
+            "series": len(self._series)
+        }
+
+# Singleton instance
+media_metrics = MediaMetrics()
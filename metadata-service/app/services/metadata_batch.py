@@ -0,0 +1,85 @@
+# app/services/metadata_batch.py
+
+"""
+Batch reads and writes of metadata documents.
+
+Items are fanned out over a bounded pool of MinIO requests; each item gets
+its own result so one failure doesn't fail the batch.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List
+
+from app.core.config import MINIO_METADATA_BUCKET, STORAGE_BATCH_CONCURRENCY
+from app.core.logger import setup_logger
+from app.core.minio_client import MinIOClient
+from app.services.listing import prefix_summaries
+from app.services.metadata_cache import metadata_cache
+from app.services.search_index import search_index
+
+logger = setup_logger("metadata_batch")
+
+# Bounds concurrent MinIO requests across all batch calls
+batch_executor = ThreadPoolExecutor(max_workers=STORAGE_BATCH_CONCURRENCY, thread_name_prefix="metadata-batch")
+
+def metadata_key(key: str) -> str:
+    """Metadata documents are always stored with a .json extension"""
+    return key if key.endswith(".json") else f"{key}.json"
+
+def _get_one(minio: MinIOClient, key: str) -> Dict[str, Any]:
+    try:
+        data = metadata_cache.load_json(minio, MINIO_METADATA_BUCKET, key)
+    except Exception as e:
+        logger.error(f"Batch get of {key} failed: {e}")
+        return {"key": key, "status": "error", "error": str(e)}
+    if data is None:
+        return {"key": key, "status": "not_found"}
+    return {"key": key, "status": "success", "data": data}
+
+def _save_one(minio: MinIOClient, key: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        if "timestamp" not in data:
+            data["timestamp"] = datetime.utcnow().isoformat()
+        success = metadata_cache.put_json(minio, MINIO_METADATA_BUCKET, key, data)
+        prefix_summaries.invalidate(MINIO_METADATA_BUCKET, key)
+        if success:
+            search_index.index_document(MINIO_METADATA_BUCKET, key, data)
+    except Exception as e:
+        logger.error(f"Batch save of {key} failed: {e}")
+        return {"key": key, "status": "error", "error": str(e)}
+    if not success:
+        return {"key": key, "status": "error", "error": "Failed to save metadata"}
+    return {"key": key, "status": "success"}
+
+async def _fan_out(calls) -> AsyncIterator[Dict[str, Any]]:
+    loop = asyncio.get_running_loop()
+    futures = [loop.run_in_executor(batch_executor, fn, *args) for fn, *args in calls]
+    try:
+        for future in asyncio.as_completed(futures):
+            yield await future
+    finally:
+        # Client went away: skip whatever hasn't started yet
+        for future in futures:
+            future.cancel()
+
+def iter_batch_get(minio: MinIOClient, keys: List[str]) -> AsyncIterator[Dict[str, Any]]:
+    """Yield one result per distinct key as the reads complete"""
+    unique = dict.fromkeys(metadata_key(key) for key in keys)
+    return _fan_out([(_get_one, minio, key) for key in unique])
+
+def iter_batch_save(minio: MinIOClient, documents: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """Yield one result per {"key", "data"} document as the writes complete"""
+    return _fan_out([(_save_one, minio, metadata_key(doc["key"]), doc["data"]) for doc in documents])
+
+async def collect(results: AsyncIterator[Dict[str, Any]], keys: List[str]) -> Dict[str, Any]:
+    """Gather streamed results back into request order with per-status counts"""
+    by_key = {}
+    async for result in results:
+        by_key[result["key"]] = result
+    ordered = [by_key[metadata_key(key)] for key in keys]
+    counts: Dict[str, int] = {}
+    for result in ordered:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {"results": ordered, "counts": counts}
@@ -0,0 +1,112 @@
+# app/services/metadata_cache.py
+
+"""
+Read-through cache of parsed JSON documents stored in MinIO.
+
+Writes made through this module invalidate the local entry and, when
+METADATA_CACHE_INVALIDATION is enabled, are broadcast on a fanout exchange
+so other processes (API replicas, finalizer workers) drop theirs too.
+"""
+
+import copy
+import json
+import uuid
+from typing import Any, Dict, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import (
+    METADATA_CACHE_MAX_BYTES, METADATA_CACHE_TTL,
+    METADATA_CACHE_INVALIDATION, EXCHANGE_CACHE_INVALIDATION
+)
+from app.core.logger import setup_logger
+from app.core.minio_client import MinIOClient
+from app.services.rabbitmq_service import FanoutPublisher, FanoutSubscriber
+
+logger = setup_logger("metadata_cache")
+
+class MetadataCache:
+    def __init__(self, max_bytes: int = METADATA_CACHE_MAX_BYTES, ttl: float = METADATA_CACHE_TTL,
+                 broadcast: bool = METADATA_CACHE_INVALIDATION):
+        self.cache = LRUCache(max_bytes, ttl)
+        self.broadcast = broadcast
+        self.origin = uuid.uuid4().hex
+        self._publisher: Optional[FanoutPublisher] = None
+        self._subscriber: Optional[FanoutSubscriber] = None
+        self.remote_invalidations = 0
+        # Bumped by every invalidation; a read that raced one must not be cached
+        self._generation = 0
+
+    def start(self):
+        """Listen for invalidations from other processes"""
+        if self.broadcast and self._subscriber is None:
+            self._subscriber = FanoutSubscriber(EXCHANGE_CACHE_INVALIDATION, self._on_invalidation)
+            self._subscriber.start()
+
+    def stop(self):
+        if self._subscriber is not None:
+            self._subscriber.stop()
+            self._subscriber = None
+        if self._publisher is not None:
+            self._publisher.close()
+            self._publisher = None
+
+    def get_json(self, minio: MinIOClient, bucket_name: str, object_name: str) -> Optional[Dict[str, Any]]:
+        """Get a parsed JSON document, from cache when possible"""
+        try:
+            return self.load_json(minio, bucket_name, object_name)
+        except Exception as e:
+            logger.error(f"Failed to load JSON from {bucket_name}/{object_name}: {e}")
+            return None
+
+    def load_json(self, minio: MinIOClient, bucket_name: str, object_name: str) -> Optional[Dict[str, Any]]:
+        """Like get_json, but only a missing document yields None; other failures raise"""
+        key = (bucket_name, object_name)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        generation = self._generation
+        raw = minio.fetch_file(bucket_name, object_name)
+        if raw is None:
+            return None
+        data = json.loads(raw.decode("utf-8"))
+
+        # A write or invalidation since the fetch started may have made this copy stale
+        if generation == self._generation:
+            self.cache.set(key, data, len(raw))
+        return copy.deepcopy(data)
+
+    def put_json(self, minio: MinIOClient, bucket_name: str, object_name: str, data: Dict[str, Any]) -> bool:
+        """Write a JSON document to MinIO and invalidate cached copies"""
+        success = minio.upload_json(bucket_name=bucket_name, object_name=object_name, data=data)
+        self.invalidate(bucket_name, object_name)
+        return success
+
+    def invalidate(self, bucket_name: str, object_name: str):
+        """
+        Drop a document here and, if enabled, in every other process. The
+        broadcast is queued for a background thread, so this never blocks.
+        """
+        self._generation += 1
+        self.cache.invalidate((bucket_name, object_name))
+        if self.broadcast:
+            if self._publisher is None:
+                self._publisher = FanoutPublisher(EXCHANGE_CACHE_INVALIDATION)
+            self._publisher.publish_nowait({"origin": self.origin, "bucket": bucket_name, "object": object_name})
+
+    def _on_invalidation(self, message: Dict[str, Any]):
+        if message.get("origin") == self.origin:
+            return
+        self._generation += 1
+        if self.cache.invalidate((message["bucket"], message["object"])):
+            self.remote_invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.cache.stats(),
+            "broadcast": self.broadcast,
+            "remote_invalidations": self.remote_invalidations
+        }
+
+# Singleton instance
+metadata_cache = MetadataCache()
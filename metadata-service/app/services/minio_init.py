@@ -1,7 +1,7 @@
-from app.core.minio_client import MinIOClient
+from app.core.minio_client import get_minio_client
 from app.core.config import (
     MINIO_METADATA_BUCKET, MINIO_ASSETS_BUCKET, MINIO_RTMP_BUCKET, 
-    MINIO_OBS_BUCKET, THUMBNAIL_OBJECT_PREFIX, METADATA_OBJECT_PREFIX,
+    MINIO_OBS_BUCKET, LOG_ARCHIVE_BUCKET, THUMBNAIL_OBJECT_PREFIX, METADATA_OBJECT_PREFIX,
     JOBS_OBJECT_PREFIX, LOG_OBJECT_PREFIX, PROJECT_NAME, VERSION
 )
 from app.core.logger import setup_logger
@@ -16,14 +16,15 @@ async def initialize_minio():
     log_streamer.info("Starting MinIO initialization")
     
     # Create client
-    minio_client = MinIOClient()
+    minio_client = get_minio_client()
     
     # Create default buckets
     service_buckets = [
         MINIO_METADATA_BUCKET,
         MINIO_ASSETS_BUCKET,
         MINIO_RTMP_BUCKET,
-        MINIO_OBS_BUCKET
+        MINIO_OBS_BUCKET,
+        LOG_ARCHIVE_BUCKET
     ]
     
     for bucket in service_buckets:
@@ -0,0 +1,59 @@
+# app/services/presign.py
+
+"""
+Presigned MinIO URLs, so clients can move object bytes without going
+through this service.
+
+URLs are signed for MINIO_PUBLIC_ENDPOINT (the host is part of the
+signature) and cached per object. A cached URL is handed out again until
+half of its validity has passed, so every URL given to a client stays
+valid for at least PRESIGN_EXPIRY_SECONDS / 2.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import (
+    MINIO_PUBLIC_ENDPOINT, MINIO_PUBLIC_SECURE, PRESIGN_EXPIRY_SECONDS, PRESIGN_CACHE_MAX_ENTRIES
+)
+from app.core.minio_client import MinIOClient
+
+PRESIGN_METHODS = ("GET", "PUT")
+
+class Presigner:
+    def __init__(self, expires_seconds: int = PRESIGN_EXPIRY_SECONDS, max_entries: int = PRESIGN_CACHE_MAX_ENTRIES):
+        self.expires_seconds = expires_seconds
+        self.signer = MinIOClient(endpoint=MINIO_PUBLIC_ENDPOINT, secure=MINIO_PUBLIC_SECURE)
+        # Every entry has size 1, so the byte bound acts as an entry bound
+        self.cache = LRUCache(max_bytes=max_entries, ttl=expires_seconds / 2)
+
+    def sign(self, method: str, bucket_name: str, object_name: str,
+             expires_seconds: Optional[int] = None) -> Dict[str, Any]:
+        """Get a presigned URL and the time it expires, reusing a cached signature when possible"""
+        method = method.upper()
+        if method not in PRESIGN_METHODS:
+            raise ValueError(f"Unsupported presign method: {method}")
+        expires_seconds = expires_seconds or self.expires_seconds
+
+        key = (method, bucket_name, object_name, expires_seconds)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        url = self.signer.presigned_url(method, bucket_name, object_name, expires_seconds)
+        signed = {
+            "method": method,
+            "bucket": bucket_name,
+            "object": object_name,
+            "url": url,
+            "expires_at": time.time() + expires_seconds
+        }
+        self.cache.set(key, signed, 1, ttl=expires_seconds / 2)
+        return signed
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+# Singleton instance
+presigner = Presigner()
@@ -0,0 +1,195 @@
+# app/services/progress.py
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.core.config import (
+    PROGRESS_MIN_INTERVAL, PROGRESS_RETENTION_SECONDS,
+    PROGRESS_SUBSCRIBER_QUEUE_SIZE, PROGRESS_KEEPALIVE_SECONDS
+)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+class ProgressSubscription:
+    """A single SSE consumer of progress updates"""
+
+    def __init__(self, job_id: Optional[str], maxsize: int = PROGRESS_SUBSCRIBER_QUEUE_SIZE):
+        self.job_id = job_id
+        self.queue: "asyncio.Queue[Tuple[str, bool]]" = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, payload: str, terminal: bool):
+        """Queue an update, dropping the oldest one if the consumer is lagging"""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait((payload, terminal))
+
+class ProgressTracker:
+    """
+    In-memory per-job progress state with fan-out to subscribers.
+
+    Updates may come from executor threads (ffmpeg, hashing); they are
+    serialized once and handed to the event loop for delivery.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._last_sent: Dict[str, Tuple[float, Optional[str]]] = {}
+        self._subscribers: Dict[Optional[str], Set[ProgressSubscription]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Bind the event loop that subscribers live on"""
+        self._loop = loop
+
+    def update(
+        self,
+        job_id: str,
+        stage: str,
+        percent: Optional[float] = None,
+        fps: Optional[float] = None,
+        eta: Optional[float] = None,
+        status: str = "processing",
+        force: bool = False,
+        **extra: Any
+    ) -> Dict[str, Any]:
+        """Record the latest progress for a job and notify subscribers"""
+        now = time.time()
+        state = {
+            "job_id": job_id,
+            "status": status,
+            "stage": stage,
+            "percent": round(percent, 1) if percent is not None else None,
+            "fps": fps,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "updated_at": now,
+            **extra
+        }
+
+        with self._lock:
+            self._jobs[job_id] = state
+            last_time, last_stage = self._last_sent.get(job_id, (0.0, None))
+            # Coalesce bursts within a stage; stage changes always go out
+            if not force and stage == last_stage and now - last_time < PROGRESS_MIN_INTERVAL:
+                return state
+            self._last_sent[job_id] = (now, stage)
+            self._prune(now)
+
+        self._dispatch(job_id, state, status in TERMINAL_STATUSES)
+        return state
+
+    def finish(self, job_id: str, status: str = "completed", error: Optional[str] = None, **extra: Any):
+        """Mark a job as finished"""
+        if error is not None:
+            extra["error"] = error
+        stage = self._jobs.get(job_id, {}).get("stage", "done")
+        percent = 100.0 if status == "completed" else None
+        return self.update(job_id, stage, percent=percent, eta=0.0 if percent else None,
+                           status=status, force=True, **extra)
+
+    def apply(self, state: Dict[str, Any]):
+        """Apply a progress snapshot produced elsewhere (e.g. by a remote worker)"""
+        state = dict(state)
+        job_id = state.pop("job_id")
+        stage = state.pop("stage", "unknown")
+        state.pop("updated_at", None)
+        eta = state.pop("eta_seconds", None)
+        return self.update(job_id, stage, eta=eta, force=True, **state)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the latest progress for a job"""
+        return self._jobs.get(job_id)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Get the latest progress for all tracked jobs"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def subscribe(self, job_id: Optional[str] = None) -> ProgressSubscription:
+        """Subscribe to a single job, or to all jobs when job_id is None"""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        sub = ProgressSubscription(job_id)
+        self._subscribers.setdefault(job_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: ProgressSubscription):
+        subs = self._subscribers.get(sub.job_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                self._subscribers.pop(sub.job_id, None)
+
+    async def wait(self, job_id: str, idle_timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Wait until a job reaches a terminal status and return its final state.
+        Raises asyncio.TimeoutError if the job reports nothing for idle_timeout seconds.
+        """
+        sub = self.subscribe(job_id)
+        try:
+            state = self.get(job_id)
+            while state is None or state["status"] not in TERMINAL_STATUSES:
+                payload, _ = await asyncio.wait_for(sub.queue.get(), idle_timeout)
+                state = json.loads(payload)
+            return state
+        finally:
+            self.unsubscribe(sub)
+
+    async def stream(self, job_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield Server-Sent Events frames for one job or all jobs"""
+        sub = self.subscribe(job_id)
+        try:
+            current = [self.get(job_id)] if job_id else self.snapshot()
+            for state in current:
+                if state:
+                    yield f"data: {json.dumps(state, default=str)}\n\n"
+                    if job_id and state["status"] in TERMINAL_STATUSES:
+                        return
+
+            while True:
+                try:
+                    payload, terminal = await asyncio.wait_for(
+                        sub.queue.get(), timeout=PROGRESS_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield f"data: {payload}\n\n"
+                if job_id and terminal:
+                    return
+        finally:
+            self.unsubscribe(sub)
+
+    def _dispatch(self, job_id: str, state: Dict[str, Any], terminal: bool):
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._subscribers:
+            return
+        # Always go through the loop's queue so updates keep their order
+        payload = json.dumps(state, default=str)
+        loop.call_soon_threadsafe(self._fanout, job_id, payload, terminal)
+
+    def _fanout(self, job_id: str, payload: str, terminal: bool):
+        for key in (job_id, None):
+            for sub in list(self._subscribers.get(key, ())):
+                sub.offer(payload, terminal)
+
+    def _prune(self, now: float):
+        """Drop finished jobs that are past the retention window (lock held)"""
+        expired = [
+            job_id for job_id, state in self._jobs.items()
+            if state["status"] in TERMINAL_STATUSES
+            and now - state["updated_at"] > PROGRESS_RETENTION_SECONDS
+        ]
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+            self._last_sent.pop(job_id, None)
+
+# Singleton instance
+progress_tracker = ProgressTracker()
@@ -2,7 +2,9 @@ import os
 import json
 import pika
 import logging
-from typing import Dict
+import queue
+import threading
+from typing import Callable, Dict, Optional, Union
 
 logger = logging.getLogger("RabbitMQService")
 
@@ -10,10 +12,14 @@ RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'rabbitmq')
 RABBITMQ_USER = os.getenv('RABBITMQ_DEFAULT_USER', 'guest')
 RABBITMQ_PASS = os.getenv('RABBITMQ_DEFAULT_PASS', 'guest')
 
-def get_rabbitmq_connection():
+def get_rabbitmq_connection(heartbeat: Optional[int] = None):
     try:
         credentials = pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS)
-        parameters = pika.ConnectionParameters(host=RABBITMQ_HOST, credentials=credentials)
+        parameters = pika.ConnectionParameters(
+            host=RABBITMQ_HOST,
+            credentials=credentials,
+            heartbeat=heartbeat
+        )
         connection = pika.BlockingConnection(parameters)
         logger.info("Connected to RabbitMQ successfully.")
         return connection
@@ -34,7 +40,117 @@ def publish_message(queue: str, message: Dict):
                 delivery_mode=2,
             )
         )
-        logger.info(f"Published to '{queue}': {message}")
+        logger.info("Published to '%s': %s", queue, message)
         connection.close()
     except Exception as e:
-        logger.error(f"Failed to publish to '{queue}': {e}")
\ No newline at end of file
+        logger.error(f"Failed to publish to '{queue}': {e}")
+
+class FanoutPublisher:
+    """Publish transient messages to a fanout exchange over one long-lived connection."""
+
+    def __init__(self, exchange: str, backlog: int = 1000):
+        self.exchange = exchange
+        self._connection = None
+        self._channel = None
+        self._lock = threading.Lock()
+        # Messages handed to publish_nowait, sent by a background thread
+        self._pending: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=backlog)
+        self._sender: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def _get_channel(self):
+        if self._connection is None or self._connection.is_closed:
+            self._connection = get_rabbitmq_connection()
+            self._channel = None
+        if self._channel is None or self._channel.is_closed:
+            self._channel = self._connection.channel()
+            self._channel.exchange_declare(exchange=self.exchange, exchange_type="fanout")
+        return self._channel
+
+    def publish(self, message: Union[Dict, str]):
+        body = message if isinstance(message, str) else json.dumps(message, default=str)
+        with self._lock:
+            # One reconnect attempt covers connections dropped while idle
+            for attempt in (1, 2):
+                try:
+                    self._get_channel().basic_publish(exchange=self.exchange, routing_key="", body=body)
+                    return
+                except Exception as e:
+                    self._connection = None
+                    if attempt == 2:
+                        logger.error(f"Failed to publish to exchange '{self.exchange}': {e}")
+
+    def publish_nowait(self, message: Union[Dict, str]):
+        """Queue a message for a background thread to publish; never blocks the caller"""
+        body = message if isinstance(message, str) else json.dumps(message, default=str)
+        with self._lock:
+            if self._sender is None or not self._sender.is_alive():
+                self._sender = threading.Thread(target=self._send_pending, name=f"fanout-pub-{self.exchange}", daemon=True)
+                self._sender.start()
+        try:
+            self._pending.put_nowait(body)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Dropped message for exchange '{self.exchange}': {self._pending.maxsize} already pending")
+
+    def _send_pending(self):
+        while True:
+            body = self._pending.get()
+            if body is None:
+                return
+            self.publish(body)
+
+    def close(self):
+        if self._sender is not None and self._sender.is_alive():
+            self._pending.put(None)
+            self._sender.join(timeout=2)
+        self._sender = None
+        with self._lock:
+            if self._connection is not None and self._connection.is_open:
+                self._connection.close()
+            self._connection = None
+
+class FanoutSubscriber:
+    """Consume a fanout exchange on a background thread, reconnecting on failure."""
+
+    def __init__(self, exchange: str, callback: Callable[[Dict], None], reconnect_delay: float = 5.0):
+        self.exchange = exchange
+        self.callback = callback
+        self.reconnect_delay = reconnect_delay
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"fanout-{self.exchange}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                connection = get_rabbitmq_connection(heartbeat=60)
+                channel = connection.channel()
+                channel.exchange_declare(exchange=self.exchange, exchange_type="fanout")
+                queue = channel.queue_declare(queue="", exclusive=True).method.queue
+                channel.queue_bind(queue=queue, exchange=self.exchange)
+
+                for method, _props, body in channel.consume(queue, auto_ack=True, inactivity_timeout=1):
+                    if self._stop.is_set():
+                        break
+                    if method is None:
+                        continue
+                    try:
+                        self.callback(json.loads(body))
+                    except Exception as e:
+                        logger.warning(f"Subscriber callback for '{self.exchange}' failed: {e}")
+                connection.close()
+            except Exception as e:
+                logger.warning(f"Subscription to '{self.exchange}' lost: {e}")
+                self._stop.wait(self.reconnect_delay)
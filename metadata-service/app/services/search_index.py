@@ -0,0 +1,494 @@
+# app/services/search_index.py
+
+"""
+In-memory search index over the metadata documents in MinIO.
+
+Title and description tokens and tags go into inverted indexes (term ->
+doc ids); generated_at, duration and sha256 go into sorted lists so ranges,
+prefixes and ordered results are a bisect away. Documents are re-indexed as
+they are written through this service, and the indexed fields (not the
+postings, which are cheap to derive) are saved to disk periodically, so a
+restart doesn't touch MinIO. The index can always be rebuilt from the
+documents in MinIO.
+"""
+
+import asyncio
+import bisect
+import gzip
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.core.config import (
+    MINIO_METADATA_BUCKET, METADATA_OBJECT_PREFIX, STORAGE_BATCH_CONCURRENCY,
+    SEARCH_INDEX_PATH, SEARCH_INDEX_FLUSH_INTERVAL
+)
+from app.core.logger import setup_logger
+from app.core.minio_client import MinIOClient
+
+logger = setup_logger("search_index")
+
+INDEX_VERSION = 2  # 2: only metadata/ documents (earlier saves also held log indexes)
+SORT_FIELDS = ("generated_at", "duration")
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_RELATIVE = re.compile(r"^(\d+)([smhdw])$")
+_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+def tokenize(text: str) -> Set[str]:
+    return set(_TOKEN.findall(text.lower()))
+
+def normalize_tag(tag: str) -> str:
+    return " ".join(tag.lower().split())
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds from an ISO 8601 timestamp or a relative age like "7d" or "12h" """
+    if value is None or value == "":
+        return None
+    match = _RELATIVE.match(value.strip())
+    if match:
+        age = timedelta(**{_UNITS[match.group(2)]: int(match.group(1))})
+        return time.time() - age.total_seconds()
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid time: {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def _parse_duration(doc: Dict[str, Any]) -> Optional[float]:
+    # ffprobe-style documents keep it under format.duration
+    value = doc.get("duration", doc.get("duration_seconds"))
+    if value is None and isinstance(doc.get("format"), dict):
+        value = doc["format"].get("duration")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def extract_fields(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """The indexed subset of a metadata document"""
+    tags = []
+    for field in ("tags", "keywords"):
+        values = doc.get(field)
+        if isinstance(values, list):
+            tags.extend(str(v) for v in values)
+    try:
+        generated_at = parse_time(doc.get("generated_at") or doc.get("timestamp"))
+    except ValueError:
+        generated_at = None
+    sha256 = doc.get("sha256_hash") or doc.get("sha256")
+    return {
+        "title": str(doc.get("title") or ""),
+        "description": str(doc.get("description") or ""),
+        "tags": tags,
+        "generated_at": generated_at,
+        "sha256": sha256.lower() if isinstance(sha256, str) else None,
+        "duration": _parse_duration(doc)
+    }
+
+# Written under metadata/ by minio_init, but it describes the host, not a video
+SYSTEM_INFO_OBJECT = f"{METADATA_OBJECT_PREFIX}system_info.json"
+
+def indexable(bucket_name: str, object_name: str) -> bool:
+    """Whether an object is a video's metadata document"""
+    return (
+        bucket_name == MINIO_METADATA_BUCKET
+        and object_name.startswith(METADATA_OBJECT_PREFIX)
+        and object_name.endswith(".json")
+        and object_name != SYSTEM_INFO_OBJECT
+    )
+
+class MetadataSearchIndex:
+    def __init__(self, path: str = SEARCH_INDEX_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._reset()
+        self.dirty = False
+        self.loaded_at: Optional[float] = None
+        self.rebuilding = False
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.last_rebuild: Optional[Dict[str, Any]] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _reset(self):
+        self._ids: Dict[str, int] = {}
+        self._docs: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        self._next_id = 0
+        self._terms: Dict[str, Set[int]] = {}
+        self._tags: Dict[str, Set[int]] = {}
+        # Sorted (value, doc id) pairs; documents without the field are left out
+        self._sorted: Dict[str, List[Tuple[Any, int]]] = {"generated_at": [], "duration": [], "sha256": []}
+        self._values: Dict[str, Dict[int, Any]] = {field: {} for field in self._sorted}
+
+    # Maintenance
+
+    def _add(self, name: str, fields: Dict[str, Any], bulk: bool = False):
+        """Index a document; bulk adds leave the sorted lists for _sort_all"""
+        doc_id = self._next_id
+        self._next_id += 1
+        self._ids[name] = doc_id
+        self._docs[doc_id] = (name, fields)
+        for term in tokenize(fields["title"]) | tokenize(fields["description"]):
+            self._terms.setdefault(term, set()).add(doc_id)
+        for tag in {normalize_tag(t) for t in fields["tags"]}:
+            self._tags.setdefault(tag, set()).add(doc_id)
+        for field, entries in self._sorted.items():
+            if fields[field] is not None:
+                self._values[field][doc_id] = fields[field]
+                if bulk:
+                    entries.append((fields[field], doc_id))
+                else:
+                    bisect.insort(entries, (fields[field], doc_id))
+
+    def _sort_all(self):
+        for entries in self._sorted.values():
+            entries.sort()
+
+    def _remove(self, name: str) -> bool:
+        doc_id = self._ids.pop(name, None)
+        if doc_id is None:
+            return False
+        _, fields = self._docs.pop(doc_id)
+        for postings, keys in (
+            (self._terms, tokenize(fields["title"]) | tokenize(fields["description"])),
+            (self._tags, {normalize_tag(t) for t in fields["tags"]})
+        ):
+            for key in keys:
+                ids = postings.get(key)
+                if ids is not None:
+                    ids.discard(doc_id)
+                    if not ids:
+                        del postings[key]
+        for field, entries in self._sorted.items():
+            if fields[field] is not None:
+                del self._values[field][doc_id]
+                i = bisect.bisect_left(entries, (fields[field], doc_id))
+                if i < len(entries) and entries[i] == (fields[field], doc_id):
+                    del entries[i]
+        return True
+
+    def index_document(self, bucket_name: str, object_name: str, doc: Dict[str, Any]):
+        """Add or replace a document; objects that aren't metadata documents are ignored"""
+        if not indexable(bucket_name, object_name) or not isinstance(doc, dict):
+            return
+        fields = extract_fields(doc)
+        with self._lock:
+            self._remove(object_name)
+            self._add(object_name, fields)
+            if self.rebuilding:
+                self._pending[object_name] = fields
+            self.dirty = True
+
+    def remove_document(self, bucket_name: str, object_name: str):
+        if not indexable(bucket_name, object_name):
+            return
+        with self._lock:
+            if self.rebuilding:
+                self._pending[object_name] = None
+            if self._remove(object_name):
+                self.dirty = True
+
+    def refresh(self, minio: MinIOClient, bucket_name: str, object_name: str):
+        """Re-read a document that changed outside the metadata write paths"""
+        if not indexable(bucket_name, object_name):
+            return
+        try:
+            raw = minio.fetch_file(bucket_name, object_name)
+            if raw is None:
+                self.remove_document(bucket_name, object_name)
+            else:
+                self.index_document(bucket_name, object_name, json.loads(raw.decode("utf-8")))
+        except Exception as e:
+            logger.warning(f"Failed to re-index {object_name}: {e}")
+
+    # Queries
+
+    def _bounds(self, field: str, low: Any = None, high: Any = None) -> Tuple[int, int]:
+        """Slice of a sorted index holding values in [low, high]"""
+        entries = self._sorted[field]
+        start = 0 if low is None else bisect.bisect_left(entries, (low, -1))
+        end = len(entries) if high is None else bisect.bisect_right(entries, (high, float("inf")))
+        return start, max(start, end)
+
+    def _prefix(self, field: str, prefix: str) -> Set[int]:
+        entries = self._sorted[field]
+        ids = set()
+        for value, doc_id in entries[bisect.bisect_left(entries, (prefix, -1)):]:
+            if not value.startswith(prefix):
+                break
+            ids.add(doc_id)
+        return ids
+
+    def _ordered(self, candidates: Optional[Set[int]], sort: str, wanted: int) -> Iterable[int]:
+        """Candidate ids in sort order (documents without the field last); None means every document"""
+        field = sort.lstrip("-")
+        descending = sort.startswith("-")
+        entries = self._sorted[field]
+        values = self._values[field]
+        if candidates is not None and len(candidates) < wanted * len(entries) / max(len(candidates), 1):
+            # Few matches: selecting the top ones beats walking the index until they turn up
+            present = [i for i in candidates if i in values]
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            top = pick(wanted, present, key=lambda i: (values[i], i))
+            if len(top) >= wanted:
+                return top
+            return top + [i for i in candidates if i not in values]
+        walk = (doc_id for _, doc_id in (reversed(entries) if descending else entries))
+        pool = self._docs if candidates is None else candidates
+        unsorted = (i for i in pool if i not in values)
+        if candidates is None:
+            return itertools.chain(walk, unsorted)
+        return itertools.chain((i for i in walk if i in candidates), unsorted)
+
+    def search(
+        self,
+        q: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        sha256: Optional[str] = None,
+        sort: str = "-generated_at",
+        limit: int = 50,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Documents matching every given filter: all query tokens (title or
+        description), all tags, the time and duration ranges and the sha256
+        prefix.
+        """
+        if sort.lstrip("-") not in SORT_FIELDS:
+            raise ValueError(f"Unsupported sort: {sort}")
+        started = time.perf_counter()
+        with self._lock:
+            sets: List[Set[int]] = []
+            for term in tokenize(q or ""):
+                sets.append(self._terms.get(term, set()))
+            for tag in tags or []:
+                sets.append(self._tags.get(normalize_tag(tag), set()))
+            if sha256:
+                sets.append(self._prefix("sha256", sha256.lower()))
+
+            ranges = []
+            for field, low, high in (("generated_at", since, until), ("duration", min_duration, max_duration)):
+                if low is not None or high is not None:
+                    ranges.append((field, low, high, self._bounds(field, low, high)))
+            # A range narrower than every set is a cheap starting point; wider ones become filters
+            smallest = min((len(ids) for ids in sets), default=None)
+            filters = []
+            for field, low, high, (start, end) in ranges:
+                if smallest is None or end - start < smallest:
+                    sets.append({doc_id for _, doc_id in self._sorted[field][start:end]})
+                    smallest = end - start if smallest is None else min(smallest, end - start)
+                else:
+                    filters.append((field, low, high))
+
+            candidates: Optional[Set[int]] = None
+            if sets:
+                # Intersect smallest first so each step shrinks the work
+                sets.sort(key=len)
+                candidates = sets[0] if len(sets) == 1 else sets[0] & sets[1]
+                for ids in sets[2:]:
+                    if not candidates:
+                        break
+                    candidates = candidates & ids
+                for field, low, high in filters:
+                    values = self._values[field]
+                    candidates = {
+                        i for i in candidates
+                        if i in values and (low is None or values[i] >= low) and (high is None or values[i] <= high)
+                    }
+
+            total = len(self._docs) if candidates is None else len(candidates)
+            hits = [self._hit(doc_id) for doc_id in
+                    itertools.islice(self._ordered(candidates, sort, offset + limit), offset, offset + limit)]
+
+        return {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "hits": hits,
+            "took_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+
+    def _hit(self, doc_id: int) -> Dict[str, Any]:
+        name, fields = self._docs[doc_id]
+        generated_at = fields["generated_at"]
+        return {
+            "key": name,
+            "title": fields["title"],
+            "tags": fields["tags"],
+            "generated_at": datetime.fromtimestamp(generated_at, timezone.utc).isoformat().replace("+00:00", "Z")
+            if generated_at is not None else None,
+            "duration": fields["duration"],
+            "sha256": fields["sha256"]
+        }
+
+    # Persistence
+
+    def save(self):
+        """Write the indexed fields to disk atomically"""
+        with self._lock:
+            docs = [[name, f["title"], f["description"], f["tags"], f["generated_at"], f["sha256"], f["duration"]]
+                    for name, f in self._docs.values()]
+            self.dirty = False
+        payload = json.dumps({"version": INDEX_VERSION, "docs": docs}, separators=(",", ":")).encode("utf-8")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with gzip.open(tmp, "wb", compresslevel=1) as f:
+            f.write(payload)
+        os.replace(tmp, self.path)
+        logger.info(f"Saved search index with {len(docs)} documents to {self.path}")
+
+    def load(self) -> bool:
+        """Load a saved index; False if there is none or it can't be used"""
+        with self._building():
+            try:
+                with gzip.open(self.path, "rb") as f:
+                    data = json.loads(f.read())
+            except FileNotFoundError:
+                return False
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable search index {self.path}: {e}")
+                return False
+            if data.get("version") != INDEX_VERSION:
+                logger.warning(f"Ignoring search index {self.path} with version {data.get('version')}")
+                return False
+
+            fresh = MetadataSearchIndex(self.path)
+            for name, title, description, tags, generated_at, sha256, duration in data["docs"]:
+                fresh._add(name, {
+                    "title": title, "description": description, "tags": tags,
+                    "generated_at": generated_at, "sha256": sha256, "duration": duration
+                }, bulk=True)
+            fresh._sort_all()
+            self._swap(fresh)
+            self.loaded_at = time.time()
+        logger.info(f"Loaded search index with {len(data['docs'])} documents from {self.path}")
+        return True
+
+    @contextmanager
+    def _building(self) -> Iterator[None]:
+        """
+        Build a replacement index aside while searches keep using this one.
+
+        Writes made meanwhile are applied here as usual and also recorded, so
+        _swap can replay them onto the replacement.
+        """
+        with self._lock:
+            if self.rebuilding:
+                raise RuntimeError("A search index rebuild is already running")
+            self.rebuilding = True
+            self._pending = {}
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.rebuilding = False
+                self._pending = {}
+
+    def _swap(self, fresh: "MetadataSearchIndex"):
+        with self._lock:
+            # Writes that landed during the build win over what was built
+            for name, fields in self._pending.items():
+                fresh._remove(name)
+                if fields is not None:
+                    fresh._add(name, fields)
+            self.dirty = bool(self._pending)
+            self._ids, self._docs, self._next_id = fresh._ids, fresh._docs, fresh._next_id
+            self._terms, self._tags = fresh._terms, fresh._tags
+            self._sorted, self._values = fresh._sorted, fresh._values
+
+    def rebuild(self, minio: MinIOClient) -> Dict[str, Any]:
+        """Re-index every metadata document in MinIO, replacing the current index"""
+        started = time.perf_counter()
+        with self._building():
+            names = [obj["name"] for obj in minio.iter_objects(MINIO_METADATA_BUCKET, prefix=METADATA_OBJECT_PREFIX)
+                     if indexable(MINIO_METADATA_BUCKET, obj["name"])]
+
+            def fetch(name: str):
+                try:
+                    raw = minio.fetch_file(MINIO_METADATA_BUCKET, name)
+                    return name, json.loads(raw.decode("utf-8")) if raw is not None else None
+                except Exception as e:
+                    logger.warning(f"Skipping {name} during search index rebuild: {e}")
+                    return name, None
+
+            fresh = MetadataSearchIndex(self.path)
+            failed = 0
+            with ThreadPoolExecutor(max_workers=STORAGE_BATCH_CONCURRENCY, thread_name_prefix="search-rebuild") as pool:
+                for name, doc in pool.map(fetch, names):
+                    if isinstance(doc, dict):
+                        fresh._add(name, extract_fields(doc), bulk=True)
+                    else:
+                        failed += 1
+            fresh._sort_all()
+            self._swap(fresh)
+            # The rebuilt index hasn't been saved yet
+            self.dirty = True
+
+        self.last_rebuild = {
+            "documents": len(names) - failed,
+            "failed": failed,
+            "seconds": round(time.perf_counter() - started, 3),
+            "finished_at": datetime.utcnow().isoformat()
+        }
+        logger.info(f"Rebuilt search index: {self.last_rebuild}")
+        return self.last_rebuild
+
+    # Lifecycle
+
+    async def start(self, minio: MinIOClient):
+        """Load the saved index (rebuilding from MinIO if there is none) in the background and start periodic saves"""
+        asyncio.create_task(self._initial_load(minio))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop(minio))
+
+    async def stop(self, minio: MinIOClient):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self.dirty:
+            await minio.aio.run(self.save)
+
+    async def _initial_load(self, minio: MinIOClient):
+        try:
+            if not await minio.aio.run(self.load):
+                await minio.aio.run(self.rebuild, minio)
+        except Exception as e:
+            logger.error(f"Initial search index load failed: {e}")
+
+    async def _flush_loop(self, minio: MinIOClient):
+        while True:
+            await asyncio.sleep(SEARCH_INDEX_FLUSH_INTERVAL)
+            if self.dirty and not self.rebuilding:
+                try:
+                    await minio.aio.run(self.save)
+                except Exception as e:
+                    logger.error(f"Failed to save search index: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": len(self._docs),
+                "terms": len(self._terms),
+                "tags": len(self._tags),
+                "dirty": self.dirty,
+                "rebuilding": self.rebuilding,
+                "last_rebuild": self.last_rebuild,
+                "path": self.path
+            }
+
+# Singleton instance
+search_index = MetadataSearchIndex()
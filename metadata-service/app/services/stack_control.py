@@ -0,0 +1,352 @@
+# app/services/stack_control.py
+
+"""
+Dependency-ordered start, stop and restart of compose services.
+
+The dependency graph comes from `depends_on` in STACK_COMPOSE_FILES. A
+start takes the requested services plus everything they depend on, groups
+them into topological levels and starts each level in parallel. A level
+begins only once every service in the previous one is ready: healthy if
+its container has a healthcheck, otherwise running, or exited with 0 for a
+dependency declared `service_completed_successfully` (e.g. minio-init).
+A stop covers only the requested services, dependents first.
+
+Services are started and stopped through the compose CLI with --no-deps,
+since the ordering is done here, and readiness is read from the Docker
+API. The compose project is the one this API's own container belongs to,
+unless STACK_PROJECT_NAME names another; STACK_SELF_SERVICE, the service
+running this API, is left alone in both directions. Operations run in the background and report through the progress
+tracker; the final report has each service's timings, each level's and
+the total wall time, which for a start of the whole stack is its cold
+start time.
+"""
+
+import asyncio
+import json
+import shlex
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import yaml
+
+from app.core.config import (
+    HOSTNAME, CONTAINER_NAME, DOCKER_PROJECT_NAME, STACK_COMPOSE_FILES, STACK_PROJECT_NAME,
+    STACK_COMPOSE_COMMAND, STACK_READY_TIMEOUT, STACK_READY_POLL_INTERVAL, STACK_SELF_SERVICE
+)
+from app.core.docker_api import DockerAPI, DockerAPIError
+from app.core.logger import setup_logger
+from app.services.progress import progress_tracker, TERMINAL_STATUSES
+
+logger = setup_logger("stack_control")
+
+STACK_ACTIONS = ("start", "stop", "restart")
+COMPLETED_CONDITION = "service_completed_successfully"
+PROJECT_LABEL = "com.docker.compose.project"
+
+class ComposeService:
+    def __init__(self, name: str):
+        self.name = name
+        # Dependency -> depends_on condition
+        self.depends_on: Dict[str, str] = {}
+
+def load_compose_graph(paths: List[str]) -> Dict[str, ComposeService]:
+    """Services and their dependencies, merged across compose files in order"""
+    services: Dict[str, ComposeService] = {}
+    for path in paths:
+        with open(path) as f:
+            document = yaml.safe_load(f) or {}
+        for name, spec in (document.get("services") or {}).items():
+            service = services.setdefault(name, ComposeService(name))
+            depends_on = (spec or {}).get("depends_on") or {}
+            if isinstance(depends_on, list):
+                depends_on = {dependency: None for dependency in depends_on}
+            for dependency, options in depends_on.items():
+                service.depends_on[dependency] = (options or {}).get("condition", "service_started")
+    return services
+
+def dependency_levels(graph: Dict[str, ComposeService], services: List[str],
+                      with_dependencies: bool = True) -> List[List[str]]:
+    """
+    Group services into levels where every service's dependencies are in
+    earlier levels. Dependencies outside `services` are pulled in unless
+    with_dependencies is False, in which case they are only used for ordering.
+    """
+    selected: Set[str] = set()
+    pending = list(services)
+    while pending:
+        name = pending.pop()
+        if name in selected:
+            continue
+        if name not in graph:
+            raise ValueError(f"Unknown service: {name}")
+        selected.add(name)
+        if with_dependencies:
+            pending.extend(graph[name].depends_on)
+
+    for name in selected:
+        for dependency in graph[name].depends_on:
+            if dependency not in graph:
+                raise ValueError(f"{name} depends on unknown service {dependency}")
+
+    remaining = {name: {d for d in graph[name].depends_on if d in selected} for name in selected}
+    levels = []
+    while remaining:
+        level = sorted(name for name, dependencies in remaining.items() if not dependencies)
+        if not level:
+            raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+        levels.append(level)
+        for name in level:
+            del remaining[name]
+        for dependencies in remaining.values():
+            dependencies.difference_update(level)
+    return levels
+
+class StackOperation:
+    def __init__(self, action: str, services: List[str], graph: Dict[str, ComposeService]):
+        if action not in STACK_ACTIONS:
+            raise ValueError(f"Unknown stack action: {action}")
+        if not services:
+            raise ValueError("No services given")
+        self.id = f"stack-{uuid.uuid4().hex[:12]}"
+        self.action = action
+        self.services = list(services)
+        self.graph = graph
+        self.stop_levels = (
+            list(reversed(dependency_levels(graph, services, with_dependencies=False)))
+            if action in ("stop", "restart") else []
+        )
+        self.start_levels = dependency_levels(graph, services) if action in ("start", "restart") else []
+        # Services that some selected service waits on to exit successfully
+        self.completed = {
+            dependency
+            for level in self.start_levels for name in level
+            for dependency, condition in graph[name].depends_on.items() if condition == COMPLETED_CONDITION
+        }
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.levels: List[Dict[str, Any]] = []
+        self.started = time.monotonic()
+        self.total_seconds: Optional[float] = None
+        self.task: Optional["asyncio.Task[None]"] = None
+
+    def elapsed(self) -> float:
+        return round(time.monotonic() - self.started, 3)
+
+    def result(self, name: str, **fields: Any) -> Dict[str, Any]:
+        result = self.results.setdefault(name, {"service": name})
+        result.update(fields)
+        return result
+
+    def report(self, stage: str, status: str = "processing", force: bool = False, **extra: Any):
+        planned = len({name for level in self.stop_levels + self.start_levels for name in level})
+        done = sum(1 for result in self.results.values() if result.get("status") in ("ready", "stopped", "failed", "skipped"))
+        percent = 100.0 if status == "completed" else (done * 100.0 / planned if planned else None)
+        return progress_tracker.update(self.id, stage, percent=percent, status=status,
+                                       force=force or status in TERMINAL_STATUSES, **self._fields(), **extra)
+
+    def _fields(self) -> Dict[str, Any]:
+        return {
+            "operation": f"stack_{self.action}",
+            "services": self.services,
+            "plan": {"stop": self.stop_levels, "start": self.start_levels},
+            "results": [dict(result) for result in self.results.values()],
+            "levels": list(self.levels),
+            "total_seconds": self.total_seconds,
+            # Sum of every service's own time, what one-at-a-time calls would have taken at best
+            "serial_seconds": round(sum(result.get("seconds", 0) for result in self.results.values()), 3)
+        }
+
+class StackControl:
+    def __init__(
+        self,
+        compose_files: List[str] = STACK_COMPOSE_FILES,
+        project: str = STACK_PROJECT_NAME,
+        compose_command: str = STACK_COMPOSE_COMMAND,
+        api: Optional[DockerAPI] = None,
+        ready_timeout: float = STACK_READY_TIMEOUT,
+        poll_interval: float = STACK_READY_POLL_INTERVAL,
+        self_service: str = STACK_SELF_SERVICE
+    ):
+        self.compose_files = compose_files
+        # Found from this container's labels on first use when not given
+        self.project = project or None
+        self.compose_command = shlex.split(compose_command)
+        self.api = api or DockerAPI()
+        self.ready_timeout = ready_timeout
+        self.poll_interval = poll_interval
+        self.self_service = self_service
+        self.last_start: Optional[Dict[str, Any]] = None
+        self._operations: Dict[str, StackOperation] = {}
+
+    def graph(self) -> Dict[str, ComposeService]:
+        return load_compose_graph(self.compose_files)
+
+    def plan(self, action: str, services: Optional[List[str]] = None) -> StackOperation:
+        """An operation on the given services, or on every service in the compose files"""
+        graph = self.graph()
+        return StackOperation(action, services or sorted(graph), graph)
+
+    def start(self, operation: StackOperation) -> StackOperation:
+        """Run an operation in the background"""
+        running = self.running()
+        if running:
+            raise RuntimeError(f"Stack operation {running[0]} is still running")
+        self._prune()
+        self._operations[operation.id] = operation
+        operation.report("queued", status="queued", force=True)
+        operation.task = asyncio.create_task(self._run(operation))
+        return operation
+
+    def cancel(self, operation_id: str) -> bool:
+        operation = self._operations.get(operation_id)
+        if operation is None or operation.task is None or operation.task.done():
+            return False
+        operation.task.cancel()
+        return True
+
+    def running(self) -> List[str]:
+        return [op_id for op_id, op in self._operations.items() if op.task is not None and not op.task.done()]
+
+    def _prune(self):
+        for op_id in [op_id for op_id, op in self._operations.items() if op.task is not None and op.task.done()]:
+            del self._operations[op_id]
+
+    async def compose_project(self) -> str:
+        """The compose project to act on: configured, or the one this container was started in"""
+        if self.project is None:
+            for container in (CONTAINER_NAME, HOSTNAME):
+                try:
+                    labels = (await self.api.inspect(container)).get("Config", {}).get("Labels") or {}
+                except DockerAPIError:
+                    continue
+                if labels.get(PROJECT_LABEL):
+                    self.project = labels[PROJECT_LABEL]
+                    break
+            else:
+                logger.warning("Not running in a compose container; using project %s", DOCKER_PROJECT_NAME)
+                self.project = DOCKER_PROJECT_NAME
+        return self.project
+
+    async def _run(self, operation: StackOperation):
+        failed: Set[str] = set()
+        try:
+            for i, level in enumerate(operation.stop_levels):
+                await self._level(operation, "stopping", i, level, self._stop, failed)
+            failed.clear()
+            for i, level in enumerate(operation.start_levels):
+                await self._level(operation, "starting", i, level, self._start, failed)
+            operation.total_seconds = operation.elapsed()
+            status = "failed" if failed else "completed"
+            state = operation.report("done", status=status,
+                                     error=f"Failed: {', '.join(sorted(failed))}" if failed else None)
+            if operation.start_levels:
+                self.last_start = state
+            logger.info("Stack %s of %s %s in %.1fs", operation.action, ", ".join(operation.services),
+                        status, operation.total_seconds)
+        except asyncio.CancelledError:
+            operation.report("cancelled", status="failed", error="Cancelled")
+            raise
+        except Exception as e:
+            logger.error("Stack %s failed: %s", operation.action, e)
+            operation.report("error", status="failed", error=str(e))
+
+    async def _level(self, operation: StackOperation, stage: str, index: int, level: List[str], run, failed: Set[str]):
+        started = operation.elapsed()
+        runnable = []
+        for name in level:
+            blocked = sorted(d for d in operation.graph[name].depends_on if d in failed)
+            if stage == "starting" and blocked:
+                operation.result(name, level=index, status="skipped", error=f"Dependency failed: {', '.join(blocked)}")
+                failed.add(name)
+            elif name == self.self_service:
+                # Stopping it would end this operation, and `up -d` may recreate it
+                operation.result(name, level=index, status="skipped", error="Runs this API")
+            else:
+                operation.result(name, level=index, status=stage, error=None)
+                runnable.append(name)
+        operation.report(f"{stage} level {index}", force=True)
+        outcomes = await asyncio.gather(*(run(operation, name) for name in runnable), return_exceptions=True)
+        for name, outcome in zip(runnable, outcomes):
+            if isinstance(outcome, Exception):
+                failed.add(name)
+                operation.result(name, status="failed", error=str(outcome) or type(outcome).__name__)
+        operation.levels.append({"stage": stage, "services": level, "seconds": round(operation.elapsed() - started, 3)})
+        operation.report(f"{stage} level {index}", force=True)
+
+    async def _start(self, operation: StackOperation, name: str):
+        started = time.monotonic()
+        await self._compose("up", "-d", "--no-deps", name)
+        operation.result(name, status="waiting", command_seconds=round(time.monotonic() - started, 3))
+        operation.report(f"waiting for {name}")
+        ready = await self._wait_ready(name, name in operation.completed)
+        operation.result(name, status="ready", readiness=ready, seconds=round(time.monotonic() - started, 3),
+                         ready_at=operation.elapsed())
+
+    async def _stop(self, operation: StackOperation, name: str):
+        started = time.monotonic()
+        await self._compose("stop", name)
+        operation.result(name, status="stopped", seconds=round(time.monotonic() - started, 3),
+                         stopped_at=operation.elapsed())
+
+    async def _compose(self, *args: str):
+        command = [*self.compose_command, "-p", await self.compose_project()]
+        for path in self.compose_files:
+            command += ["-f", path]
+        process = await asyncio.create_subprocess_exec(
+            *command, *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
+        output, _ = await process.communicate()
+        if process.returncode != 0:
+            lines = output.decode("utf-8", "replace").strip().splitlines()
+            raise RuntimeError(f"{' '.join(args)} exited with {process.returncode}: {lines[-1] if lines else 'no output'}")
+
+    async def _container(self, name: str) -> Optional[Dict[str, Any]]:
+        labels = [f"{PROJECT_LABEL}={await self.compose_project()}", f"com.docker.compose.service={name}"]
+        containers = await self.api.get_json("/containers/json", {"all": 1, "filters": json.dumps({"label": labels})})
+        if not containers:
+            return None
+        return await self.api.inspect(containers[0]["Id"])
+
+    async def _wait_ready(self, name: str, completed: bool) -> str:
+        """Wait until the service's container is ready; returns what counted as ready"""
+        deadline = time.monotonic() + self.ready_timeout
+        while True:
+            ready, failure = self.readiness(await self._container(name), completed)
+            if ready:
+                return ready
+            if failure:
+                raise RuntimeError(failure)
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Not ready within {self.ready_timeout:g}s")
+            await asyncio.sleep(self.poll_interval)
+
+    @staticmethod
+    def readiness(container: Optional[Dict[str, Any]], completed: bool) -> Tuple[Optional[str], Optional[str]]:
+        """
+        (what counted as ready, None) once ready, (None, reason) once it
+        never will be, else (None, None). A service that something depends on
+        with service_completed_successfully is only ready once it has exited.
+        """
+        if container is None:
+            return None, None
+        state = container.get("State") or {}
+        if completed:
+            if state.get("Status") == "exited":
+                code = state.get("ExitCode")
+                return ("completed", None) if code == 0 else (None, f"Exited with {code}")
+            return None, None
+        if state.get("Status") in ("exited", "dead"):
+            # A one-shot service such as minio-init is done, even if nothing waits on it
+            code = state.get("ExitCode")
+            return ("completed", None) if code == 0 else (None, f"Exited with {code}")
+        health = (state.get("Health") or {}).get("Status")
+        if health == "healthy":
+            return "healthy", None
+        if health == "unhealthy":
+            return None, "Healthcheck reports unhealthy"
+        if health is None and state.get("Running"):
+            return "running", None
+        return None, None
+
+# Singleton instance
+stack_control = StackControl()
@@ -0,0 +1,243 @@
+# app/services/stream_probe.py
+
+"""
+Synthetic end-to-end stream probe.
+
+A run publishes a few seconds of ffmpeg's generated test pattern to the
+RTMP `probe` application under a unique stream name (STREAM_PROBE_PREFIX
+plus the publish time in milliseconds, which is also written into the
+stream's metadata) and measures, from the moment ffmpeg is started:
+
+  publish_to_hook      the on_publish hook for that stream reaching this service
+  publish_to_playlist  the broadcast HLS playlist listing its first segment
+  publish_to_segment   that segment being fetchable
+
+The probe application pushes straight to broadcast, so runs leave no
+recordings and start no transcode; their hooks are not forwarded as
+stream events either. Latencies go into LatencyMetrics for percentiles,
+and each run's result is kept for /health/stream. The health monitor runs
+it as a deep check.
+"""
+
+import asyncio
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from app.core.config import (
+    FFMPEG_PATH, STREAM_PROBE_RTMP_URL, STREAM_PROBE_HLS_URL, STREAM_PROBE_PREFIX, STREAM_PROBE_INTERVAL,
+    STREAM_PROBE_DURATION, STREAM_PROBE_TIMEOUT, STREAM_PROBE_POLL_INTERVAL, STREAM_PROBE_HISTORY
+)
+from app.core.logger import setup_logger
+from app.core.metrics import LatencyMetrics
+from app.core.singleflight import SingleFlight
+
+logger = setup_logger("stream_probe")
+
+# How long to keep waiting for the hook once the segment is there
+HOOK_GRACE_SECONDS = 2.0
+
+def fetch(url: str, timeout: float) -> Optional[bytes]:
+    """The body at url, or None while it does not exist yet"""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.read()
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+
+def first_segment(playlist: bytes) -> Optional[str]:
+    """The URI of the first media segment listed in an HLS playlist"""
+    for line in playlist.decode("utf-8", "replace").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            return line
+    return None
+
+class StreamProbe:
+    def __init__(
+        self,
+        rtmp_url: str = STREAM_PROBE_RTMP_URL,
+        hls_url: str = STREAM_PROBE_HLS_URL,
+        prefix: str = STREAM_PROBE_PREFIX,
+        duration: float = STREAM_PROBE_DURATION,
+        timeout: float = STREAM_PROBE_TIMEOUT,
+        poll_interval: float = STREAM_PROBE_POLL_INTERVAL,
+        interval: float = STREAM_PROBE_INTERVAL,
+        history: int = STREAM_PROBE_HISTORY
+    ):
+        self.rtmp_url = rtmp_url.rstrip("/")
+        self.hls_url = hls_url.rstrip("/")
+        self.prefix = prefix
+        self.duration = duration
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.interval = interval
+        self.metrics = LatencyMetrics(window=history)
+        self.results: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self.runs = 0
+        self.failures = 0
+        # Stream name -> (loop, future resolved with the perf_counter time its hook arrived)
+        self._hooks: Dict[str, Tuple[asyncio.AbstractEventLoop, "asyncio.Future[float]"]] = {}
+        self._flight = SingleFlight()
+        self._task: Optional[asyncio.Task] = None
+
+    def command(self, name: str, started_at: float) -> List[str]:
+        return [
+            FFMPEG_PATH, "-hide_banner", "-nostats", "-loglevel", "error",
+            "-re", "-f", "lavfi", "-i", "testsrc=size=640x360:rate=30",
+            "-t", f"{self.duration:g}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency", "-g", "30", "-pix_fmt", "yuv420p",
+            "-metadata", f"probe_started_at={started_at:.3f}",
+            "-f", "flv", f"{self.rtmp_url}/{name}"
+        ]
+
+    async def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _probe_loop(self):
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                logger.error("Stream probe failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def is_probe(self, name: Optional[str]) -> bool:
+        return bool(name) and name.startswith(self.prefix)
+
+    def observe_hook(self, name: Optional[str]):
+        """Note the arrival of an on_publish hook; ignores streams that are not a running probe"""
+        if not self.is_probe(name):
+            return
+        entry = self._hooks.get(name)
+        if entry is not None:
+            loop, future = entry
+            arrived = time.perf_counter()
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(arrived))
+
+    async def run(self) -> Dict[str, Any]:
+        """Run the probe, or wait for the run already in progress"""
+        return await self._flight.do("run", self._run)
+
+    async def _run(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        started_at = time.time()
+        name = f"{self.prefix}{int(started_at * 1000)}"
+        hook: "asyncio.Future[float]" = loop.create_future()
+        self._hooks[name] = (loop, hook)
+        result: Dict[str, Any] = {
+            "stream": name,
+            "started_at": started_at,
+            "ok": False,
+            "error": None,
+            "publish_to_hook_ms": None,
+            "publish_to_playlist_ms": None,
+            "publish_to_segment_ms": None,
+            "segment": None
+        }
+        start = time.perf_counter()
+        process = None
+        segment: Optional[asyncio.Future] = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self.command(name, started_at),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            segment = asyncio.ensure_future(self._wait_for_segment(name, start, result))
+            exited = asyncio.ensure_future(process.wait())
+            await asyncio.wait({segment, exited}, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not segment.done() and exited.done() and process.returncode != 0:
+                stderr = (await process.stderr.read()).decode("utf-8", "replace").strip().splitlines()
+                raise RuntimeError(f"ffmpeg exited with {process.returncode}: {stderr[-1] if stderr else 'no output'}")
+            # A publish that ended cleanly may still produce its segment when nginx closes the stream
+            await asyncio.wait_for(segment, max(self.timeout - (time.perf_counter() - start), 0))
+            if not hook.done():
+                try:
+                    await asyncio.wait_for(asyncio.shield(hook), HOOK_GRACE_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+            if hook.done():
+                result["publish_to_hook_ms"] = round((hook.result() - start) * 1000, 2)
+            result["ok"] = True
+        except asyncio.TimeoutError:
+            result["error"] = f"no HLS segment within {self.timeout:g}s"
+        except Exception as e:
+            result["error"] = str(e) or type(e).__name__
+        finally:
+            if segment is not None and not segment.done():
+                segment.cancel()
+            if process is not None:
+                await self._terminate(process)
+            self._hooks.pop(name, None)
+        self._record(result, time.perf_counter() - start)
+        return result
+
+    async def _wait_for_segment(self, name: str, start: float, result: Dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        playlist_url = f"{self.hls_url}/{name}.m3u8"
+        while True:
+            playlist = await loop.run_in_executor(None, fetch, playlist_url, self.timeout)
+            uri = first_segment(playlist) if playlist else None
+            if uri is not None:
+                if result["publish_to_playlist_ms"] is None:
+                    result["publish_to_playlist_ms"] = round((time.perf_counter() - start) * 1000, 2)
+                data = await loop.run_in_executor(None, fetch, urljoin(playlist_url, uri), self.timeout)
+                if data is not None:
+                    result["publish_to_segment_ms"] = round((time.perf_counter() - start) * 1000, 2)
+                    result["segment"] = {"uri": uri, "bytes": len(data)}
+                    return
+            await asyncio.sleep(self.poll_interval)
+
+    async def _terminate(self, process: "asyncio.subprocess.Process"):
+        if process.returncode is None:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), 5)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+
+    def _record(self, result: Dict[str, Any], seconds: float):
+        self.runs += 1
+        self.metrics.record("run", seconds, error=not result["ok"])
+        for metric in ("publish_to_hook", "publish_to_playlist", "publish_to_segment"):
+            value = result[f"{metric}_ms"]
+            if value is not None:
+                self.metrics.record(metric, value / 1000)
+        self.results.append(result)
+        if result["ok"]:
+            logger.info("Stream probe %s: segment after %.0f ms, hook after %s ms",
+                        result["stream"], result["publish_to_segment_ms"], result["publish_to_hook_ms"])
+        else:
+            self.failures += 1
+            logger.warning("Stream probe %s failed: %s", result["stream"], result["error"])
+
+    def history(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        results = list(self.results)
+        return results[-limit:] if limit else results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._flight.in_flight("run"),
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last": self.results[-1] if self.results else None,
+            "latency": self.metrics.snapshot()
+        }
+
+# Singleton instance
+stream_probe = StreamProbe()
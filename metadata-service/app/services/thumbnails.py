@@ -0,0 +1,164 @@
+# app/services/thumbnails.py
+
+"""
+Resized / re-encoded thumbnail derivatives, produced on demand.
+
+Lookup order: in-memory LRU, then the stored derivative in MinIO, then
+render from the source thumbnail and store the result. Concurrent requests
+for the same derivative share one lookup.
+"""
+
+import asyncio
+import hashlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow is optional; derivatives are disabled without it
+    Image = None
+    features = None
+
+from app.core.cache import LRUCache
+from app.core.config import (
+    MINIO_METADATA_BUCKET, THUMBNAIL_OBJECT_PREFIX, DERIVATIVE_OBJECT_PREFIX,
+    THUMB_MAX_DIMENSION, THUMB_DEFAULT_QUALITY, THUMB_MEMORY_CACHE_BYTES,
+    THUMB_MEMORY_CACHE_TTL, THUMB_WORKERS
+)
+from app.core.logger import setup_logger
+from app.core.minio_client import MinIOClient
+from app.core.singleflight import SingleFlight
+
+logger = setup_logger("thumbnails")
+
+FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+    "avif": ("AVIF", "image/avif"),
+}
+
+# Image decoding and encoding is CPU bound; keep it off the MinIO and default pools
+render_executor = ThreadPoolExecutor(max_workers=THUMB_WORKERS, thread_name_prefix="thumb")
+
+class DerivativeError(Exception):
+    """The requested derivative cannot be produced"""
+
+def available_formats() -> Tuple[str, ...]:
+    if Image is None:
+        return ()
+    return tuple(fmt for fmt in FORMATS if fmt == "jpeg" or features.check(fmt))
+
+def thumbnail_name(bucket_name: str, object_name: str) -> Optional[str]:
+    """Name of the source thumbnail an object is, or None if it is not one"""
+    if bucket_name == MINIO_METADATA_BUCKET and object_name.startswith(THUMBNAIL_OBJECT_PREFIX):
+        return object_name[len(THUMBNAIL_OBJECT_PREFIX):]
+    return None
+
+def derivative_prefix(thumb_name: str) -> str:
+    """Prefix holding every derivative of one thumbnail"""
+    return f"{DERIVATIVE_OBJECT_PREFIX}{THUMBNAIL_OBJECT_PREFIX}{thumb_name}/"
+
+def render(source: bytes, width: Optional[int], height: Optional[int], fmt: str, quality: int) -> bytes:
+    """Resize (keeping aspect ratio, never upscaling) and encode an image"""
+    image = Image.open(io.BytesIO(source))
+    box = (width or image.width, height or image.height)
+    # For JPEG sources, let the decoder downscale in the DCT domain first
+    image.draft("RGB", box)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGB")
+    image.thumbnail(box, Image.LANCZOS, reducing_gap=2.0)
+
+    pil_format, _ = FORMATS[fmt]
+    if pil_format == "JPEG" and image.mode == "RGBA":
+        image = image.convert("RGB")
+    out = io.BytesIO()
+    options: Dict[str, Any] = {"quality": quality}
+    if pil_format == "JPEG":
+        options.update(optimize=True, progressive=True)
+    elif pil_format == "WEBP":
+        options.update(method=4)
+    image.save(out, pil_format, **options)
+    return out.getvalue()
+
+class ThumbnailDerivatives:
+    def __init__(self):
+        self.cache = LRUCache(max_bytes=THUMB_MEMORY_CACHE_BYTES, ttl=THUMB_MEMORY_CACHE_TTL)
+        self.flights = SingleFlight()
+        self.rendered = 0
+        self.loaded = 0
+
+    def spec(self, thumb_name: str, width: Optional[int], height: Optional[int],
+             fmt: str, quality: Optional[int]) -> Tuple[str, int]:
+        """Validate a request and return the derivative's object name and quality"""
+        if Image is None:
+            raise DerivativeError("Thumbnail derivatives require Pillow")
+        if fmt not in available_formats():
+            raise DerivativeError(f"Unsupported format '{fmt}', available: {', '.join(available_formats())}")
+        for value in (width, height):
+            if value is not None and not 1 <= value <= THUMB_MAX_DIMENSION:
+                raise DerivativeError(f"Dimensions must be between 1 and {THUMB_MAX_DIMENSION}")
+        quality = quality or THUMB_DEFAULT_QUALITY
+        if not 1 <= quality <= 100:
+            raise DerivativeError("Quality must be between 1 and 100")
+        name = f"{derivative_prefix(thumb_name)}{width or 0}x{height or 0}-q{quality}.{fmt}"
+        return name, quality
+
+    async def get(self, minio: MinIOClient, thumb_name: str, width: Optional[int] = None,
+                  height: Optional[int] = None, fmt: str = "jpeg",
+                  quality: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Get a derivative as {"data", "content_type", "etag"}, or None if the source is missing"""
+        name, quality = self.spec(thumb_name, width, height, fmt, quality)
+        cached = self.cache.get(name)
+        if cached is not None:
+            return cached
+        return await self.flights.do(
+            name, lambda: self._produce(minio, name, thumb_name, width, height, fmt, quality)
+        )
+
+    async def _produce(self, minio: MinIOClient, name: str, thumb_name: str,
+                       width: Optional[int], height: Optional[int], fmt: str, quality: int):
+        content_type = FORMATS[fmt][1]
+        data = await minio.aio.fetch_file(MINIO_METADATA_BUCKET, name)
+        if data is not None:
+            self.loaded += 1
+        else:
+            source = await minio.aio.fetch_file(MINIO_METADATA_BUCKET, f"{THUMBNAIL_OBJECT_PREFIX}{thumb_name}")
+            if source is None:
+                return None
+            try:
+                data = await asyncio.get_running_loop().run_in_executor(
+                    render_executor, render, source, width, height, fmt, quality
+                )
+            except (OSError, ValueError, Image.DecompressionBombError) as e:
+                # Unreadable, truncated or oversized thumbnails are a bad request, not a crash
+                raise DerivativeError(f"Cannot render {thumb_name}: {e}")
+            self.rendered += 1
+            # Storing is best effort; the derivative can always be rendered again
+            if not await minio.aio.upload_file(MINIO_METADATA_BUCKET, name, data, content_type):
+                logger.warning(f"Failed to store derivative {name}")
+
+        derivative = {
+            "data": data,
+            "content_type": content_type,
+            "etag": f'"{hashlib.md5(data).hexdigest()}"'
+        }
+        self.cache.set(name, derivative, len(data))
+        return derivative
+
+    def invalidate(self, minio: MinIOClient, thumb_name: str):
+        """Drop every derivative of a thumbnail after the thumbnail itself changed"""
+        prefix = derivative_prefix(thumb_name)
+        self.cache.invalidate_where(lambda key: key.startswith(prefix))
+        try:
+            for obj in minio.iter_objects(MINIO_METADATA_BUCKET, prefix):
+                minio.remove_file(MINIO_METADATA_BUCKET, obj["name"])
+        except Exception as e:
+            logger.warning(f"Failed to remove derivatives of {thumb_name}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "rendered": self.rendered, "loaded_from_storage": self.loaded,
+                **self.flights.stats(), "formats": list(available_formats())}
+
+# Singleton instance
+thumbnail_derivatives = ThumbnailDerivatives()
@@ -0,0 +1,383 @@
+# app/services/uploads.py
+
+"""
+Streaming uploads into MinIO.
+
+Request bodies are parsed as they arrive and fed straight into an S3
+multipart upload, so memory stays around part_size x (parallelism + 1)
+no matter how large the upload is.
+"""
+
+import asyncio
+import hashlib
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Set
+
+from minio.datatypes import Part
+from minio.helpers import MIN_PART_SIZE
+from starlette.requests import Request
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.minio_client import MinIOClient
+from app.core.config import (
+    STORAGE_UPLOAD_PART_SIZE, STORAGE_UPLOAD_PARALLELISM, STORAGE_UPLOAD_WORKERS, CAS_STAGING_PREFIX
+)
+from app.core.logger import setup_logger
+from app.services.dedup import content_store, blob_name, normalize_digest
+
+logger = setup_logger("uploads")
+
+# Threads doing the blocking part uploads, shared by all requests
+upload_executor = ThreadPoolExecutor(max_workers=STORAGE_UPLOAD_WORKERS, thread_name_prefix="upload")
+
+MAX_FIELD_SIZE = 64 * 1024
+
+class UploadError(Exception):
+    """The upload request itself is malformed"""
+
+class MultipartStreamUpload:
+    """
+    Write bytes into an object as an S3 multipart upload.
+
+    Full parts are uploaded in the background with at most `parallelism`
+    in flight; write() waits for a free slot, which pushes back on the
+    request body. Objects smaller than one part go up with a single PUT.
+    """
+
+    def __init__(
+        self,
+        minio: MinIOClient,
+        bucket: str,
+        object_name: str,
+        content_type: Optional[str] = None,
+        part_size: int = STORAGE_UPLOAD_PART_SIZE,
+        parallelism: int = STORAGE_UPLOAD_PARALLELISM
+    ):
+        self.minio = minio
+        self.bucket = bucket
+        self.object_name = object_name
+        self.content_type = content_type or "application/octet-stream"
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.upload_id: Optional[str] = None
+        self.size = 0
+        self._buffer = bytearray()
+        self._parts: List[Part] = []
+        self._next_part = 1
+        self._pending: Set["asyncio.Task[None]"] = set()
+        self._slots = asyncio.Semaphore(max(parallelism, 1))
+        self._error: Optional[BaseException] = None
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(upload_executor, partial(fn, *args))
+
+    async def write(self, data: bytes):
+        """Append data, uploading every full part"""
+        self._buffer += data
+        self.size += len(data)
+        while len(self._buffer) >= self.part_size:
+            with memoryview(self._buffer) as view:
+                chunk = bytes(view[:self.part_size])
+            del self._buffer[:self.part_size]
+            await self._send(chunk)
+
+    async def _send(self, chunk: bytes):
+        if self._error is not None:
+            raise self._error
+        if self.upload_id is None:
+            if not await self._run(self.minio.ensure_bucket_exists, self.bucket):
+                raise RuntimeError(f"Bucket {self.bucket} is not available")
+            self.upload_id = await self._run(
+                self.minio.create_multipart_upload, self.bucket, self.object_name, self.content_type
+            )
+
+        await self._slots.acquire()
+        part_number = self._next_part
+        self._next_part += 1
+        task = asyncio.ensure_future(self._upload_part(part_number, chunk))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _upload_part(self, part_number: int, chunk: bytes):
+        try:
+            part = await self._run(
+                self.minio.upload_part, self.bucket, self.object_name, self.upload_id, part_number, chunk
+            )
+            self._parts.append(part)
+        except BaseException as e:
+            self._error = self._error or e
+            raise
+        finally:
+            self._slots.release()
+
+    async def finish(self) -> Dict[str, Any]:
+        """Upload what is left and complete the object"""
+        if self.upload_id is None:
+            # Everything fit in one part, a plain PUT is cheaper
+            return await self._put()
+        await self._drain()
+        return await self._complete()
+
+    async def _put(self) -> Dict[str, Any]:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        if not await self._run(self.minio.upload_file, self.bucket, self.object_name, data, self.content_type):
+            raise RuntimeError(f"Failed to upload {self.bucket}/{self.object_name}")
+        return {"size": self.size, "parts": 1}
+
+    async def _drain(self):
+        """Send the last, short part and wait for every part to land"""
+        if self._buffer:
+            chunk = bytes(self._buffer)
+            self._buffer.clear()
+            await self._send(chunk)
+        await asyncio.gather(*self._pending)
+
+    async def _complete(self) -> Dict[str, Any]:
+        etag = await self._run(
+            self.minio.complete_multipart_upload, self.bucket, self.object_name, self.upload_id, self._parts
+        )
+        self.upload_id = None
+        return {"size": self.size, "parts": len(self._parts), "etag": etag}
+
+    async def abort(self):
+        """Abandon the upload and discard any uploaded parts"""
+        self._buffer.clear()
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        if self.upload_id is not None:
+            await self._run(self.minio.abort_multipart_upload, self.bucket, self.object_name, self.upload_id)
+            self.upload_id = None
+
+class ContentAddressedUpload(MultipartStreamUpload):
+    """
+    Upload into the content-addressed store, hashing the bytes on the way.
+
+    With the digest declared up front the data goes straight to its blob,
+    and is not read at all if that blob already exists. Otherwise it is
+    staged and the digest decides at the end: a known blob means the staged
+    parts are discarded, a new one is copied into place. Either way the
+    requested name is written as an alias of the blob.
+    """
+
+    def __init__(
+        self,
+        minio: MinIOClient,
+        bucket: str,
+        object_name: str,
+        content_type: Optional[str] = None,
+        digest: Optional[str] = None,
+        **kwargs
+    ):
+        target = blob_name(digest) if digest else f"{CAS_STAGING_PREFIX}{uuid.uuid4().hex}"
+        super().__init__(minio, bucket, target, content_type, **kwargs)
+        self.alias_name = object_name
+        self.expected = digest
+        self.existing: Optional[int] = None
+        self._hasher = hashlib.sha256()
+
+    async def check(self) -> bool:
+        """Whether the declared digest is already stored, so the body need not be read"""
+        if self.expected:
+            self.existing = await self._run(content_store.blob_size, self.minio, self.bucket, self.expected)
+        return self.existing is not None
+
+    async def _send(self, chunk: bytes):
+        # Parts go out in order, so the digest can be fed here, off the event loop
+        await self._run(self._hasher.update, chunk)
+        await super()._send(chunk)
+
+    async def finish(self) -> Dict[str, Any]:
+        if self.existing is not None:
+            await self._alias(self.expected)
+            content_store.count(uploads=1, deduplicated=1, transfers_skipped=1,
+                                bytes_received=self.size, bytes_saved=self.existing)
+            return {"size": self.existing, "parts": 0, "sha256": self.expected,
+                    "deduplicated": True, "transfer_skipped": True}
+
+        if self.upload_id is None:
+            await self._run(self._hasher.update, self._buffer)
+        else:
+            await self._drain()
+        digest = self._hasher.hexdigest()
+        if self.expected and digest != self.expected:
+            await self.abort()
+            raise UploadError(f"Uploaded content has sha256 {digest}, not the declared {self.expected}")
+
+        if await self._run(content_store.blob_size, self.minio, self.bucket, digest) is not None:
+            await self.abort()
+            result = {"size": self.size, "parts": 0, "deduplicated": True}
+            content_store.count(uploads=1, deduplicated=1, bytes_received=self.size, bytes_saved=self.size)
+        else:
+            if self.upload_id is None:
+                # One PUT can go straight to the blob now that the digest is known
+                self.object_name = blob_name(digest)
+                result = await self._put()
+            else:
+                result = await self._complete()
+                if self.object_name != blob_name(digest):
+                    try:
+                        await self._run(self.minio.copy_object, self.bucket, self.object_name, blob_name(digest))
+                    finally:
+                        await self._run(self.minio.remove_file, self.bucket, self.object_name)
+            content_store.stored(self.bucket, digest, self.size)
+            content_store.count(uploads=1, bytes_received=self.size, bytes_stored=self.size)
+            result["deduplicated"] = False
+
+        await self._alias(digest)
+        result["sha256"] = digest
+        return result
+
+    async def _alias(self, digest: str):
+        if not await self._run(content_store.link, self.minio, self.bucket, self.alias_name, digest, self.content_type):
+            raise RuntimeError(f"Failed to write alias {self.bucket}/{self.alias_name}")
+
+class _FormEvents:
+    """Collects python-multipart callbacks so they can be handled asynchronously"""
+
+    def __init__(self):
+        self.events: List[tuple] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+
+    def callbacks(self) -> Dict[str, Any]:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._field.lower()] = self._value
+        self._field = b""
+        self._value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+        content_type = self._headers.get(b"content-type")
+        self.events.append((
+            "begin",
+            name,
+            filename.decode("utf-8", "replace") if filename is not None else None,
+            content_type.decode("latin-1") if content_type else None
+        ))
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        self.events.append(("data", data[start:end]))
+
+    def _on_part_end(self):
+        self.events.append(("end",))
+
+async def stream_form_upload(
+    request: Request,
+    minio: MinIOClient,
+    bucket: Optional[str] = None,
+    path: Optional[str] = None,
+    dedup: bool = False
+) -> Dict[str, Any]:
+    """
+    Stream a multipart/form-data upload (fields `bucket`, `path`, `file`) into MinIO.
+
+    `bucket` and `path` must come before `file` in the form, or be passed in
+    directly; curl -F and browser FormData both keep field order.
+
+    With `dedup` the file goes into the content-addressed store. Its sha256
+    may be declared in an `sha256` field before `file` or an X-Content-SHA256
+    header; if that content is already stored, the response is sent without
+    reading the rest of the body.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise UploadError("Expected a multipart/form-data body")
+
+    fields: Dict[str, Any] = {"bucket": bucket, "path": path, "sha256": request.headers.get("x-content-sha256")}
+    form = _FormEvents()
+    parser = MultipartParser(options[b"boundary"], form.callbacks())
+
+    upload: Optional[MultipartStreamUpload] = None
+    current: Optional[str] = None
+    value = bytearray()
+    result: Optional[Dict[str, Any]] = None
+
+    try:
+        async for chunk in request.stream():
+            if not chunk:
+                continue
+            parser.write(chunk)
+            events, form.events = form.events, []
+
+            for event in events:
+                kind = event[0]
+                if kind == "begin":
+                    _, name, filename, part_type = event
+                    if name == "file" and filename is not None and result is None and upload is None:
+                        if not fields["bucket"] or fields["path"] is None:
+                            raise UploadError("Form fields 'bucket' and 'path' must precede 'file'")
+                        object_name = f"{fields['path'].rstrip('/')}/{filename}"
+                        result = {
+                            "bucket": fields["bucket"],
+                            "object_name": object_name,
+                            "file_name": filename,
+                            "content_type": part_type
+                        }
+                        if dedup:
+                            try:
+                                digest = normalize_digest(fields["sha256"])
+                            except ValueError as e:
+                                raise UploadError(str(e))
+                            upload = ContentAddressedUpload(minio, fields["bucket"], object_name, part_type, digest)
+                            if await upload.check():
+                                # Already stored; the rest of the body is never read
+                                result.update(await upload.finish())
+                                return result
+                        else:
+                            upload = MultipartStreamUpload(minio, fields["bucket"], object_name, part_type)
+                        current = "file"
+                    else:
+                        current = name if filename is None else None
+                        value.clear()
+                elif kind == "data":
+                    if current == "file":
+                        await upload.write(event[1])
+                    elif current is not None:
+                        value += event[1]
+                        if len(value) > MAX_FIELD_SIZE:
+                            raise UploadError(f"Form field '{current}' is too large")
+                elif kind == "end":
+                    if current == "file":
+                        result.update(await upload.finish())
+                        upload = None
+                    elif current in fields and fields[current] is None:
+                        fields[current] = value.decode("utf-8")
+                    current = None
+        parser.finalize()
+    except BaseException:
+        if upload is not None:
+            await upload.abort()
+        raise
+
+    if result is None or upload is not None:
+        raise UploadError("No complete 'file' part in the upload")
+    return result
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark /storage/download in proxy mode (bytes stream through this
+service) versus redirect mode (302 to a presigned MinIO URL).
+
+MinIO is faked: stat is instant and object bytes are generated in memory,
+so proxy-mode numbers are a lower bound on the real cost. Redirect mode only
+signs a URL, which happens locally.
+
+    python scripts/bench_download_modes.py --requests 50 --size-mb 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def fake_minio(size: int):
+    from app.core.minio_client import MinIOClient
+
+    block = os.urandom(1024 * 1024)
+
+    class FakeMinIOClient(MinIOClient):
+        def stat_object(self, bucket_name, object_name):
+            return SimpleNamespace(
+                size=size, etag="bench", content_type="video/mp4",
+                last_modified=datetime(2026, 1, 1, tzinfo=timezone.utc)
+            )
+
+        def stream_object(self, bucket_name, object_name, offset=0, length=0, chunk_size=1024 * 1024):
+            remaining = length or size - offset
+            while remaining > 0:
+                n = min(remaining, chunk_size, len(block))
+                yield block[:n]
+                remaining -= n
+
+    return FakeMinIOClient()
+
+async def call(app, path: str, query: str):
+    """Issue one GET straight against the ASGI app, returning (status, body bytes)"""
+    sent = False
+    response = {"bytes": 0}
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.Event().wait()
+        sent = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["bytes"] += len(message.get("body", b""))
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "", "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [],
+    }
+    await app(scope, receive, send)
+    return response["status"], response["bytes"]
+
+async def bench(args):
+    from fastapi import FastAPI
+    from app.api import storage
+
+    client = fake_minio(args.size_mb * 1024 * 1024)
+    app = FastAPI()
+    app.include_router(storage.router, prefix="/storage")
+    app.dependency_overrides[storage.get_minio_client] = lambda: client
+
+    for mode in ("proxy", "redirect"):
+        latencies = []
+        through_python = 0
+        cpu_start = time.process_time()
+        for i in range(args.requests):
+            # A handful of distinct objects, as a page of thumbnails would request
+            path = f"/storage/download/rtmp/recordings/bench-{i % 10}.mp4"
+            start = time.perf_counter()
+            status, sent = await call(app, path, f"mode={mode}")
+            latencies.append(time.perf_counter() - start)
+            through_python += sent
+        cpu = time.process_time() - cpu_start
+        print(json.dumps({
+            "mode": mode,
+            "status": status,
+            "requests": args.requests,
+            "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+            "p99_ms": round(sorted(latencies)[int(len(latencies) * 0.99) - 1] * 1000, 3),
+            "mb_through_python": round(through_python / 1024 / 1024, 1),
+            "cpu_seconds": round(cpu, 3),
+        }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--size-mb", type=int, default=8)
+    asyncio.run(bench(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark large-file downloads through /storage/download served from MinIO
+versus the local NAS mirror (pread fallback and zero-copy sendfile).
+
+MinIO is stood in for by a plain HTTP file server in a child process, read
+with urllib3 the way the MinIO SDK does, so the "minio" numbers include the
+HTTP client work this service does but not MinIO's own. Response bodies are
+written to a socket drained by another child process, as a server would
+write them to the client. CPU is this process only. The file is read once
+beforehand so every mode sees a warm page cache.
+
+    python scripts/bench_local_mirror.py --size-mb 1024 --runs 3
+"""
+
+import argparse
+import asyncio
+import functools
+import http.server
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def serve_directory(directory: str, port_queue):
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+def fake_minio(port: int):
+    import urllib3
+    from app.core.minio_client import MinIOClient
+    from types import SimpleNamespace
+
+    pool = urllib3.PoolManager(maxsize=4)
+
+    class HTTPMinIOClient(MinIOClient):
+        def stat_object(self, bucket_name, object_name):
+            response = pool.request("HEAD", f"http://127.0.0.1:{port}/{os.path.basename(object_name)}")
+            return SimpleNamespace(size=int(response.headers["Content-Length"]), etag="bench",
+                                   content_type="video/mp4", last_modified=None)
+
+        def stream_object(self, bucket_name, object_name, offset=0, length=0, chunk_size=1024 * 1024):
+            response = pool.request("GET", f"http://127.0.0.1:{port}/{os.path.basename(object_name)}",
+                                    preload_content=False)
+            try:
+                yield from response.stream(chunk_size)
+            finally:
+                response.release_conn()
+
+    return HTTPMinIOClient()
+
+def drain(sock: socket.socket):
+    buffer = bytearray(1024 * 1024)
+    while sock.recv_into(buffer):
+        pass
+
+async def call(app, path: str, zerocopy: bool, downstream: socket.socket):
+    """Issue one GET straight against the ASGI app, writing the body to downstream"""
+    sent = False
+    response = {"bytes": 0}
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.Event().wait()
+        sent = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["source"] = dict(message["headers"]).get(b"x-storage-source", b"").decode()
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            downstream.sendall(body)
+            response["bytes"] += len(body)
+        elif message["type"] == "http.response.zerocopysend":
+            # What a server implementing the extension does with the descriptor
+            offset, remaining = message["offset"], message["count"]
+            while remaining > 0:
+                n = os.sendfile(downstream.fileno(), message["file"], offset, remaining)
+                if n == 0:
+                    break
+                offset += n
+                remaining -= n
+                response["bytes"] += n
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [], "extensions": {"http.response.zerocopysend": {}} if zerocopy else {},
+    }
+    await app(scope, receive, send)
+    return response
+
+async def bench(args, directory: str, port: int, downstream: socket.socket):
+    from fastapi import FastAPI
+    from app.api import storage
+    from app.services.local_mirror import local_mirror
+
+    client = fake_minio(port)
+    app = FastAPI()
+    app.include_router(storage.router, prefix="/storage")
+    app.dependency_overrides[storage.get_minio_client] = lambda: client
+    local_mirror.mirrors = [{"bucket": "rtmp", "prefix": "recordings/", "root": directory}]
+    local_mirror.settle_seconds = 0
+
+    for mode in ("minio", "local-pread", "local-zerocopy"):
+        # An empty index sends everything to MinIO
+        if mode == "minio":
+            local_mirror._index = {}
+        else:
+            local_mirror.scan()
+        elapsed = cpu = 0.0
+        total = 0
+        for _ in range(args.runs):
+            cpu_start, start = time.process_time(), time.perf_counter()
+            response = await call(app, "/storage/download/rtmp/recordings/bench.bin", mode == "local-zerocopy", downstream)
+            elapsed += time.perf_counter() - start
+            cpu += time.process_time() - cpu_start
+            total += response["bytes"]
+        print(json.dumps({
+            "mode": mode,
+            "source": response["source"],
+            "status": response["status"],
+            "mb": round(total / 1024 / 1024),
+            "mb_per_sec": round(total / 1024 / 1024 / elapsed),
+            "cpu_seconds_per_gb": round(cpu / (total / 1024 ** 3), 3),
+        }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.bin")
+        block = os.urandom(1024 * 1024)
+        with open(path, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(block)
+        with open(path, "rb") as f:
+            while f.read(16 * 1024 * 1024):
+                pass
+
+        ports = multiprocessing.Queue()
+        server = multiprocessing.Process(target=serve_directory, args=(directory, ports), daemon=True)
+        server.start()
+        downstream, sink = socket.socketpair()
+        drainer = multiprocessing.Process(target=drain, args=(sink,), daemon=True)
+        drainer.start()
+        sink.close()
+        try:
+            asyncio.run(bench(args, directory, ports.get(timeout=10), downstream))
+        finally:
+            downstream.close()
+            server.terminate()
+            drainer.join(timeout=10)
+
+if __name__ == "__main__":
+    main()
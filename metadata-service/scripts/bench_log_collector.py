@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Benchmark following container logs: the old thread-per-service LogStreamer
+(docker SDK, one blocking stream per thread) against ContainerLogCollector
+(one event loop for every container).
+
+A fake Docker daemon in a child process serves the Engine API on a unix
+socket with --containers containers each writing --rate lines per second.
+CPU is this process only, measured over --seconds after a warm-up. The
+"threads" mode needs the docker package.
+
+    python scripts/bench_log_collector.py --containers 50 --rate 200 --seconds 10
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+TICK = 0.01
+
+def fake_daemon(socket_path: str, containers: int, rate: int):
+    ids = [f"{i:02x}" * 32 for i in range(containers)]
+    listing = [{"Id": cid, "Names": [f"/bench-svc-{i:03d}"], "State": "running"} for i, cid in enumerate(ids)]
+
+    async def respond(writer, body: bytes, status: str = "200 OK"):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nConnection: close\r\n"
+                     f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    async def logs(writer, cid: str):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/vnd.docker.raw-stream\r\n"
+                     b"Transfer-Encoding: chunked\r\n\r\n")
+        sequence, credit, last = 0, 0.0, time.perf_counter()
+        while True:
+            await asyncio.sleep(TICK)
+            now = time.perf_counter()
+            credit += rate * (now - last)
+            last = now
+            frames = bytearray()
+            while credit >= 1:
+                line = f"{time.time():.6f} INFO worker-{cid[:4]} handled request #{sequence} in 3.2ms status=200\n".encode()
+                frames += bytes([1 if sequence % 10 else 2, 0, 0, 0]) + len(line).to_bytes(4, "big") + line
+                sequence += 1
+                credit -= 1
+            if frames:
+                writer.write(b"%x\r\n" % len(frames) + bytes(frames) + b"\r\n")
+                await writer.drain()
+
+    async def handle(reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b""):
+                pass
+            path = re.sub(r"^/v[\d.]+", "", request.split()[1].decode().split("?")[0])
+            if path == "/containers/json":
+                await respond(writer, json.dumps(listing).encode())
+            elif path == "/events":
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nTransfer-Encoding: chunked\r\n\r\n")
+                await writer.drain()
+                await asyncio.Event().wait()
+            elif path.endswith("/logs"):
+                await logs(writer, path.split("/")[2])
+            elif path.endswith("/json"):
+                cid = path.split("/")[2]
+                index = ids.index(cid)
+                await respond(writer, json.dumps({
+                    "Id": cid, "Name": f"/bench-svc-{index:03d}", "Config": {"Tty": False},
+                    "State": {"Running": True}
+                }).encode())
+            else:
+                await respond(writer, b'{"message": "not found"}', "404 Not Found")
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def main():
+        server = await asyncio.start_unix_server(handle, socket_path)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+class Counter:
+    def __init__(self):
+        self.lines = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, entry):
+        with self._lock:
+            self.lines += 1
+
+def run_threads(socket_path: str, services, counter: Counter):
+    """The previous LogStreamer: a docker SDK stream per service, each in its own thread"""
+    import docker
+    client = docker.DockerClient(base_url=f"unix://{socket_path}", version="1.41")
+    running = True
+
+    def follow(service):
+        for container in client.containers.list(all=True):
+            if service in container.name:
+                break
+        else:
+            return
+        for line in container.logs(stream=True, follow=True, tail=10):
+            if not running:
+                break
+            msg = line.decode("utf-8").strip()
+            if msg:
+                counter({"service": service, "container_id": container.id[:12],
+                         "timestamp": time.time(), "message": msg})
+
+    for service in services:
+        threading.Thread(target=follow, args=(service,), daemon=True).start()
+
+    def stop():
+        nonlocal running
+        running = False
+    return stop
+
+def run_collector(socket_path: str, services, counter: Counter):
+    from app.core.docker_api import DockerAPI
+    from app.core.logging import ContainerLogCollector
+
+    collector = ContainerLogCollector(services, counter, api=DockerAPI(socket_path))
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(collector.run())
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+
+    threading.Thread(target=run, daemon=True).start()
+    return lambda: loop.call_soon_threadsafe(task.cancel)
+
+def bench(args, socket_path: str):
+    services = [f"bench-svc-{i:03d}" for i in range(args.containers)]
+    for mode in args.modes:
+        counter = Counter()
+        baseline_threads = threading.active_count()
+        stop = {"threads": run_threads, "collector": run_collector}[mode](socket_path, services, counter)
+        time.sleep(args.warmup)
+        lines, cpu, start = counter.lines, time.process_time(), time.perf_counter()
+        time.sleep(args.seconds)
+        elapsed = time.perf_counter() - start
+        lines, cpu = counter.lines - lines, time.process_time() - cpu
+        print(json.dumps({
+            "mode": mode,
+            "containers": args.containers,
+            "threads": threading.active_count() - baseline_threads,
+            "lines_per_sec": round(lines / elapsed),
+            "expected_lines_per_sec": args.containers * args.rate,
+            "cpu_percent": round(cpu / elapsed * 100, 1),
+            "cpu_us_per_line": round(cpu / max(lines, 1) * 1e6, 2),
+        }))
+        stop()
+        time.sleep(0.5)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--containers", type=int, default=50)
+    parser.add_argument("--rate", type=int, default=200, help="lines per second per container")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--modes", nargs="+", default=["threads", "collector"], choices=["threads", "collector"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "docker.sock")
+        daemon = multiprocessing.Process(target=fake_daemon, args=(socket_path, args.containers, args.rate),
+                                         daemon=True)
+        daemon.start()
+        for _ in range(100):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.05)
+        try:
+            bench(args, socket_path)
+        finally:
+            daemon.terminate()
+
+if __name__ == "__main__":
+    main()
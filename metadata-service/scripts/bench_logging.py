@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cost of a log call on the request path: the previous
+setup_logger (a StreamHandler on each logger, plus a second f-string copy
+handed to LogStreamer) against the queue pipeline in app.core.logger.
+
+Each mode is run against a fast sink (/dev/null) and a slow one that
+takes --slow-us per write, like a blocked terminal or log driver. The
+time measured is the caller's only; the queue mode's writer thread is not
+counted, and records it had to drop are reported. Calls are paced at
+--rate per second; 0 runs them back to back, which no writer keeps up with.
+
+    python scripts/bench_logging.py --calls 20000 --rate 2000 --slow-us 50
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.core.config import LOG_FORMAT, LOG_QUEUE_SIZE
+from app.core.logger import DrainingQueueListener, NonBlockingQueueHandler
+
+class SlowStream:
+    def __init__(self, stream, delay: float):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, data):
+        deadline = time.perf_counter() + self.delay
+        while time.perf_counter() < deadline:
+            pass
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+def formatter():
+    return logging.Formatter(LOG_FORMAT, datefmt="%Y-%m-%d %H:%M:%S")
+
+def legacy(name: str, stream):
+    """The previous setup_logger: a handler per logger, and a wrapper that also logs to LogStreamer"""
+    std = logging.getLogger(f"legacy.{name}")
+    std.propagate = False
+    std.setLevel(logging.INFO)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(formatter())
+    std.addHandler(handler)
+    streamer = logging.getLogger(f"legacy-streamer.{name}")
+    streamer.propagate = False
+    streamer.setLevel(logging.INFO)
+    streamer.addHandler(handler)
+
+    def info(msg):
+        std.info(msg)
+        streamer.info(f"[{name}] {msg}")
+    return info, lambda: None, lambda: 0
+
+def queued(name: str, stream):
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(formatter())
+    listener = DrainingQueueListener(log_queue, handler)
+    listener.start()
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    logger = logging.getLogger(f"queued.{name}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(queue_handler)
+    return logger.info, listener.stop, lambda: queue_handler.dropped
+
+def bench(mode: str, sink: str, stream, calls: int, rate: float):
+    name = f"{mode}-{sink}"
+    if mode == "legacy":
+        info, stop, dropped = legacy(name, stream)
+        call = lambda i: info(f"Uploaded recordings/clip-{i}.mp4 to rtmp")
+    else:
+        info, stop, dropped = queued(name, stream)
+        call = lambda i: info("Uploaded %s to %s", f"recordings/clip-{i}.mp4", "rtmp")
+    samples = []
+    clock = time.perf_counter
+    interval = 1 / rate if rate else 0
+    due = clock()
+    for i in range(calls):
+        if interval:
+            due += interval
+            time.sleep(max(due - clock(), 0))
+        start = clock()
+        call(i)
+        samples.append(clock() - start)
+    stop()
+    samples.sort()
+    return {
+        "mode": mode,
+        "sink": sink,
+        "calls": calls,
+        "rate": rate,
+        "mean_us": round(statistics.fmean(samples) * 1e6, 2),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 2),
+        "p99_us": round(samples[int(len(samples) * 0.99)] * 1e6, 2),
+        "max_us": round(samples[-1] * 1e6, 1),
+        "dropped": dropped(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=2000, help="log calls per second, 0 for unpaced")
+    parser.add_argument("--slow-us", type=float, default=50)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull:
+        for sink in ("fast", "slow"):
+            stream = devnull if sink == "fast" else SlowStream(devnull, args.slow_us / 1e6)
+            for mode in ("legacy", "queue"):
+                print(json.dumps(bench(mode, sink, stream, args.calls, args.rate)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark fetching N metadata documents with serial /storage/metadata/get
+requests versus one /storage/metadata/batch-get request (JSON and NDJSON).
+
+MinIO is faked with a fixed per-request latency and the metadata cache is
+cleared between runs, so every document costs one MinIO round trip.
+
+    python scripts/bench_metadata_batch.py --docs 200 --latency 0.005
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def fake_minio(latency: float):
+    from app.core.minio_client import MinIOClient
+
+    class FakeMinIOClient(MinIOClient):
+        def __init__(self):
+            super().__init__()
+            self.objects = {}
+            self.gets = 0
+            self._lock = threading.Lock()
+
+        def fetch_file(self, bucket_name, object_name):
+            time.sleep(latency)
+            with self._lock:
+                self.gets += 1
+            return self.objects.get((bucket_name, object_name))
+
+    return FakeMinIOClient()
+
+async def call(app, method: str, path: str, body: bytes = b"", query: str = ""):
+    """Issue one request straight against the ASGI app"""
+    sent = False
+    response = {"body": b""}
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            # Stay connected until the response is done
+            await asyncio.Event().wait()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "", "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [(b"content-type", b"application/json")],
+    }
+    await app(scope, receive, send)
+    return response
+
+async def bench(args):
+    from fastapi import FastAPI
+    from app.api import storage
+    from app.core.config import MINIO_METADATA_BUCKET
+    from app.services.metadata_cache import metadata_cache
+
+    client = fake_minio(args.latency)
+    keys = [f"bench-doc-{i}" for i in range(args.docs)]
+    for key in keys:
+        client.objects[(MINIO_METADATA_BUCKET, f"{key}.json")] = json.dumps({"key": key, "pad": "x" * 1024}).encode()
+
+    app = FastAPI()
+    app.include_router(storage.router, prefix="/storage")
+    app.dependency_overrides[storage.get_minio_client] = lambda: client
+    payload = json.dumps({"keys": keys}).encode()
+
+    async def serial():
+        for key in keys:
+            await call(app, "GET", f"/storage/metadata/get/{key}")
+
+    async def batch_json():
+        await call(app, "POST", "/storage/metadata/batch-get", payload)
+
+    async def batch_ndjson():
+        await call(app, "POST", "/storage/metadata/batch-get", payload, "format=ndjson")
+
+    for name, run in (("serial", serial), ("batch-json", batch_json), ("batch-ndjson", batch_ndjson)):
+        metadata_cache.cache.clear()
+        client.gets = 0
+        start = time.perf_counter()
+        await run()
+        elapsed = time.perf_counter() - start
+        print(json.dumps({
+            "mode": name,
+            "docs": args.docs,
+            "seconds": round(elapsed, 3),
+            "docs_per_sec": round(args.docs / elapsed),
+            "minio_gets": client.gets,
+        }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.005, help="fake MinIO latency in seconds")
+    asyncio.run(bench(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
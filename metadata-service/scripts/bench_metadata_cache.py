@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark metadata reads with and without the read-through cache.
+
+Simulates dashboards polling a handful of job/metadata documents from several
+threads while a writer updates one of them periodically. MinIO is faked with
+a fixed per-request latency so the numbers isolate the cache's effect; pass
+--real to read from the configured MinIO (the keys must exist).
+
+    python scripts/bench_metadata_cache.py --pollers 8 --keys 5 --seconds 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def fake_minio(latency: float):
+    from app.core.minio_client import MinIOClient
+
+    class FakeMinIOClient(MinIOClient):
+        def __init__(self):
+            super().__init__()
+            self.objects = {}
+            self.gets = 0
+            self._lock = threading.Lock()
+
+        def fetch_file(self, bucket_name, object_name):
+            time.sleep(latency)
+            with self._lock:
+                self.gets += 1
+                return self.objects.get((bucket_name, object_name))
+
+        def upload_json(self, bucket_name, object_name, data):
+            time.sleep(latency)
+            with self._lock:
+                self.objects[(bucket_name, object_name)] = json.dumps(data).encode()
+            return True
+
+    return FakeMinIOClient()
+
+def run(mode: str, client, args) -> dict:
+    from app.core.config import MINIO_METADATA_BUCKET, JOBS_OBJECT_PREFIX
+    from app.services.metadata_cache import MetadataCache
+
+    cache = MetadataCache(broadcast=False)
+    keys = [f"{JOBS_OBJECT_PREFIX}bench-{i}.json" for i in range(args.keys)]
+    for i, key in enumerate(keys):
+        client.upload_json(MINIO_METADATA_BUCKET, key, {"job_id": f"bench-{i}", "status": "processing", "pad": "x" * 2048})
+    gets_before = getattr(client, "gets", 0)
+
+    if mode == "cached":
+        read = lambda key: cache.get_json(client, MINIO_METADATA_BUCKET, key)
+    else:
+        read = lambda key: client.download_json(MINIO_METADATA_BUCKET, key)
+
+    stop = threading.Event()
+    latencies = []
+    lock = threading.Lock()
+
+    def poller(offset):
+        local = []
+        i = offset
+        while not stop.is_set():
+            start = time.perf_counter()
+            read(keys[i % len(keys)])
+            local.append(time.perf_counter() - start)
+            i += 1
+        with lock:
+            latencies.extend(local)
+
+    def writer():
+        n = 0
+        while not stop.wait(args.write_interval):
+            n += 1
+            data = {"job_id": "bench-0", "status": "processing", "progress": n}
+            if mode == "cached":
+                cache.put_json(client, MINIO_METADATA_BUCKET, keys[0], data)
+            else:
+                client.upload_json(MINIO_METADATA_BUCKET, keys[0], data)
+
+    threads = [threading.Thread(target=poller, args=(i,)) for i in range(args.pollers)]
+    threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    latencies.sort()
+    result = {
+        "mode": mode,
+        "reads": len(latencies),
+        "reads_per_sec": round(len(latencies) / args.seconds),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+    if hasattr(client, "gets"):
+        result["minio_gets_per_sec"] = round((client.gets - gets_before) / args.seconds)
+    if mode == "cached":
+        result["hit_ratio"] = cache.stats()["hit_ratio"]
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pollers", type=int, default=8)
+    parser.add_argument("--keys", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--latency", type=float, default=0.005, help="fake MinIO latency in seconds")
+    parser.add_argument("--write-interval", type=float, default=1.0)
+    parser.add_argument("--real", action="store_true", help="read from the configured MinIO")
+    args = parser.parse_args()
+
+    from app.core.minio_client import MinIOClient
+
+    for mode in ("uncached", "cached"):
+        client = MinIOClient() if args.real else fake_minio(args.latency)
+        print(json.dumps(run(mode, client, args)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark the metadata search index: rebuild, save/load and query latency.
+
+Synthetic metadata documents are served by a fake in-memory MinIO, so the
+rebuild number is indexing cost only, not network time.
+
+    python scripts/bench_search.py --docs 100000 --queries 200
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+WORDS = ("interview studio outdoor drone sunset city night crowd street portrait "
+         "broll timelapse product review launch keynote rehearsal backstage").split()
+TAGS = ["CDAProd", "RTMP", "Interview", "B-Roll", "Drone", "Studio", "Client A", "Client B",
+        "Archive", "Raw", "Graded", "Social"]
+
+def make_docs(count: int):
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    docs = {}
+    for i in range(count):
+        docs[f"metadata/bench-{i:06d}.json"] = json.dumps({
+            "title": f"CDA Artifact: {' '.join(rng.sample(WORDS, 3))} {i}",
+            "description": " ".join(rng.sample(WORDS, 6)),
+            "tags": rng.sample(TAGS, 3),
+            "generated_at": (now - timedelta(minutes=rng.randrange(60 * 24 * 90))).isoformat() + "Z",
+            "sha256_hash": "%064x" % rng.getrandbits(256),
+            "duration": round(rng.uniform(5, 3600), 2),
+        }).encode()
+    return docs
+
+def fake_minio(docs):
+    from app.core.config import MINIO_METADATA_BUCKET
+    from app.core.minio_client import MinIOClient
+
+    class FakeMinIOClient(MinIOClient):
+        def iter_objects(self, bucket_name, prefix="", recursive=True, start_after=None):
+            if bucket_name == MINIO_METADATA_BUCKET:
+                for name in docs:
+                    yield {"name": name}
+
+        def fetch_file(self, bucket_name, object_name):
+            return docs.get(object_name)
+
+    return FakeMinIOClient()
+
+def timed_ms(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return result, {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[min(int(len(samples) * 0.99), len(samples) - 1)], 3)
+    }
+
+def bench(args):
+    from app.core.config import MINIO_METADATA_BUCKET
+    from app.services.search_index import MetadataSearchIndex, parse_time
+
+    docs = make_docs(args.docs)
+    path = os.path.join(tempfile.mkdtemp(), "search-index.json.gz")
+    index = MetadataSearchIndex(path)
+
+    rebuild = index.rebuild(fake_minio(docs))
+    print(json.dumps({"step": "rebuild", **rebuild}))
+
+    start = time.perf_counter()
+    index.save()
+    print(json.dumps({"step": "save", "seconds": round(time.perf_counter() - start, 3),
+                      "file_mb": round(os.path.getsize(path) / 1024 / 1024, 2)}))
+
+    start = time.perf_counter()
+    MetadataSearchIndex(path).load()
+    print(json.dumps({"step": "load", "seconds": round(time.perf_counter() - start, 3)}))
+
+    queries = {
+        "tag + last week": lambda: index.search(tags=["Interview"], since=parse_time("7d")),
+        "words": lambda: index.search(q="drone sunset"),
+        "words + tag + duration": lambda: index.search(q="interview", tags=["Client A"], min_duration=600),
+        "sha256 prefix": lambda: index.search(sha256="abc1"),
+        "everything, longest first": lambda: index.search(sort="-duration"),
+    }
+    for name, query in queries.items():
+        result, latency = timed_ms(query, args.queries)
+        print(json.dumps({"query": name, "total": result["total"], **latency}))
+
+    counter = iter(range(args.docs, args.docs + args.queries))
+    sample = json.loads(next(iter(docs.values())))
+    _, latency = timed_ms(lambda: index.index_document(
+        MINIO_METADATA_BUCKET, f"metadata/bench-{next(counter):06d}.json", sample), args.queries)
+    print(json.dumps({"step": "incremental index_document", **latency}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200, help="repetitions per query")
+    bench(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark /storage/upload: buffered (the old `await file.read()` handler)
+versus streaming into a multipart upload.
+
+Each mode runs in its own process so peak RSS is measured cleanly. By default
+uploads go to an in-process fake MinIO that discards data after an optional
+per-request latency; pass --real to upload to the configured MinIO instead.
+
+    python scripts/bench_upload.py --size-mb 512 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+BOUNDARY = "benchboundary7MA4YWxkTrZu0gW"
+CHUNK = 64 * 1024
+
+def form_body(size: int):
+    """Yield a multipart/form-data body with a `size` byte file, in CHUNK pieces"""
+    head = (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"bucket\"\r\n\r\nbench\r\n"
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"path\"\r\n\r\nuploads\r\n"
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"bench.bin\"\r\n"
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    yield head
+    block = os.urandom(CHUNK)
+    sent = 0
+    while sent < size:
+        n = min(CHUNK, size - sent)
+        yield block[:n]
+        sent += n
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+def fake_minio(latency: float):
+    from app.core.minio_client import MinIOClient
+
+    class FakeMinIOClient(MinIOClient):
+        def ensure_bucket_exists(self, bucket_name):
+            return True
+
+        def upload_file(self, bucket_name, object_name, file_data, content_type="application/octet-stream"):
+            time.sleep(latency)
+            return True
+
+        def create_multipart_upload(self, bucket_name, object_name, content_type="application/octet-stream"):
+            return "upload-1"
+
+        def upload_part(self, bucket_name, object_name, upload_id, part_number, data):
+            from minio.datatypes import Part
+            time.sleep(latency)
+            return Part(part_number, f"etag-{part_number}")
+
+        def complete_multipart_upload(self, bucket_name, object_name, upload_id, parts):
+            return "etag"
+
+    return FakeMinIOClient()
+
+def build_app(mode: str, client):
+    from fastapi import FastAPI, File, Form, UploadFile
+    from app.api import storage
+
+    app = FastAPI()
+    if mode == "streaming":
+        app.include_router(storage.router, prefix="/storage")
+        app.dependency_overrides[storage.get_minio_client] = lambda: client
+    else:
+        # The previous handler, kept here as the baseline
+        @app.post("/storage/upload")
+        async def upload_file(bucket: str = Form(...), path: str = Form(...), file: UploadFile = File(...)):
+            file_content = await file.read()
+            object_name = f"{path.rstrip('/')}/{file.filename}"
+            client.upload_file(bucket, object_name, file_content, file.content_type)
+            return {"size": len(file_content)}
+    return app
+
+async def post(app, size: int) -> int:
+    body = form_body(size)
+    status = {}
+
+    async def receive():
+        chunk = next(body, None)
+        if chunk is None:
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return {"type": "http.request", "body": chunk, "more_body": True}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/storage/upload", "raw_path": b"/storage/upload",
+        "query_string": b"", "root_path": "", "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())],
+    }
+    await app(scope, receive, send)
+    return status.get("code", 0)
+
+def run_mode(args) -> dict:
+    from app.core.minio_client import MinIOClient
+
+    client = MinIOClient() if args.real else fake_minio(args.latency)
+    app = build_app(args.mode, client)
+    size = args.size_mb * 1024 * 1024
+
+    start = time.perf_counter()
+    code = asyncio.run(post(app, size))
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": args.mode,
+        "status": code,
+        "size_mb": args.size_mb,
+        "seconds": round(elapsed, 2),
+        "mb_per_sec": round(args.size_mb / elapsed, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.02, help="fake per-request latency in seconds")
+    parser.add_argument("--real", action="store_true", help="upload to the configured MinIO")
+    parser.add_argument("--mode", choices=["buffered", "streaming"], help="run a single mode in-process")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    print(f"{'mode':<10} {'status':>6} {'seconds':>8} {'MB/s':>8} {'peak RSS MB':>12}")
+    for mode in ("buffered", "streaming"):
+        cmd = [sys.executable, __file__, "--mode", mode, "--size-mb", str(args.size_mb),
+               "--latency", str(args.latency)] + (["--real"] if args.real else [])
+        result = json.loads(subprocess.check_output(cmd).decode().strip().splitlines()[-1])
+        print(f"{mode:<10} {result['status']:>6} {result['seconds']:>8} {result['mb_per_sec']:>8} {result['peak_rss_mb']:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Run the synthetic stream probe from the command line, for instance against
+the local nginx-rtmp stand-in in scripts/nginx-rtmp-standin.conf:
+
+    python scripts/stream_probe.py --rtmp rtmp://localhost:1935/probe \\
+        --hls http://localhost:8080/hls --hook-port 5055 --runs 5
+
+With --hook-port, on_publish hooks posted to that port (nginx-rtmp sends the
+stream name in the form body, or in the query string) are timed as well.
+Prints one JSON result per run, then the latency percentiles.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+async def serve_hooks(probe, port: int):
+    """Answer every HTTP request with 200, passing its `name` parameter to the probe"""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                header, _, value = line.decode("latin-1").partition(":")
+                if header.strip().lower() == "content-length":
+                    length = int(value)
+            body = await reader.readexactly(length) if length else b""
+            target = request_line.split()[1].decode() if request_line.strip() else "/"
+            params = parse_qs(urlsplit(target).query)
+            params.update(parse_qs(body.decode("utf-8", "replace")))
+            probe.observe_hook((params.get("name") or [None])[0])
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, "0.0.0.0", port)
+
+async def run(args):
+    from app.services.stream_probe import StreamProbe
+    probe = StreamProbe(rtmp_url=args.rtmp, hls_url=args.hls, duration=args.duration, timeout=args.timeout)
+    server = await serve_hooks(probe, args.hook_port) if args.hook_port else None
+    try:
+        for i in range(args.runs):
+            if i:
+                await asyncio.sleep(args.interval)
+            print(json.dumps(await probe.run()), flush=True)
+    finally:
+        if server is not None:
+            server.close()
+    print(json.dumps({"runs": probe.runs, "failures": probe.failures, "latency": probe.metrics.snapshot()}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rtmp", default="rtmp://localhost:1935/probe", help="RTMP application URL")
+    parser.add_argument("--hls", default="http://localhost:8080/hls", help="URL the broadcast playlists are served under")
+    parser.add_argument("--hook-port", type=int, default=0, help="Listen here for on_publish hooks")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between runs")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of test pattern per run")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for the first segment")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+A finalizer worker process with finalize_video and MinIO stubbed out, for
+tests/test_finalizer_workers.py.
+
+A job's source is "<name>:<seconds>": the stub spends that long finalizing
+on its first attempt and finishes at once when redelivered. Each run is
+logged to $STUB_LOG as "start|end <pid> <name> <time>".
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.services import finalizer_worker
+
+STUB_LOG = os.environ["STUB_LOG"]
+
+def log(event: str, name: str):
+    with open(STUB_LOG, "a") as f:
+        f.write(f"{event} {os.getpid()} {name} {time.time()}\n")
+
+def finalize_video(source, on_progress=None, **_):
+    name, _, seconds = source.partition(":")
+    marker = os.path.join(os.path.dirname(STUB_LOG), f"{name}.attempted")
+    first_attempt = not os.path.exists(marker)
+    open(marker, "w").close()
+    log("start", name)
+    if first_attempt:
+        time.sleep(float(seconds))
+    if on_progress:
+        on_progress("encoding", {"percent": 50.0})
+    # The worker names the uploaded metadata after the thumbnail
+    thumb_path = os.path.join(tempfile.mkdtemp(), f"{name}.jpg")
+    open(thumb_path, "wb").close()
+    log("end", name)
+    return {"thumbnail_path": thumb_path, "metadata": {"name": name}}
+
+class FakeMinIO:
+    def upload_file(self, bucket_name, object_name, file_data, content_type=None):
+        return True
+
+    def upload_json(self, bucket_name, object_name, data):
+        return True
+
+    def download_json(self, bucket_name, object_name):
+        return None
+
+finalizer_worker.finalize_video = finalize_video
+finalizer_worker.get_minio_client = FakeMinIO
+
+if __name__ == "__main__":
+    finalizer_worker.main()
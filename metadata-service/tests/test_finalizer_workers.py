@@ -0,0 +1,135 @@
+"""
+Two finalizer worker processes sharing the stand-in broker
+(app/services/job_queue.py), with finalize_video stubbed out by
+tests/finalizer_stub_worker.py.
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import pytest
+
+from app.services.job_queue import _BrokerManager
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+STUB_WORKER = os.path.join(ROOT, "tests", "finalizer_stub_worker.py")
+AUTHKEY = "test"
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_for(predicate, timeout: float, what: str):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.1)
+    raise AssertionError(f"Timed out waiting for {what}")
+
+def read_log(path: str):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [line.split() for line in f if line.strip()]
+
+@pytest.fixture
+def cluster(tmp_path):
+    address = f"127.0.0.1:{free_port()}"
+    stub_log = str(tmp_path / "runs.log")
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "FINALIZER_QUEUE_BACKEND": "local",
+        "FINALIZER_LOCAL_BROKER": address,
+        "FINALIZER_LOCAL_BROKER_AUTHKEY": AUTHKEY,
+        # Leases last two heartbeats, so a killed worker's job comes back after ~2s
+        "FINALIZER_WORKER_HEARTBEAT": "1",
+        "METADATA_CACHE_INVALIDATION": "false",
+        "STUB_LOG": stub_log,
+    }
+    processes = [subprocess.Popen([sys.executable, "-m", "app.services.job_queue", "serve"], cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)]
+    try:
+        host, port = address.split(":")
+
+        def connect():
+            _BrokerManager.register("broker")
+            manager = _BrokerManager(address=(host, int(port)), authkey=AUTHKEY.encode())
+            try:
+                manager.connect()
+            except OSError:
+                return None
+            return manager.broker()
+
+        broker = wait_for(connect, 15, "the stand-in broker")
+        workers = [
+            subprocess.Popen([sys.executable, STUB_WORKER], cwd=ROOT, env=env,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            for _ in range(2)
+        ]
+        processes += workers
+        yield broker, workers, stub_log
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+
+def publish(broker, name: str, seconds: float):
+    broker.publish(json.dumps({"job_id": name, "source": f"{name}:{seconds}", "metadata": {}, "status": "queued"}))
+
+def final_states(broker):
+    _, states = broker.statuses(0)
+    return {state["job_id"]: state for state in states if state["status"] in ("completed", "failed")}
+
+def test_jobs_are_shared_one_at_a_time_and_redelivered(cluster):
+    broker, workers, stub_log = cluster
+
+    names = [f"job{i}" for i in range(6)]
+    for name in names:
+        publish(broker, name, 0.5)
+    done = wait_for(lambda: (lambda s: s if all(n in s for n in names) else None)(final_states(broker)),
+                    60, "the first batch of jobs")
+
+    # Status comes back through the broker, with each job's results
+    assert all(done[name]["status"] == "completed" for name in names)
+    assert all(done[name]["results"]["metadata"].endswith(f"{name}.json") for name in names)
+
+    # Both workers took part
+    runs = read_log(stub_log)
+    assert len({pid for event, pid, _, _ in runs if event == "start"}) == 2
+
+    # prefetch=1: a worker never starts a job before finishing its previous one
+    by_worker = defaultdict(list)
+    for event, pid, name, at in runs:
+        by_worker[pid].append((float(at), event, name))
+    for events in by_worker.values():
+        active = 0
+        for _, event, _ in sorted(events):
+            active += 1 if event == "start" else -1
+            assert active in (0, 1)
+
+    # A worker killed mid-job loses it to the other one
+    publish(broker, "slow", 60)
+    started = wait_for(lambda: [run for run in read_log(stub_log) if run[0] == "start" and run[2] == "slow"],
+                       30, "the slow job to start")
+    victim = int(started[0][1])
+    worker = next(w for w in workers if w.pid == victim)
+    os.kill(victim, signal.SIGKILL)
+    worker.wait()
+
+    state = wait_for(lambda: final_states(broker).get("slow"), 30, "the slow job to be redelivered")
+    assert state["status"] == "completed"
+    slow_runs = [run for run in read_log(stub_log) if run[0] == "start" and run[2] == "slow"]
+    assert len(slow_runs) == 2
+    assert int(slow_runs[1][1]) != victim
+    assert broker.stats() == {"ready": 0, "unacked": 0}
@@ -68,8 +68,12 @@ generate_nginx_conf() {
     export NGINX_WORKER_PROCESSES=${NGINX_WORKER_PROCESSES:-auto}
     export NGINX_WORKER_CONNECTIONS=${NGINX_WORKER_CONNECTIONS:-2048}
     export MAX_SEGMENT_DURATION=${MAX_SEGMENT_DURATION:-6}
+    # debug logs every RTMP chunk; set NGINX_ERROR_LOG_LEVEL=debug only while troubleshooting
+    export NGINX_ERROR_LOG_LEVEL=${NGINX_ERROR_LOG_LEVEL:-info}
+    # on_publish/on_publish_done hooks go to the metadata service, reachable by name on event_network
+    export METADATA_SERVICE_URL=${METADATA_SERVICE_URL:-http://metadata-service:5000}
 
-    envsubst '${NGINX_WORKER_PROCESSES} ${NGINX_WORKER_CONNECTIONS} ${MAX_SEGMENT_DURATION}' \
+    envsubst '${NGINX_WORKER_PROCESSES} ${NGINX_WORKER_CONNECTIONS} ${MAX_SEGMENT_DURATION} ${NGINX_ERROR_LOG_LEVEL} ${METADATA_SERVICE_URL}' \
         < /etc/nginx/nginx.conf.template > /etc/nginx/nginx.conf
 
     # Validate nginx configuration
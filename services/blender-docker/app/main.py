@@ -3,7 +3,9 @@ from fastapi import FastAPI, UploadFile, File, Form
 from fastapi.responses import JSONResponse
 from jobs.render import process_blender_render
 from minio.video_storage_bucket_client import VideoStorageClient
+import hashlib
 import os
+import uuid
 
 app = FastAPI()
 
@@ -16,6 +18,9 @@ MINIO = VideoStorageClient(
     bucket_name=os.getenv("MINIO_BUCKET", "video-storage")
 )
 
+# Store each distinct upload once and write repeats as aliases
+DEDUP_UPLOADS = os.getenv("DEDUP_UPLOADS", "false").lower() == "true"
+
 @app.post("/process")
 async def process_videos(
     background: UploadFile = File(...),
@@ -29,13 +34,41 @@ async def process_videos(
 async def put_video_to_minio(
     file: UploadFile = File(...)
 ):
-    # Save temp
+    # Save temp, hashing on the way so deduplication needs no second read
     temp_path = f"/mnt/b/app/exports/{uuid.uuid4()}_{file.filename}"
+    digest = hashlib.sha256()
     with open(temp_path, "wb") as f:
-        f.write(await file.read())
-    upload = MINIO.upload_file(temp_path, file.filename)
+        while True:
+            chunk = await file.read(1024 * 1024)
+            if not chunk:
+                break
+            digest.update(chunk)
+            f.write(chunk)
+    if DEDUP_UPLOADS:
+        upload = MINIO.upload_deduplicated(
+            temp_path, file.filename, digest.hexdigest(),
+            file.content_type or "application/octet-stream"
+        )
+    else:
+        upload = MINIO.upload_file(temp_path, file.filename)
     return JSONResponse(upload)
 
+@app.post("/put/check")
+async def check_video_in_minio(
+    sha256: str = Form(...),
+    object_name: str = Form(None)
+):
+    # Lets callers skip sending a file that is already stored
+    if not DEDUP_UPLOADS:
+        return JSONResponse({"error": "Deduplicated uploads are not enabled"}, status_code=409)
+    sha256 = sha256.lower()
+    if not MINIO.has_content(sha256):
+        return JSONResponse({"sha256": sha256, "exists": False})
+    result = {"sha256": sha256, "exists": True}
+    if object_name:
+        result.update(MINIO.link_content(sha256, object_name))
+    return JSONResponse(result)
+
 @app.get("/get")
 async def get_video_from_minio(object_name: str):
     dest = f"/mnt/b/app/exports/{object_name}"
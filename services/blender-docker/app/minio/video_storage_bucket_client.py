@@ -1,7 +1,26 @@
 # /app/minio/video_storage_bucket_client.py
+import hashlib
+import io
+from typing import Optional
+
 from minio import Minio
 from minio.error import S3Error
 
+# Same layout as metadata-service's content-addressed uploads, so its
+# downloads follow aliases written here
+CAS_OBJECT_PREFIX = "cas/sha256/"
+ALIAS_METADATA_KEY = "cas-sha256"
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def blob_name(digest: str) -> str:
+    return f"{CAS_OBJECT_PREFIX}{digest[:2]}/{digest}"
+
 class VideoStorageClient:
     def __init__(
         self,
@@ -34,13 +53,56 @@ class VideoStorageClient:
         except S3Error as err:
             raise RuntimeError(f"MinIO upload error: {err}")
 
+    def has_content(self, sha256: str) -> bool:
+        """
+        Whether a file with this digest is already stored.
+        """
+        try:
+            self.client.stat_object(self.bucket_name, blob_name(sha256))
+            return True
+        except S3Error as err:
+            if err.code == "NoSuchKey":
+                return False
+            raise RuntimeError(f"MinIO stat error: {err}")
+
+    def link_content(self, sha256: str, object_name: str, content_type: str = "application/octet-stream"):
+        """
+        Write object_name as an empty alias of the stored file with this digest.
+        """
+        try:
+            self.client.put_object(
+                self.bucket_name, object_name, io.BytesIO(b""), 0,
+                content_type=content_type, metadata={ALIAS_METADATA_KEY: sha256}
+            )
+            return {"bucket": self.bucket_name, "object": object_name, "sha256": sha256}
+        except S3Error as err:
+            raise RuntimeError(f"MinIO upload error: {err}")
+
+    def upload_deduplicated(self, file_path: str, object_name: str, sha256: Optional[str] = None,
+                            content_type: str = "application/octet-stream"):
+        """
+        Upload local file once per distinct content and alias object_name to it.
+        """
+        sha256 = sha256 or file_sha256(file_path)
+        stored = self.has_content(sha256)
+        if not stored:
+            try:
+                self.client.fput_object(
+                    self.bucket_name, blob_name(sha256), file_path, content_type=content_type
+                )
+            except S3Error as err:
+                raise RuntimeError(f"MinIO upload error: {err}")
+        return {**self.link_content(sha256, object_name, content_type), "deduplicated": stored}
+
     def download_file(self, object_name: str, dest_path: str):
         """
         Download object from MinIO to local path.
         """
         try:
+            stat = self.client.stat_object(self.bucket_name, object_name)
+            sha256 = (stat.metadata or {}).get(f"x-amz-meta-{ALIAS_METADATA_KEY}") if not stat.size else None
             self.client.fget_object(
-                self.bucket_name, object_name, dest_path
+                self.bucket_name, blob_name(sha256) if sha256 else object_name, dest_path
             )
             return dest_path
         except S3Error as err: